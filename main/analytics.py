@@ -0,0 +1,253 @@
+import time
+from collections import Counter
+
+import numpy as np
+
+from main.tracking import LabelHysteresis
+from poses.geometry import FeatureSet
+from poses.rules import NO_POSE
+
+# Folded joint angles (0-180 degrees) whose spread during a hold measures steadiness
+STABILITY_ANGLES = FeatureSet({
+    "left_knee": {"angle": ["LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"], "normalize": True},
+    "right_knee": {"angle": ["RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE"], "normalize": True},
+    "left_hip": {"angle": ["LEFT_KNEE", "LEFT_HIP", "LEFT_SHOULDER"], "normalize": True},
+    "right_hip": {"angle": ["RIGHT_KNEE", "RIGHT_HIP", "RIGHT_SHOULDER"], "normalize": True},
+    "left_elbow": {"angle": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"], "normalize": True},
+    "right_elbow": {"angle": ["RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST"], "normalize": True},
+    "left_shoulder": {"angle": ["LEFT_ELBOW", "LEFT_SHOULDER", "LEFT_HIP"], "normalize": True},
+    "right_shoulder": {"angle": ["RIGHT_ELBOW", "RIGHT_SHOULDER", "RIGHT_HIP"], "normalize": True},
+})
+# Mean joint-angle standard deviation (degrees) at which stability is 0.5
+STABILITY_SCALE = 5.0
+
+
+class RunningStats:
+    """Welford's online mean and variance of a fixed-length vector."""
+
+    def __init__(self, size):
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = np.zeros(self.size)
+        self._m2 = np.zeros(self.size)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not np.all(np.isfinite(values)):
+            return
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (values - self.mean)
+
+    def std(self):
+        return np.sqrt(self._m2 / self.count) if self.count > 1 else np.zeros(self.size)
+
+
+def stability_score(stats):
+    """1.0 for a perfectly still hold, 0.5 at STABILITY_SCALE degrees of mean joint wobble."""
+    if stats.count < 2:
+        return None
+    return 1.0 / (1.0 + float(np.mean(stats.std())) / STABILITY_SCALE)
+
+
+class PersonSession:
+    """
+    Running summary of one person's session in constant memory.
+
+    Labels are debounced with LabelHysteresis; a run of one stable pose is
+    a hold, and holds of at least min_hold seconds count as reps. While a
+    pose is held, joint angles feed a RunningStats, so the hold's stability
+    is known without keeping its frames. Per-pose totals and the
+    pose-to-pose transition counts grow with the number of poses, never
+    with the number of frames.
+
+    Args:
+        person: Track ID.
+        hold_frames (int): Votes a label needs before it becomes the stable
+            pose; 1 for labels that are already debounced.
+        window (int, optional): Voting window; defaults to hold_frames.
+        min_hold (float): Shortest hold counted, in seconds.
+    """
+
+    def __init__(self, person=0, hold_frames=5, window=None, min_hold=1.0):
+        self.person = person
+        self.min_hold = min_hold
+        self.labels = LabelHysteresis(hold_frames, window)
+        self.angles = RunningStats(len(STABILITY_ANGLES.names))
+        self.current = NO_POSE
+        self.hold_start = None
+        self.first_seen = None
+        self.last_seen = None
+        self.frames = 0
+        self.poses = {}
+        self.transitions = Counter()
+        self._previous_pose = None
+
+    def update(self, label, points=None, timestamp=None):
+        """
+        Feeds one frame.
+
+        Args:
+            label (str): Raw per-frame label, e.g. a detect_pose result.
+            points (numpy.ndarray, optional): (33, 4) landmarks of the frame.
+            timestamp (float, optional): Seconds; defaults to now.
+
+        Returns:
+            str: The stable (debounced) pose.
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        if self.first_seen is None:
+            self.first_seen = timestamp
+        stable = self.labels.update(str(label))
+        if stable != self.current:
+            self._close_hold(timestamp)
+            self.current = stable
+            self.hold_start = timestamp
+        # Only frames that agree with the held pose describe how still it is
+        if stable != NO_POSE and points is not None and label == stable:
+            self.angles.add(STABILITY_ANGLES.compute(points))
+        self.last_seen = timestamp
+        self.frames += 1
+        return stable
+
+    def _close_hold(self, timestamp):
+        if self.current == NO_POSE or self.hold_start is None:
+            return
+        duration = timestamp - self.hold_start
+        if duration < self.min_hold:
+            return
+        stability = stability_score(self.angles)
+        pose = self.poses.setdefault(self.current, {
+            "reps": 0, "total_seconds": 0.0, "longest_seconds": 0.0, "_stability_seconds": 0.0,
+            "_weighted_stability": 0.0, "best_stability": None,
+        })
+        pose["reps"] += 1
+        pose["total_seconds"] += duration
+        pose["longest_seconds"] = max(pose["longest_seconds"], duration)
+        if stability is not None:
+            pose["_stability_seconds"] += duration
+            pose["_weighted_stability"] += stability * duration
+            pose["best_stability"] = max(pose["best_stability"] or 0.0, stability)
+        if self._previous_pose is not None and self._previous_pose != self.current:
+            self.transitions[(self._previous_pose, self.current)] += 1
+        self._previous_pose = self.current
+        self.angles.reset()
+
+    def close(self, timestamp=None):
+        """Ends the open hold; later frames start a new one."""
+        timestamp = self.last_seen if timestamp is None else timestamp
+        if timestamp is not None:
+            self._close_hold(timestamp)
+        self.current = NO_POSE
+        self.hold_start = None
+        self.labels.reset()
+
+    def summary(self):
+        """Session so far, including the open hold, as a JSON-ready dict."""
+        poses = {}
+        for label, pose in self.poses.items():
+            weight = pose["_stability_seconds"]
+            poses[label] = {
+                "reps": pose["reps"],
+                "total_seconds": round(pose["total_seconds"], 2),
+                "longest_seconds": round(pose["longest_seconds"], 2),
+                "mean_stability": round(pose["_weighted_stability"] / weight, 3) if weight else None,
+                "best_stability": None if pose["best_stability"] is None else round(pose["best_stability"], 3),
+            }
+        holding = None
+        if self.current != NO_POSE and self.hold_start is not None:
+            stability = stability_score(self.angles)
+            holding = {
+                "pose": self.current,
+                "seconds": round(self.last_seen - self.hold_start, 2),
+                "stability": None if stability is None else round(stability, 3),
+            }
+        return {
+            "person": self.person,
+            "frames": self.frames,
+            "seconds": round(self.last_seen - self.first_seen, 2) if self.frames else 0.0,
+            "holding": holding,
+            "poses": poses,
+            "transitions": [
+                {"from": a, "to": b, "count": count} for (a, b), count in self.transitions.most_common()
+            ],
+        }
+
+    def status_line(self):
+        """One overlay line about the open hold."""
+        if self.current == NO_POSE or self.hold_start is None:
+            return f"person {self.person}: no hold"
+        stability = stability_score(self.angles)
+        steady = "" if stability is None else f", stability {stability:.2f}"
+        return f"{self.current}: {self.last_seen - self.hold_start:.1f}s{steady}"
+
+
+class SessionAnalytics:
+    """
+    Incremental analytics over the pose stream, one PersonSession per
+    tracked person.
+
+    People unseen for expire_after seconds are closed and only their
+    summary is kept, so memory depends on how many people took part,
+    not on how long the session ran.
+
+    Args:
+        hold_frames (int): See PersonSession.
+        window (int, optional): See PersonSession.
+        min_hold (float): See PersonSession.
+        expire_after (float): Seconds before a missing person's session is closed.
+    """
+
+    def __init__(self, hold_frames=5, window=None, min_hold=1.0, expire_after=10.0):
+        self.hold_frames = hold_frames
+        self.window = window
+        self.min_hold = min_hold
+        self.expire_after = expire_after
+        self.people = {}
+        self.finished = []
+
+    def _session(self, person):
+        session = self.people.get(person)
+        if session is None:
+            session = self.people[person] = PersonSession(person, self.hold_frames, self.window, self.min_hold)
+        return session
+
+    def update(self, label, points=None, timestamp=None, person=0):
+        """Feeds one frame of one person; returns their stable pose."""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        stable = self._session(person).update(label, points, timestamp)
+        self.expire(timestamp)
+        return stable
+
+    def update_people(self, people, timestamp=None):
+        """Feeds one frame of a multi-person stream (Person tuples)."""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        for person in people:
+            self._session(person.id).update(person.label, person.points, timestamp)
+        self.expire(timestamp)
+
+    def expire(self, timestamp):
+        stale = [p for p, s in self.people.items() if timestamp - s.last_seen > self.expire_after]
+        for person in stale:
+            session = self.people.pop(person)
+            session.close()
+            self.finished.append(session.summary())
+
+    def status_lines(self):
+        return [session.status_line() for session in self.people.values()]
+
+    def summary(self):
+        """Summaries of everyone, active and finished, on demand."""
+        return {"people": self.finished + [session.summary() for session in self.people.values()]}
+
+    def close(self, timestamp=None):
+        """Ends the session: closes every open hold and returns the final summary."""
+        for session in self.people.values():
+            session.close(timestamp)
+            self.finished.append(session.summary())
+        self.people.clear()
+        return {"people": self.finished}
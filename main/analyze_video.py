@@ -0,0 +1,209 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import warnings
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from main.pipeline import analyze_frame
+from main.video_source import DecodeAhead, open_source
+from poses.landmarks import DetectorConfig, DetectorPool
+
+NO_POSE = "No Pose Detected"
+SEGMENT_FIELDS = ["start", "end", "label", "confidence", "samples"]
+
+
+def _analyze_range(args):
+    # Worker: classify frames [start, end) of one source with its own detector
+    spec, start, end, stride, fps, config = args
+    warnings.filterwarnings("ignore", category=UserWarning)
+    samples = []
+    with open_source(spec, stride, fps) as source, DetectorPool() as pool:
+        if start:
+            source.seek(start)
+        reader = DecodeAhead(source, end=end)
+        try:
+            for index, timestamp, frame in reader:
+                _, result = analyze_frame(frame, config=config, pool=pool)
+                samples.append((index, timestamp, result))
+        finally:
+            reader.close()
+    return samples
+
+
+def plan_ranges(frame_count, workers, stride=1, min_frames=300):
+    """
+    Splits [0, frame_count) into at most workers contiguous ranges of at
+    least min_frames frames, aligned to stride so sampling stays uniform.
+    """
+    chunks = max(1, min(workers, frame_count // max(min_frames, 1)))
+    size = -(-frame_count // chunks)
+    size = -(-size // stride) * stride
+    return [(start, min(start + size, frame_count)) for start in range(0, frame_count, size)]
+
+
+def analyze_video(spec, workers=1, stride=1, fps=None, complexity=1):
+    """
+    Classifies every stride-th frame of a video source.
+
+    Seekable sources (files, image sequences) are split into ranges that
+    worker processes analyze in parallel; live sources run in-process
+    with a decode-ahead thread.
+
+    Returns:
+        tuple: (samples, info). samples are (index, timestamp, label)
+        sorted by index; info has the source fps, frame count and whether
+        the source was split.
+    """
+    with open_source(spec, stride, fps) as source:
+        seekable, frame_count, source_fps = source.seekable, source.frame_count, source.fps
+
+    # Tracking only helps when sampled frames are close together in time
+    config = DetectorConfig(model_complexity=complexity, static_image_mode=stride / source_fps > 0.25)
+    # Ranges need a known length to split; streams and some containers report 0 or -1
+    ranges = []
+    if seekable and frame_count is not None and frame_count > 0 and workers > 1:
+        ranges = plan_ranges(frame_count, workers, stride)
+    parallel = len(ranges) > 1
+    if parallel:
+        jobs = [(spec, start, end, stride, fps, config) for start, end in ranges]
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            samples = [sample for chunk in executor.map(_analyze_range, jobs) for sample in chunk]
+    else:
+        samples = _analyze_range((spec, 0, None, stride, fps, config))
+    info = {"fps": source_fps, "frame_count": frame_count, "parallel": parallel}
+    return samples, info
+
+
+def build_timeline(samples, window=5, min_duration=1.0, frame_duration=0.0):
+    """
+    Turns per-frame labels into pose segments.
+
+    Labels are first smoothed with a centred majority vote over window
+    samples, then runs of one label become segments; segments shorter
+    than min_duration seconds are absorbed by their predecessor.
+
+    Args:
+        samples (list): (index, timestamp, label) in time order.
+        window (int): Samples in the majority vote.
+        min_duration (float): Shortest segment kept, in seconds.
+        frame_duration (float): Time covered by the last sample.
+
+    Returns:
+        list: Segment dicts with start, end, label, confidence (share of
+        raw samples in the segment that carry its label) and samples.
+    """
+    if not samples:
+        return []
+    raw = [label for _, _, label in samples]
+    times = [timestamp for _, timestamp, _ in samples]
+    half = window // 2
+    smoothed = [Counter(raw[max(0, i - half):i + half + 1]).most_common(1)[0][0] for i in range(len(raw))]
+
+    # Runs of equal smoothed labels as [label, first, last] sample positions
+    runs = []
+    for i, label in enumerate(smoothed):
+        if runs and runs[-1][0] == label:
+            runs[-1][2] = i
+        else:
+            runs.append([label, i, i])
+
+    end_time = lambda run: times[run[2] + 1] if run[2] + 1 < len(times) else times[-1] + frame_duration
+    merged = []
+    for run in runs:
+        if merged and (end_time(run) - times[run[1]] < min_duration or merged[-1][0] == run[0]):
+            merged[-1][2] = run[2]
+        else:
+            merged.append(run)
+    # A short first run has no predecessor; fold it into the next one
+    if len(merged) > 1 and end_time(merged[0]) - times[merged[0][1]] < min_duration:
+        merged[1][1] = merged[0][1]
+        merged.pop(0)
+
+    segments = []
+    for label, first, last in merged:
+        span = raw[first:last + 1]
+        segments.append({
+            "start": round(times[first], 3),
+            "end": round(end_time([label, first, last]), 3),
+            "label": label,
+            "confidence": round(span.count(label) / len(span), 3),
+            "samples": len(span),
+        })
+    return segments
+
+
+def write_timeline(path, segments, summary):
+    if path and path.lower().endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SEGMENT_FIELDS)
+            writer.writeheader()
+            writer.writerows(segments)
+        print(json.dumps(summary), file=sys.stderr)
+        return
+    text = json.dumps({"summary": summary, "segments": segments}, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score a recorded class or stream into a timeline of poses.")
+    parser.add_argument("source", help="Video file, image directory/glob, stream URL or camera index.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes for seekable sources.")
+    parser.add_argument("--stride", type=int, default=1, help="Analyze every n-th frame.")
+    parser.add_argument("--every-seconds", type=float,
+                        help="Sample one frame per interval instead of --stride; long intervals seek.")
+    parser.add_argument("--fps", type=float, help="Frame rate of image sequences (default 30).")
+    parser.add_argument("--complexity", type=int, choices=(0, 1, 2), default=1, help="MediaPipe model complexity.")
+    parser.add_argument("--window", type=int, default=5, help="Samples in the label majority vote.")
+    parser.add_argument("--min-duration", type=float, default=1.0, help="Shortest segment kept, in seconds.")
+    parser.add_argument("--output", "-o", help="Output .json or .csv file (default: JSON to stdout).")
+    parser.add_argument("--skip-no-pose", action="store_true", help="Leave 'No Pose Detected' segments out.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stride = args.stride
+    if args.every_seconds:
+        with open_source(args.source, fps=args.fps) as source:
+            stride = max(1, round(args.every_seconds * source.fps))
+
+    start = time.perf_counter()
+    try:
+        samples, info = analyze_video(args.source, args.workers, stride, args.fps, args.complexity)
+    except IOError as e:
+        print(e, file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    segments = build_timeline(samples, args.window, args.min_duration, stride / info["fps"])
+    if args.skip_no_pose:
+        segments = [segment for segment in segments if segment["label"] != NO_POSE]
+    duration = samples[-1][1] + stride / info["fps"] if samples else 0.0
+    summary = {
+        "source": str(args.source),
+        "frames_analyzed": len(samples),
+        "stride": stride,
+        "video_seconds": round(duration, 3),
+        "processing_seconds": round(elapsed, 3),
+        "realtime_factor": round(duration / elapsed, 2) if elapsed > 0 else 0.0,
+        **info,
+    }
+    write_timeline(args.output, segments, summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import argparse
+import csv
+import glob
+import json
+import multiprocessing.util
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cv2
+import numpy as np
+
+from main.landmark_cache import LandmarkCache, extract_landmarks_cached
+from poses.geometry import landmarks_to_array
+from poses.landmarks import IMAGE_CONFIG, DetectorConfig, default_pool, extract_landmarks
+from poses.rules import get_rule_engine
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+CSV_FIELDS = ["path", "label", "cached", "decode_ms", "inference_ms", "classify_ms", "scores", "margins", "conditions",
+              "error"]
+
+# Detector settings and landmark cache of this worker process, set by _init_worker
+_worker_config = IMAGE_CONFIG
+_worker_cache = None
+
+
+def collect_images(inputs, manifest=None):
+    """
+    Expands directories, glob patterns and a manifest into a list of image paths.
+
+    Args:
+        inputs (list): Directories (searched recursively), globs or file paths.
+        manifest (str, optional): Text file with one image path per line.
+
+    Returns:
+        list: Image paths in a stable order.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            paths.append(item)
+    if manifest:
+        with open(manifest) as f:
+            paths.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return paths
+
+
+def _init_worker(config, cache_path=None, warmup=True):
+    # Load the detector once per process, before the first image arrives
+    global _worker_config, _worker_cache
+    warnings.filterwarnings("ignore", category=UserWarning)
+    _worker_config = config
+    if warmup:
+        default_pool.preload([config])
+        get_rule_engine()
+    if cache_path:
+        _worker_cache = LandmarkCache(cache_path)
+        # Pool workers leave through multiprocessing's exit path, which skips
+        # atexit but runs registered finalizers: flush and evict there
+        multiprocessing.util.Finalize(_worker_cache, _worker_cache.close, exitpriority=10)
+
+
+def _new_record(path):
+    return {"path": path, "label": None, "cached": False, "conditions": None, "error": None}
+
+
+def _guarded(classify, record, *args):
+    # One odd image (a detector error, a corrupt cache row) fails its own
+    # record, not the whole batch
+    try:
+        return classify(*args, record)
+    except Exception as e:
+        record["label"] = None
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+
+
+def classify_image(path):
+    """
+    Classifies one image file without any GUI.
+
+    Returns:
+        dict: Path, label, per-pose scores, per-condition results and
+        margins for every pose and stage timings in milliseconds. On
+        failure label is None and error says why.
+    """
+    return _guarded(_classify_image, _new_record(path), path)
+
+
+def _classify_image(path, record):
+    if _worker_cache is not None:
+        return _classify_cached(path, record)
+
+    start = time.perf_counter()
+    image = cv2.imread(path)
+    decoded = time.perf_counter()
+    record["decode_ms"] = round((decoded - start) * 1000, 3)
+    if image is None:
+        record["error"] = "Image could not be loaded. Check the path."
+        return record
+
+    pose_landmarks = extract_landmarks(image, _worker_config)
+    inferred = time.perf_counter()
+    record["inference_ms"] = round((inferred - decoded) * 1000, 3)
+    points = None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+    return _classify_points(points, record, inferred)
+
+
+def classify_encoded(data, path=None):
+    """
+    Classifies one encoded image (JPEG, PNG, ...) already held in memory,
+    e.g. a frame received over the network.
+
+    Returns:
+        dict: Same record as classify_image.
+    """
+    return _guarded(_classify_encoded, _new_record(path), data)
+
+
+def _classify_encoded(data, record):
+    if _worker_cache is not None:
+        return _classify_bytes_cached(data, record, time.perf_counter())
+
+    start = time.perf_counter()
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    decoded = time.perf_counter()
+    record["decode_ms"] = round((decoded - start) * 1000, 3)
+    if image is None:
+        record["error"] = "Image could not be decoded."
+        return record
+
+    pose_landmarks = extract_landmarks(image, _worker_config)
+    inferred = time.perf_counter()
+    record["inference_ms"] = round((inferred - decoded) * 1000, 3)
+    points = None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+    return _classify_points(points, record, inferred)
+
+
+def _classify_cached(path, record):
+    # Read the raw bytes; decode and inference only happen on a cache miss
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        record["error"] = str(e)
+        return record
+    return _classify_bytes_cached(data, record, start)
+
+
+def _classify_bytes_cached(data, record, start):
+    points, image, hit = extract_landmarks_cached(_worker_cache, data, _worker_config)
+    done = time.perf_counter()
+    record["cached"] = hit
+    record["decode_ms"] = 0.0
+    record["inference_ms"] = round((done - start) * 1000, 3)
+    if not hit and image is None:
+        record["error"] = "Image could not be loaded. Check the path."
+        return record
+    return _classify_points(points, record, done)
+
+
+def _classify_points(points, record, start):
+    if points is None:
+        record["label"] = "No Pose Detected"
+        record["classify_ms"] = 0.0
+        return record
+
+    engine = get_rule_engine()
+    evaluation = engine.evaluate(points)
+    result = evaluation.result()
+    record["label"] = result.label
+    record["scores"] = result.scores
+    record["margins"] = result.margins
+    record["conditions"] = {pose: evaluation.conditions(pose) for pose in engine.pose_names}
+    record["classify_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return record
+
+
+class ResultWriter:
+    """Streams result records to a JSONL or CSV file (chosen by extension) or stdout."""
+
+    def __init__(self, path=None):
+        self._file = open(path, "w", newline="") if path else sys.stdout
+        self._csv = None
+        if path and path.lower().endswith(".csv"):
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv:
+            row = dict(record)
+            row["conditions"] = json.dumps(record.get("conditions")) if record.get("conditions") else ""
+            row["scores"] = json.dumps(record.get("scores")) if record.get("scores") else ""
+            row["margins"] = json.dumps(record.get("margins")) if record.get("margins") else ""
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+def run_batch(paths, writer, workers=None, config=IMAGE_CONFIG, chunksize=8, cache_path=None):
+    """
+    Classifies paths across a process pool and streams records to writer.
+
+    Returns:
+        dict: Image count, failures, elapsed seconds and images/sec.
+    """
+    start = time.perf_counter()
+    count = failures = cached = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config, cache_path)) as executor:
+        for record in executor.map(classify_image, paths, chunksize=chunksize):
+            writer.write(record)
+            count += 1
+            failures += record["error"] is not None
+            cached += record["cached"]
+    elapsed = time.perf_counter() - start
+    return {
+        "images": count,
+        "failures": failures,
+        "cached": cached,
+        "seconds": round(elapsed, 3),
+        "images_per_sec": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Classify yoga poses in many images, headless.")
+    parser.add_argument("inputs", nargs="*", help="Image files, directories or glob patterns.")
+    parser.add_argument("--manifest", help="Text file listing one image path per line.")
+    parser.add_argument("--output", "-o", help="Output .jsonl or .csv file (default: JSONL to stdout).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes.")
+    parser.add_argument("--complexity", type=int, choices=(0, 1, 2), default=IMAGE_CONFIG.model_complexity,
+                        help="MediaPipe model complexity.")
+    parser.add_argument("--cache", help="SQLite landmark cache shared by the workers.")
+    parser.add_argument("--chunksize", type=int, default=8, help="Images handed to a worker at a time.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = collect_images(args.inputs, args.manifest)
+    if not paths:
+        print("No images found.", file=sys.stderr)
+        return 1
+
+    config = DetectorConfig(model_complexity=args.complexity, static_image_mode=True)
+    writer = ResultWriter(args.output)
+    try:
+        summary = run_batch(paths, writer, args.workers, config, args.chunksize, args.cache)
+    finally:
+        writer.close()
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
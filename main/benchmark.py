@@ -0,0 +1,274 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cv2
+import numpy as np
+
+from main.pipeline import render_frame
+from main.recording import LandmarkRecording
+from poses.geometry import NUM_LANDMARKS, landmarks_to_array
+from poses.landmarks import DetectorConfig, default_pool, draw_landmarks
+from poses.rules import get_rule_engine
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STAGES = ("decode", "color", "inference", "features", "classify", "draw")
+
+
+def percentiles(samples_ms):
+    """Summary of a list of millisecond timings."""
+    if not len(samples_ms):
+        return {"count": 0}
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "count": int(samples.size),
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def load_images(image_glob):
+    """(name, JPEG bytes) for every bundled image, so decode is measured too."""
+    images = []
+    for path in sorted(glob.glob(image_glob)):
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    return images
+
+
+def synthesize_video(images, frames_per_image=30, seed=0):
+    """
+    Builds a synthetic clip from still images: each image is held for
+    frames_per_image frames with small random shifts, like a person
+    swaying in front of a fixed camera. Frames stay JPEG-encoded.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for name, data in images:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        height, width = image.shape[:2]
+        for i in range(frames_per_image):
+            dx, dy = rng.normal(0, 0.01, 2) * (width, height)
+            shifted = cv2.warpAffine(image, np.float32([[1, 0, dx], [0, 1, dy]]), (width, height),
+                                     borderMode=cv2.BORDER_REPLICATE)
+            ok, encoded = cv2.imencode(".jpg", shifted)
+            frames.append((f"{name}#{i}", encoded.tobytes()))
+    return frames
+
+
+# Barrier the warm-up tasks of one benchmark run meet at, set by _init_bench_worker
+_worker_ready = None
+
+
+def _init_bench_worker(config, ready):
+    # Load the detector and rules before the clock starts
+    global _worker_ready
+    warnings.filterwarnings("ignore", category=UserWarning)
+    default_pool.preload([config])
+    get_rule_engine()
+    _worker_ready = ready
+
+
+def _bench_ready(_):
+    # Blocks its worker until every worker runs one: all of them are up
+    _worker_ready.wait()
+
+
+def _bench_chunk(args):
+    # Runs every stage on a chunk of encoded frames in a worker process
+    config, items = args
+    warnings.filterwarnings("ignore", category=UserWarning)
+    detector = default_pool.get(config)
+    engine = get_rule_engine()
+    timings = {stage: [] for stage in STAGES}
+    points = np.full((len(items), NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    errors = 0
+
+    for i, (_, data) in enumerate(items):
+        t0 = time.perf_counter()
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        t1 = time.perf_counter()
+        if image is None:
+            errors += 1
+            continue
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image_rgb.flags.writeable = False
+        t2 = time.perf_counter()
+        pose_landmarks = detector.process(image_rgb).pose_landmarks
+        t3 = time.perf_counter()
+        timings["decode"].append((t1 - t0) * 1000)
+        timings["color"].append((t2 - t1) * 1000)
+        timings["inference"].append((t3 - t2) * 1000)
+        if pose_landmarks is None:
+            continue
+
+        frame_points = landmarks_to_array(pose_landmarks)
+        features = engine.feature_set.compute(frame_points)
+        t4 = time.perf_counter()
+        result = engine.evaluate_features(features).label()
+        t5 = time.perf_counter()
+        draw_landmarks(image, pose_landmarks)
+        render_frame(image, None, result)
+        t6 = time.perf_counter()
+        timings["features"].append((t4 - t3) * 1000)
+        timings["classify"].append((t5 - t4) * 1000)
+        timings["draw"].append((t6 - t5) * 1000)
+        points[i] = frame_points
+    return timings, points, errors
+
+
+def run_inference_benchmark(items, complexity, workers, static_image_mode=False):
+    """
+    Runs the full pipeline over items with one detector per worker process.
+    Worker start-up and model loading happen before the clock starts, so
+    images_per_sec measures the pipeline, not process spawning.
+
+    Returns:
+        tuple: Result dict and the (N, 33, 4) landmarks (NaN where no pose).
+    """
+    config = DetectorConfig(model_complexity=complexity, static_image_mode=static_image_mode)
+    # Contiguous ranges, so a tracking detector sees consecutive frames as it would live
+    bounds = np.linspace(0, len(items), workers + 1).astype(int)
+    chunks = [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    ready = multiprocessing.Barrier(workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_bench_worker,
+                             initargs=(config, ready)) as executor:
+        list(executor.map(_bench_ready, range(workers)))
+        start = time.perf_counter()
+        outputs = list(executor.map(_bench_chunk, [(config, chunk) for chunk in chunks]))
+        elapsed = time.perf_counter() - start
+
+    timings = {stage: [] for stage in STAGES}
+    points = np.full((len(items), NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    errors = 0
+    for first, (chunk_timings, chunk_points, chunk_errors) in zip(bounds, outputs):
+        for stage in STAGES:
+            timings[stage].extend(chunk_timings[stage])
+        points[first:first + len(chunk_points)] = chunk_points
+        errors += chunk_errors
+    result = {
+        "complexity": complexity,
+        "static_image_mode": static_image_mode,
+        "workers": workers,
+        "frames": len(items),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "images_per_sec": round(len(items) / elapsed, 2),
+        "stages": {stage: percentiles(timings[stage]) for stage in STAGES},
+    }
+    return result, points
+
+
+def run_classifier_benchmark(points, repeats=5):
+    """
+    Times the classifier layer alone on recorded landmarks: frame by frame
+    and as one batched evaluation over the whole stack.
+    """
+    engine = get_rule_engine()
+    points = points[~np.isnan(points).any(axis=(1, 2))]
+    if not len(points):
+        return {"frames": 0}
+    per_frame = []
+    for _ in range(repeats):
+        for frame_points in points:
+            start = time.perf_counter()
+            engine.evaluate(frame_points).label()
+            per_frame.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        engine.evaluate(points).labels()
+    batched = (time.perf_counter() - start) / repeats
+    return {
+        "frames": int(len(points)),
+        "per_frame": percentiles(per_frame),
+        "batched_frames_per_sec": round(len(points) / batched, 1) if batched > 0 else None,
+    }
+
+
+def save_landmarks(path, names, points):
+    np.savez_compressed(path, names=np.array(names), points=points)
+
+
+def load_landmarks(path):
+    data = np.load(path)
+    return list(data["names"]), data["points"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pose pipeline stage by stage.")
+    parser.add_argument("--images", default=os.path.join(REPO_ROOT, "*.jpg"),
+                        help="Glob of still images (default: the bundled JPEGs).")
+    parser.add_argument("--video-frames", type=int, default=30,
+                        help="Synthetic video frames generated per image (0 to skip).")
+    parser.add_argument("--complexity", type=int, nargs="+", default=[0, 1, 2], choices=(0, 1, 2))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--record", help="Save recorded landmarks (.npz) for classifier-only runs.")
+    parser.add_argument("--replay",
+                        help="Benchmark only the classifier layer on a recorded .npz or session directory.")
+    parser.add_argument("--output", "-o", help="Write the JSON report here instead of stdout.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": [],
+    }
+
+    if args.replay:
+        if os.path.isdir(args.replay):
+            _, _, points = LandmarkRecording(args.replay).arrays()
+        else:
+            _, points = load_landmarks(args.replay)
+        report["classifier"] = run_classifier_benchmark(points)
+    else:
+        images = load_images(args.images)
+        if not images:
+            print(f"No images match {args.images}", file=sys.stderr)
+            return 1
+        sources = {"images": images}
+        if args.video_frames:
+            sources["video"] = synthesize_video(images, args.video_frames)
+
+        recorded = None
+        for source, items in sources.items():
+            for complexity in args.complexity:
+                for workers in args.workers:
+                    result, points = run_inference_benchmark(items, complexity, workers, source == "images")
+                    result["source"] = source
+                    report["results"].append(result)
+                    # Keep the landmarks of the first run for the classifier benchmark
+                    recorded = recorded or ([name for name, _ in items], points)
+        report["classifier"] = run_classifier_benchmark(recorded[1])
+        if args.record:
+            save_landmarks(args.record, *recorded)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import re
+import sys
+import warnings
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cv2
+
+from main.batch import collect_images
+from poses.geometry import landmarks_to_array
+from poses.landmarks import IMAGE_CONFIG, extract_landmarks
+from poses.rules import load_definitions
+from poses.templates import TemplateIndex
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_INDEX_PATH = os.path.join(REPO_ROOT, "templates.npz")
+
+
+def label_for(path, labels):
+    """
+    Template label of an image: its parent directory inside a library
+    (library/<label>/*.jpg), or its file name without trailing digits
+    ("warrior1.jpg" -> "warrior"), mapped to the definition label if any.
+    """
+    parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    stem = re.sub(r"\d+$", "", os.path.splitext(os.path.basename(path))[0])
+    for name in (parent, stem):
+        if name in labels:
+            return labels[name]
+    return stem
+
+
+def build_index(paths, config=IMAGE_CONFIG, mirror=True):
+    """
+    Extracts landmarks from reference images into a TemplateIndex.
+
+    Returns:
+        tuple: The index and the paths where no pose was found.
+    """
+    labels = {definition["name"]: definition["label"] for definition in load_definitions()}
+    index = TemplateIndex(mirror=mirror)
+    skipped = []
+    for path in paths:
+        image = cv2.imread(path)
+        pose_landmarks = None if image is None else extract_landmarks(image, config)
+        if pose_landmarks is None:
+            skipped.append(path)
+            continue
+        index.add(label_for(path, labels), landmarks_to_array(pose_landmarks), os.path.basename(path))
+    return index, skipped
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build a pose template index from reference images.")
+    parser.add_argument("inputs", nargs="*", default=[os.path.join(REPO_ROOT, "*.jpg")],
+                        help="Reference images, directories or globs (default: the bundled JPEGs).")
+    parser.add_argument("--output", "-o", default=DEFAULT_INDEX_PATH, help="Index file to write (.npz).")
+    parser.add_argument("--no-mirror", action="store_true", help="Don't add mirrored templates.")
+    parser.add_argument("--query", help="Instead of building, print the closest templates for this image.")
+    parser.add_argument("--top-k", type=int, default=3, help="Matches printed with --query.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.query:
+        index = TemplateIndex.load(args.output)
+        image = cv2.imread(args.query)
+        pose_landmarks = None if image is None else extract_landmarks(image, IMAGE_CONFIG)
+        if pose_landmarks is None:
+            print("No Pose Detected")
+            return 1
+        for match in index.query(landmarks_to_array(pose_landmarks), args.top_k):
+            print(json.dumps(match._asdict()))
+        return 0
+
+    index, skipped = build_index(collect_images(args.inputs), mirror=not args.no_mirror)
+    index.save(args.output)
+    print(json.dumps({"templates": len(index), "labels": sorted(set(index.labels)), "skipped": skipped}),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
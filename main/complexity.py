@@ -0,0 +1,135 @@
+import threading
+import time
+
+from main.metrics import metrics
+from poses.backends import create_backend, pose_confidence
+
+
+class ComplexityController:
+    """
+    Picks the landmark model per frame to hold a latency budget.
+
+    backends are ordered fastest first. All but the last are base levels:
+    the controller runs the largest one whose average latency fits the
+    budget, stepping down when frames run over and probing the next level
+    up when there is headroom. The last backend (MediaPipe heavy by
+    default) is never a base level; it re-runs a frame only when the base
+    result's confidence is below min_confidence and the remaining budget
+    covers its expected cost.
+
+    Args:
+        backends (list): LandmarkBackends, fastest first; at least two.
+        budget_ms (float): Target per-frame latency; 1000 / FPS for an FPS target.
+        min_confidence (float): Mean body visibility that triggers escalation.
+        window (int): Frames between level adjustments.
+        headroom (float): Fraction of the budget the next level must fit in
+            before the controller moves up.
+        escalate_missing (bool): Also escalate frames where the base level
+            found nobody, at the cost of running heavy on empty scenes.
+    """
+
+    def __init__(self, backends, budget_ms, min_confidence=0.6, window=15, headroom=0.8, escalate_missing=False):
+        if len(backends) < 2:
+            raise ValueError("ComplexityController needs a base backend and an escalation backend")
+        self.levels = list(backends[:-1])
+        self.escalation = backends[-1]
+        self.budget_ms = budget_ms
+        self.min_confidence = min_confidence
+        self.window = window
+        self.headroom = headroom
+        self.escalate_missing = escalate_missing
+        self.level = 0
+        self.frames = 0
+        self.escalations = 0
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_mediapipe(cls, budget_ms, static_image_mode=False, **options):
+        """
+        lite and full as base levels, heavy for escalation. heavy only sees
+        the occasional low-confidence frame, so it never tracks: carrying
+        its ROI and smoothing across frames that aren't consecutive would
+        only mislead it.
+        """
+        backends = [create_backend(name, static_image_mode=static_image_mode) for name in ("lite", "full")]
+        backends.append(create_backend("heavy", static_image_mode=True))
+        return cls(backends, budget_ms, **options)
+
+    @property
+    def backend(self):
+        """The current base level."""
+        return self.levels[self.level]
+
+    def _observe(self, backend, ms):
+        # Exponential moving average per backend
+        with self._lock:
+            previous = self._latency.get(backend.name)
+            self._latency[backend.name] = ms if previous is None else 0.8 * previous + 0.2 * ms
+        if metrics.enabled:
+            metrics.observe(f"backend_{backend.name}", ms)
+
+    def _run(self, backend, image, pool):
+        start = time.perf_counter()
+        points = backend.detect(image, pool)
+        ms = (time.perf_counter() - start) * 1000
+        self._observe(backend, ms)
+        return points, ms
+
+    def _adjust(self):
+        current = self._latency.get(self.backend.name)
+        if current is None:
+            return
+        if current > self.budget_ms and self.level > 0:
+            self.level -= 1
+        elif self.level + 1 < len(self.levels):
+            # Unmeasured levels are assumed to cost about twice the current one
+            upper = self._latency.get(self.levels[self.level + 1].name, 2 * current)
+            if upper <= self.budget_ms * self.headroom:
+                self.level += 1
+
+    def detect(self, image, pool=None):
+        """
+        Landmarks for one frame from the current level, or from the
+        escalation backend when that was needed and affordable.
+
+        Returns:
+            numpy.ndarray or None: (33, 4) landmarks, or None if no pose.
+        """
+        backend = self.backend
+        points, spent = self._run(backend, image, pool)
+        confidence = pose_confidence(points)
+        low = confidence < self.min_confidence and (points is not None or self.escalate_missing)
+        if low:
+            expected = self._latency.get(self.escalation.name, 3 * spent)
+            if spent + expected <= self.budget_ms:
+                heavy_points, _ = self._run(self.escalation, image, pool)
+                if pose_confidence(heavy_points) > confidence:
+                    points = heavy_points
+                    backend = self.escalation
+                with self._lock:
+                    self.escalations += 1
+        with self._lock:
+            self.frames += 1
+            if self.frames % self.window == 0:
+                self._adjust()
+        if metrics.enabled:
+            metrics.count("backend_frames", backend=backend.name)
+        return points
+
+    def stats(self):
+        return {
+            "level": self.backend.name,
+            "budget_ms": self.budget_ms,
+            "frames": self.frames,
+            "escalations": self.escalations,
+            "latency_ms": {name: round(ms, 2) for name, ms in self._latency.items()},
+        }
+
+    def summary_line(self):
+        latency = self._latency.get(self.backend.name)
+        return f"model {self.backend.name}: {latency or 0:.1f}/{self.budget_ms:.0f} ms, {self.escalations} escalated"
+
+    def close(self):
+        for backend in self.levels + [self.escalation]:
+            backend.close()
@@ -1,4 +1,6 @@
+import argparse
 import cv2
+import numpy as np
 import sys
 import os
 import warnings
@@ -6,58 +8,80 @@ warnings.filterwarnings("ignore", category=UserWarning)
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from poses.chair import is_chair_pose
-from poses.warrior import is_warrior_pose
-from poses.cobra import is_cobra_pose
-from poses.dog import is_dog_pose
-from poses.shoulder_stand import is_shoulder_stand_pose
-from poses.tree import is_tree_pose
-from poses.triangle import is_triangle_pose
+from main.landmark_cache import LandmarkCache, extract_landmarks_cached
+from main.multi_person import MultiPoseClassifier, render_people
+from main.pipeline import classify_landmarks, process_frame, render_frame, use_pose_model
+from poses.landmarks import IMAGE_CONFIG, array_to_landmarks, draw_landmarks
+from poses.learned import PoseModel
+from poses.rules import get_rule_engine
+
+def detect_pose(image_path, cache=None):
+    if cache is not None:
+        return _detect_pose_cached(image_path, cache)
 
-def detect_pose(image_path):
     # Load the image
     original_image = cv2.imread(image_path)
     if original_image is None:
         return None, "Image could not be loaded. Check the path."
 
-    # Create copies for each pose detection to prevent landmark accumulation
-    poses_to_check = [
-        (lambda img: is_chair_pose(img.copy()), "Chair Pose Detected"),
-        (lambda img: is_warrior_pose(img.copy()), "Warrior Pose Detected"),
-        (lambda img: is_cobra_pose(img.copy()), "Cobra Pose Detected"),
-        (lambda img: is_shoulder_stand_pose(img.copy()), "Shoulder Standing Pose Detected"),
-        (lambda img: is_dog_pose(img.copy()), "Dog Pose Detected"),
-        (lambda img: is_tree_pose(img.copy()), "Tree Pose Detected"),
-        (lambda img: is_triangle_pose(img.copy()), "Triangle Pose Detected")
-    ]
+    # Run pose inference once and check every classifier against its landmarks
+    return process_frame(original_image, config=IMAGE_CONFIG)
 
-    # Check each pose with a fresh copy of the image
-    for pose_func, pose_name in poses_to_check:
-        processed_image, result = pose_func(original_image)
-        if pose_name in result:
-            return processed_image, result
+def _detect_pose_cached(image_path, cache):
+    # Landmarks come from the cache when this exact image was seen before
+    try:
+        with open(image_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, "Image could not be loaded. Check the path."
 
-    # If no pose is detected, return the original image
-    return original_image, "No Pose Detected"
+    points, image, _ = extract_landmarks_cached(cache, data, IMAGE_CONFIG)
+    if image is None:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None, "Image could not be loaded. Check the path."
+    if points is None:
+        return image, "No Pose Detected"
+
+    draw_landmarks(image, array_to_landmarks(points))
+    return image, classify_landmarks(points)
 
 if __name__ == "__main__":
-    # Specify the path to the image
-    image_path = "cobra.jpg"  # Adjust this path as needed
+    parser = argparse.ArgumentParser(description="Detect the yoga pose in one image.")
+    parser.add_argument("image_path", nargs="?", default="cobra1.jpg", help="Image to classify.")
+    parser.add_argument("--cache", help="SQLite landmark cache to consult before inference.")
+    parser.add_argument("--multi", action="store_true", help="Classify every person in the image.")
+    parser.add_argument("--model", help="Pose model from train_classifier.py to use instead of the rules.")
+    args = parser.parse_args()
+
+    if args.model:
+        use_pose_model(PoseModel.load(args.model, fallback=get_rule_engine()))
+
+    if args.multi:
+        image = cv2.imread(args.image_path)
+        if image is None:
+            print("Image could not be loaded. Check the path.")
+            sys.exit(1)
+        with MultiPoseClassifier() as classifier:
+            people = classifier.process(image)
+        for person in people:
+            print(f"#{person.id}: {person.label}")
+        cv2.imshow("Yoga Pose Detection", render_people(image, people))
+        cv2.waitKey(5000)
+        cv2.destroyAllWindows()
+        sys.exit(0)
 
     # Detect the pose
-    processed_image, result = detect_pose(image_path)
+    cache = LandmarkCache(args.cache) if args.cache else None
+    processed_image, result = detect_pose(args.image_path, cache)
+    if cache is not None:
+        cache.close()
 
     # Display the result
     if processed_image is not None:
-        # Create a clean copy for final display
-        display_image = processed_image.copy()
-        
-        # Add the result text
-        cv2.putText(display_image, result, (50, 50), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1,
-                    (0, 255, 0) if "Detected" in result else (0, 0, 255), 
-                    2)
-        
+        # Add the result text; the skeleton is already drawn
+        display_image = render_frame(processed_image, None, result)
+
         # Show the image
         cv2.imshow("Yoga Pose Detection", display_image)
         cv2.waitKey(5000)
@@ -1,4 +1,6 @@
+import argparse
 import cv2
+import json
 import sys
 import os
 import warnings
@@ -8,107 +10,329 @@ warnings.filterwarnings("ignore", category=UserWarning)
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# Import pose detection functions from the poses module
-from poses.chair import is_chair_pose
-from poses.warrior import is_warrior_pose
-from poses.cobra import is_cobra_pose
-from poses.dog import is_dog_pose
-from poses.shoulder_stand import is_shoulder_stand_pose
-from poses.tree import is_tree_pose
-from poses.triangle import is_triangle_pose
+from main.analytics import SessionAnalytics
+from main.complexity import ComplexityController
+from main.pipeline import (POSE_CLASSIFIERS, analyze_frame, classify_landmarks, render_frame, use_pose_model,
+                           use_scheduler)
+from poses.backends import MediaPipeBackend, create_backend
+from poses.geometry import landmarks_to_array
+from poses.learned import PoseModel
+from poses.landmarks import VIDEO_CONFIG, DetectorConfig, Frame, draw_landmarks
+from main.metrics import ProfileWindow, metrics, serve_metrics
+from main.recording import LandmarkRecorder
+from main.multi_person import MultiPoseClassifier, PersonTracker, render_people
+from main.roi import AdaptiveResolution, RoiTracker
+from main.scheduler import PoseScheduler
+from main.tracking import LANDMARK_FILTERS, PoseTracker
+from main.video_pipeline import DROP_POLICIES, DROP_LATEST_WINS, VideoPipeline
+from main.video_source import open_source
+from poses.rules import get_rule_engine
+from poses.templates import TemplateIndex
 
+# Frames a pose must hold before session analytics count it, unless --hold debounces
+SESSION_HOLD_FRAMES = 5
 
-def detect_pose(frame):
+
+def analyze(frame, pool=None, roi=None, config=VIDEO_CONFIG, backend=None):
+    """
+    Classifies a frame without drawing on it.
+
+    Args:
+        frame (Frame or numpy.ndarray): Frame from webcam video.
+        pool (DetectorPool, optional): Detector pool for this thread.
+        roi (RoiTracker, optional): Region-of-interest cropping state.
+        config (DetectorConfig): MediaPipe settings, e.g. the model complexity.
+        backend (LandmarkBackend or ComplexityController, optional): Landmark
+            model to use instead of config.
+
+    Returns:
+        tuple: Pose landmarks (or None) and detection result.
+    """
+    # Run pose inference once and check every pose against its landmarks;
+    # with metrics enabled the failing conditions are counted, not printed
+    return analyze_frame(frame, config=config, pool=pool, roi=roi, backend=backend)
+
+
+def detect_pose(frame, pool=None):
     """
     Detect yoga poses in a single frame.
 
     Args:
         frame (numpy.ndarray): Frame from webcam video.
+        pool (DetectorPool, optional): Detector pool for this thread.
 
     Returns:
-        tuple: Processed frame and detection result.
+        tuple: Processed frame (annotated in place) and detection result.
     """
     if frame is None:
         return None, "Error: Invalid frame"
 
-    # Create copies for each pose detection to prevent landmark accumulation
-    poses_to_check = [
-        (lambda img: is_chair_pose(img.copy()), "Chair Pose Detected"),
-        (lambda img: is_warrior_pose(img.copy()), "Warrior Pose Detected"),
-        (lambda img: is_cobra_pose(img.copy()), "Cobra Pose Detected"),
-        (lambda img: is_shoulder_stand_pose(img.copy()), "Shoulder Standing Pose Detected"),
-        (lambda img: is_dog_pose(img.copy()), "Dog Pose Detected"),
-        (lambda img: is_tree_pose(img.copy()), "Tree Pose Detected"),
-        (lambda img: is_triangle_pose(img.copy()), "Triangle Pose Detected"),
-    ]
-
-    # Check each pose with a fresh copy of the frame
-    debug_info = []  # Collect debug information
-    for pose_func, pose_name in poses_to_check:
-        try:
-            processed_frame, result = pose_func(frame)
-            debug_info.append(f"{pose_name}: {result}")
-            if pose_name in result:
-                return processed_frame, result
-        except Exception as e:
-            debug_info.append(f"Error in {pose_name}: {e}")
-            continue
-
-    # Print debug information
-    print("\nPose Detection Debug Info:")
-    for info in debug_info:
-        print(info)
-
-    # If no pose is detected, return the original frame
-    return frame, "No Pose Detected"
+    frame = Frame(frame)
+    pose_landmarks, result = analyze(frame, pool)
+    if pose_landmarks is not None:
+        draw_landmarks(frame.bgr, pose_landmarks)
+    return frame.bgr, result
 
 
-if __name__ == "__main__":
-    cap = cv2.VideoCapture(0)  # Open the default webcam
+def session_analytics(args):
+    """
+    SessionAnalytics for --session-summary, or None.
+
+    With --hold above 1 the labels reaching render are already debounced
+    (PoseTracker or PersonTracker), and a second hysteresis would shift
+    every hold start; otherwise one-frame flickers would split holds and
+    count as transitions, so the analytics debounce them itself.
+    """
+    if not args.session_summary:
+        return None
+    hold_frames = 1 if args.hold > 1 else SESSION_HOLD_FRAMES
+    return SessionAnalytics(hold_frames=hold_frames, min_hold=args.min_hold)
 
-    if not cap.isOpened():
-        print("Error: Could not open the webcam.")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect yoga poses from the webcam.")
+    parser.add_argument("--camera", type=int, default=0, help="Webcam index.")
+    parser.add_argument("--source", help="Video file, image directory/glob or stream URL instead of the webcam.")
+    parser.add_argument("--stride", type=int, default=1, help="Show every n-th frame of --source.")
+    parser.add_argument("--workers", type=int, default=1, help="Inference threads.")
+    parser.add_argument("--queue-size", type=int, default=2, help="Capacity of each stage queue.")
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default=DROP_LATEST_WINS,
+                        help="'latest' drops stale frames, 'keep-all' processes every frame.")
+    parser.add_argument("--smooth", choices=list(LANDMARK_FILTERS), default="none",
+                        help="Landmark filter for the tracking video mode.")
+    parser.add_argument("--hold", type=int, default=1,
+                        help="Frames a pose must hold before it is shown (tracking video mode).")
+    parser.add_argument("--backend", choices=("lite", "full", "heavy", "onnx", "auto"), default="full",
+                        help="Landmark model; 'auto' picks lite or full per frame to hold --latency-ms "
+                             "and escalates low-confidence frames to heavy.")
+    parser.add_argument("--onnx-model", help="Model file for --backend onnx.")
+    parser.add_argument("--latency-ms", type=float,
+                        help="Per-frame inference budget for --backend auto (default: 1000 / --target-fps, or 50).")
+    parser.add_argument("--roi", action="store_true",
+                        help="Crop the detector input to the person found in the previous frame.")
+    parser.add_argument("--target-fps", type=float, default=0,
+                        help="Downscale the detector input while slower than this (0 disables); "
+                             "with --backend auto, the frame rate the model choice holds instead.")
+    parser.add_argument("--max-side", type=int, default=1280,
+                        help="Largest detector input side in pixels with --target-fps.")
+    parser.add_argument("--multi", action="store_true",
+                        help="Classify every person in view, e.g. in a group class.")
+    parser.add_argument("--detect-every", type=int, default=10,
+                        help="Frames between person detector runs with --multi.")
+    parser.add_argument("--model", help="Pose model from train_classifier.py to use instead of the rules.")
+    parser.add_argument("--min-probability", type=float, default=0.5,
+                        help="With --model, frames below this confidence fall back to the rules.")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Classify with the hand-written pose modules, run in an order learned from "
+                             "recent frames, instead of the rule engine. Same results, fewer checks per frame.")
+    parser.add_argument("--prune-orientation", action="store_true",
+                        help="With --cascade, skip poses whose definition does not list the body's orientation. "
+                             "Faster, but a pose held outside its listed orientations is no longer reported.")
+    parser.add_argument("--templates", help="Template index from build_templates.py; show the closest template.")
+    parser.add_argument("--min-similarity", type=float, default=0.9,
+                        help="With --templates, the similarity below which the classifier's result is shown instead.")
+    parser.add_argument("--warmup", action="store_true",
+                        help="Load the models before the first frame is captured.")
+    parser.add_argument("--session-summary",
+                        help="Track hold times, reps, transitions and stability; write the summary JSON here "
+                             "at the end ('s' prints it at any time). Poses are debounced by --hold, or over "
+                             f"{SESSION_HOLD_FRAMES} frames when --hold is 1.")
+    parser.add_argument("--min-hold", type=float, default=1.0, help="Shortest hold counted as a rep, in seconds.")
+    parser.add_argument("--record", help="Append every shown frame's landmarks to this session directory.")
+    parser.add_argument("--metrics-file", help="JSON file the metrics are written to on exit and on 'd' off.")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port.")
+    parser.add_argument("--profile-dir", help="Write periodic inference profiles to this directory.")
+    parser.add_argument("--profile-backend", choices=("cprofile", "pyinstrument"), default="cprofile",
+                        help="Profiler used with --profile-dir.")
+    parser.add_argument("--profile-seconds", type=float, default=5.0, help="Length of each profiling window.")
+    parser.add_argument("--profile-every", type=float, default=60.0, help="Seconds between profiling windows.")
+    args = parser.parse_args(argv)
+    if args.backend in ("onnx", "auto") and (args.roi or args.smooth != "none" or args.hold > 1 or args.multi):
+        parser.error(f"--backend {args.backend} can't be combined with --roi, --smooth, --hold or --multi")
+    if args.multi and (args.templates or args.roi or args.smooth != "none"):
+        parser.error("--multi can't be combined with --templates, --roi or --smooth")
+    if args.cascade and args.model:
+        parser.error("--cascade and --model are alternative classifiers")
+    if args.backend == "onnx" and not args.onnx_model:
+        parser.error("--backend onnx needs --onnx-model")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Open the webcam, or the file/stream given with --source
+    try:
+        cap = open_source(args.source if args.source else args.camera, stride=args.stride)
+    except IOError:
+        print("Error: Could not open the webcam." if args.source is None else f"Error: Could not open {args.source}.")
         exit()
 
     print("Press 'q' to quit the application.")
     print("Press 'd' to toggle debug information.")
+    if args.session_summary:
+        print("Press 's' to print the session summary.")
     show_debug = False
+    # Exported metrics are collected from the start; otherwise only while 'd' is on
+    exported = bool(args.metrics_file or args.metrics_port)
+    metrics.enabled = exported
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
 
-    while True:
-        try:
-            ret, frame = cap.read()
-            if not ret:
-                print("Error: Failed to capture frame from webcam.")
-                break
+    if args.model:
+        use_pose_model(PoseModel.load(args.model, fallback=get_rule_engine(), min_probability=args.min_probability))
 
-            # Detect pose in the current frame
-            processed_frame, result = detect_pose(frame)
+    scheduler = None
+    if args.cascade:
+        scheduler = PoseScheduler(POSE_CLASSIFIERS, prune_orientation=args.prune_orientation)
+        use_scheduler(scheduler)
 
-            # Display the result on the frame
-            cv2.putText(processed_frame, result, (50, 50), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, 
-                        (0, 255, 0) if "Detected" in result else (0, 0, 255), 
-                        2)
+    analytics = session_analytics(args)
+    recorder = LandmarkRecorder(args.record, fps=cap.fps) if args.record and not args.multi else None
 
-            # Display debug information if enabled
+    def render(frame, pose_landmarks, result):
+        global show_debug
+        points = None
+        if not args.multi and pose_landmarks is not None and (recorder is not None or analytics is not None):
+            points = landmarks_to_array(pose_landmarks)
+        if recorder is not None:
+            recorder.append(frame.index, frame.timestamp, points)
+        if analytics is not None:
+            if args.multi:
+                analytics.update_people(pose_landmarks, frame.timestamp)
+            else:
+                analytics.update(result, points, frame.timestamp)
+        # The only place a frame gets annotated; in --multi mode
+        # pose_landmarks carries the list of people
+        if args.multi:
+            cv2.imshow("Yoga Pose Detection", render_people(frame, pose_landmarks, show_debug))
+        else:
+            debug_lines = ()
             if show_debug:
-                cv2.putText(processed_frame, "Debug Mode ON", (50, 100),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
-
-            # Show the frame
-            cv2.imshow("Yoga Pose Detection", processed_frame)
-
-            # Handle keypresses
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):  # Quit application
-                break
-            elif key == ord('d'):  # Toggle debug mode
-                show_debug = not show_debug
-                print(f"\nDebug mode {'enabled' if show_debug else 'disabled'}")
-
-        except Exception as e:
-            print(f"Error in main loop: {e}")
-            continue
+                # Timings plus coaching: the closest pose and what it is missing
+                debug_lines = metrics.summary_lines(("inference", "classify", "stage_end_to_end"))
+                if controller is not None:
+                    debug_lines.append(controller.summary_line())
+                debug_lines += result.feedback() if hasattr(result, "feedback") else []
+                if analytics is not None:
+                    debug_lines += analytics.status_lines()
+            text = result
+            if args.templates and result.pose in result.scores:
+                text = f"{result} ({result.scores[result.pose]:.2f})"
+            cv2.imshow("Yoga Pose Detection", render_frame(frame, pose_landmarks, text, show_debug, debug_lines))
+
+        # Handle keypresses
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q'):  # Quit application
+            return False
+        elif key == ord('s') and analytics is not None:  # Session summary so far
+            print(json.dumps(analytics.summary(), indent=2))
+        elif key == ord('d'):  # Toggle debug mode
+            show_debug = not show_debug
+            if not exported:
+                if show_debug:
+                    metrics.reset()
+                else:
+                    # One summary per debug session instead of per-frame output
+                    print(json.dumps(metrics.snapshot()["counters"].get("pose_result", [])))
+                metrics.enabled = show_debug
+            elif not show_debug and args.metrics_file:
+                metrics.write_json(args.metrics_file)
+        return True
+
+    config = VIDEO_CONFIG
+    process = analyze
+    workers = args.workers
+    roi = None
+    controller = None
+    if args.backend in MediaPipeBackend.NAMES:
+        config = DetectorConfig(model_complexity=MediaPipeBackend.NAMES.index(args.backend))
+        process = lambda frame, pool: analyze(frame, pool, config=config)
+    elif args.backend == "onnx":
+        backend = create_backend("onnx", model_path=args.onnx_model)
+        process = lambda frame, pool: analyze(frame, pool, backend=backend)
+    else:
+        # The controller's latency averages and level are shared state: one worker
+        budget_ms = args.latency_ms or (1000.0 / args.target_fps if args.target_fps else 50.0)
+        controller = ComplexityController.for_mediapipe(budget_ms)
+        process = lambda frame, pool: analyze(frame, pool, backend=controller)
+        workers = 1
+    if args.roi or (args.target_fps and controller is None):
+        # Cropping and resolution depend on the previous frame: one worker
+        resolution = AdaptiveResolution(args.target_fps, args.max_side) if args.target_fps else None
+        roi = RoiTracker(resolution=resolution, crop=args.roi)
+        process = lambda frame, pool: analyze(frame, pool, roi, config)
+        workers = 1
+
+    classify = classify_landmarks
+    if args.templates:
+        # Template-matching mode: label the frame with its closest reference
+        # pose, or keep the classifier's result when no template is close
+        templates = TemplateIndex.load(args.templates)
+        classify = lambda points, debug_info=None: (templates.match(points, args.min_similarity)
+                                                    or classify_landmarks(points, debug_info))
+        matched = process
+
+        def process(frame, pool):
+            pose_landmarks, result = matched(frame, pool)
+            if pose_landmarks is not None:
+                result = templates.match(landmarks_to_array(pose_landmarks), args.min_similarity) or result
+            return pose_landmarks, result
+
+    if args.smooth != "none" or args.hold > 1:
+        # Tracking video mode sees every frame in order on one detector;
+        # template labels are matched before the hold so it debounces them too
+        filter_class = LANDMARK_FILTERS[args.smooth]
+        tracker = PoseTracker(filter_class() if filter_class else None, hold_frames=args.hold, config=config, roi=roi,
+                              classify=classify)
+        process = lambda frame, pool: tracker.update(frame, pool)
+        workers = 1
+
+    multi = None
+    if args.multi:
+        # People are extracted in parallel inside the classifier, and their
+        # IDs depend on frame order, so the pipeline keeps one worker;
+        # --workers then sizes the per-person pool (default: all cores)
+        multi = MultiPoseClassifier(workers=args.workers if args.workers > 1 else None, detect_every=args.detect_every,
+                                    tracker=PersonTracker(hold_frames=args.hold))
+        process = lambda frame, pool: (multi.process(frame), None)
+        workers = 1
+
+    profiler = None
+    if args.profile_dir:
+        profiler = ProfileWindow(args.profile_dir, args.profile_seconds, args.profile_every, args.profile_backend)
+        unprofiled = process
+        process = lambda frame, pool: profiler.run(unprofiled, frame, pool)
+    if scheduler is not None:
+        # The cascade order is learned from consecutive frames: one worker
+        workers = 1
+
+    # Capture, inference and display run as separate stages
+    pipeline = VideoPipeline(
+        cap, render,
+        workers=workers,
+        queue_size=args.queue_size,
+        drop_policy=args.drop_policy,
+        process=process,
+        warmup_configs=[config] if args.warmup and args.backend in MediaPipeBackend.NAMES else None,
+    )
+    report = pipeline.run()
+    if multi is not None:
+        multi.close()
+    if controller is not None:
+        report["backend"] = controller.stats()
+    if scheduler is not None:
+        report["cascade"] = scheduler.stats()
+    if profiler is not None:
+        profiler.close()
+    if recorder is not None:
+        recorder.close()
+    if analytics is not None:
+        with open(args.session_summary, "w") as f:
+            json.dump(analytics.close(), f, indent=2)
+    if args.metrics_file:
+        metrics.write_json(args.metrics_file)
+    print("\nPipeline stats:")
+    print(json.dumps(report, indent=2))
 
     # Release the webcam and close the window
     cap.release()
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from poses.geometry import NUM_LANDMARKS, landmarks_to_array
+from poses.landmarks import IMAGE_CONFIG, extract_landmarks
+
+# Bump when the stored array layout or detector semantics change
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "yoga-poses", "landmarks.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS landmarks (
+    key TEXT PRIMARY KEY,
+    points BLOB,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS landmarks_last_used ON landmarks (last_used);
+"""
+
+
+def content_key(data, config):
+    """
+    Cache key for an image and detector configuration.
+
+    Args:
+        data (bytes or numpy.ndarray): Encoded image file bytes or a decoded frame.
+        config (DetectorConfig): Detector settings the landmarks come from.
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, np.ndarray):
+        digest.update(repr(data.shape).encode())
+        data = np.ascontiguousarray(data)
+    digest.update(memoryview(data).cast("B"))
+    return f"v{CACHE_VERSION}:{tuple(config)}:{digest.hexdigest()}"
+
+
+class LandmarkCache:
+    """
+    Persistent SQLite store of (33, 4) landmark arrays keyed by content_key.
+
+    "No person found" is cached too. Once more than max_entries are stored
+    the least recently used are evicted, checked every 1000 inserts and on
+    close(). Hits only note their time in memory; the last_used updates are
+    written in one transaction with the eviction check, or once
+    touch_batch hits have piled up, so lookups never write. Each process
+    should open its own instance; WAL mode lets several processes share one
+    file.
+
+    Args:
+        path (str): Database file; created if missing.
+        max_entries (int): Size bound enforced on insert.
+        touch_batch (int): Buffered hits that force a last_used flush.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=1_000_000, touch_batch=1000):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._inserts = 0
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Looks up key.
+
+        Returns:
+            tuple: (hit, points). points is the cached (33, 4) array, or None
+            on a miss or when the image had no pose.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT points FROM landmarks WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touches()
+                self._conn.commit()
+        if row[0] is None:
+            return True, None
+        return True, np.frombuffer(row[0], dtype=np.float32).reshape(NUM_LANDMARKS, 4).copy()
+
+    def put(self, key, points):
+        """Stores landmarks (or None for "no pose") under key."""
+        blob = None if points is None else np.asarray(points, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO landmarks (key, points, last_used) VALUES (?, ?, ?)",
+                (key, blob, time.time()),
+            )
+            self._inserts += 1
+            # Checking the size on every insert would cost a table scan each time
+            if self._inserts % 1000 == 0:
+                self._flush_touches()
+                self._evict()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE landmarks SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM landmarks").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM landmarks WHERE key IN "
+                "(SELECT key FROM landmarks ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM landmarks").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_touches()
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def extract_landmarks_cached(cache, data, config=IMAGE_CONFIG, pool=None):
+    """
+    Landmarks for an encoded image, consulting cache before inference.
+
+    Args:
+        cache (LandmarkCache): Cache to read and fill.
+        data (bytes): Encoded image file contents.
+        config (DetectorConfig): Detector settings, part of the key.
+        pool (DetectorPool, optional): Detector pool for misses.
+
+    Returns:
+        tuple: (points or None, decoded BGR image or None, hit). The image
+        is only decoded on a miss.
+    """
+    key = content_key(data, config)
+    hit, points = cache.get(key)
+    if hit:
+        return points, None, True
+
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None, None, False
+    pose_landmarks = extract_landmarks(image, config, pool)
+    points = None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+    cache.put(key, points)
+    return points, image, False
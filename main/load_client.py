@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def summarize(latencies_ms, statuses, elapsed):
+    samples = np.asarray(latencies_ms, dtype=np.float64)
+    summary = {
+        "requests": len(statuses),
+        "ok": statuses.count("ok"),
+        "overloaded": statuses.count("overloaded"),
+        "errors": len(statuses) - statuses.count("ok") - statuses.count("overloaded"),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(statuses) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    if samples.size:
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        summary.update(p50_ms=round(float(p50), 3), p95_ms=round(float(p95), 3), p99_ms=round(float(p99), 3))
+    return summary
+
+
+async def _http_worker(session, url, frames, count, latencies, statuses):
+    for i in range(count):
+        start = time.perf_counter()
+        async with session.post(f"{url}/detect", data=frames[i % len(frames)]) as response:
+            await response.read()
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.append("ok" if response.status == 200 else
+                            "overloaded" if response.status == 503 else str(response.status))
+
+
+async def _ws_worker(session, url, frames, count, latencies, statuses):
+    async with session.ws_connect(f"{url}/ws") as ws:
+        for i in range(count):
+            start = time.perf_counter()
+            await ws.send_bytes(frames[i % len(frames)])
+            reply = await ws.receive_json()
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.append(reply.get("error") or "ok")
+
+
+async def run_load(url, frames, requests=200, concurrency=8, mode="http"):
+    """
+    Sends frames to a running server from concurrency clients at once.
+
+    Returns:
+        dict: Request counts, throughput, latency percentiles and the
+        server's own /metrics afterwards.
+    """
+    worker = _http_worker if mode == "http" else _ws_worker
+    latencies, statuses = [], []
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    async with aiohttp.ClientSession() as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session, url, frames, n, latencies, statuses) for n in per_client if n))
+        elapsed = time.perf_counter() - start
+        async with session.get(f"{url}/metrics") as response:
+            metrics = await response.json()
+    summary = summarize(latencies, statuses, elapsed)
+    summary["server"] = metrics
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in client that load-tests the pose server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Server base URL.")
+    parser.add_argument("--images", default=os.path.join(REPO_ROOT, "*.jpg"), help="Glob of frames to send.")
+    parser.add_argument("--requests", type=int, default=200, help="Frames to send in total.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients sending at once.")
+    parser.add_argument("--mode", choices=("http", "ws"), default="http", help="Transport to use.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    frames = []
+    for path in sorted(glob.glob(args.images)):
+        with open(path, "rb") as f:
+            frames.append(f.read())
+    if not frames:
+        print("No images found.", file=sys.stderr)
+        return 1
+    summary = asyncio.run(run_load(args.url, frames, args.requests, args.concurrency, args.mode))
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
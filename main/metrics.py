@@ -0,0 +1,297 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 75, 100, 150, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds, reported cumulatively."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(self.buckets):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def summary(self):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[f"le_{bound}"] = cumulative
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "total_ms": round(self.total_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.observe(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def _label_text(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+class Metrics:
+    """
+    Stage timers and outcome counters.
+
+    While disabled, timer() hands back a shared no-op context manager and
+    callers guard counting with `if metrics.enabled`, so instrumented code
+    pays one attribute check per call site.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers = {}
+            self.counters = {}
+            self.vectors = {}
+
+    def timer(self, name):
+        """Context manager that records the time spent in its block under name."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, ms):
+        with self._lock:
+            histogram = self.timers.get(name)
+            if histogram is None:
+                histogram = self.timers[name] = LatencyHistogram()
+            histogram.observe(ms)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def count_vector(self, name, keys, increments):
+        """
+        Adds an array of increments to one counter per key at once.
+
+        Args:
+            name (str): Counter name.
+            keys (tuple): Label tuples, one per element of increments; must
+                be the same object on every call for a given name.
+            increments (numpy.ndarray): (..., len(keys)) values to add.
+        """
+        increments = np.asarray(increments, dtype=np.int64).reshape(-1, len(keys)).sum(axis=0)
+        with self._lock:
+            entry = self.vectors.get(name)
+            if entry is None:
+                entry = self.vectors[name] = (keys, np.zeros(len(keys), dtype=np.int64))
+            entry[1][:] += increments
+
+    def snapshot(self):
+        """All timers and counters as plain JSON-ready data."""
+        with self._lock:
+            counters = {}
+            for (name, labels), value in self.counters.items():
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            for name, (keys, values) in self.vectors.items():
+                counters.setdefault(name, []).extend(
+                    {"labels": dict(labels), "value": int(value)} for labels, value in zip(keys, values)
+                )
+            return {
+                "timers": {name: histogram.summary() for name, histogram in self.timers.items()},
+                "counters": counters,
+            }
+
+    def to_prometheus(self, prefix="yoga_"):
+        """Prometheus text exposition of the current values."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, summary in snapshot["timers"].items():
+            metric = f"{prefix}{name}_ms"
+            lines.append(f"# TYPE {metric} histogram")
+            for bucket, value in summary["buckets"].items():
+                lines.append(f'{metric}_bucket{{le="{bucket[3:]}"}} {value}')
+            lines.append(f"{metric}_sum {summary['total_ms']}")
+            lines.append(f"{metric}_count {summary['count']}")
+        for name, entries in snapshot["counters"].items():
+            metric = f"{prefix}{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for entry in entries:
+                labels = _label_text(sorted(entry["labels"].items()))
+                lines.append(f"{metric}{{{labels}}} {entry['value']}" if labels else f"{metric} {entry['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def summary_lines(self, names):
+        """Short "name mean ms" lines for an on-screen overlay."""
+        with self._lock:
+            return [
+                f"{name}: {self.timers[name].total_ms / self.timers[name].count:.1f} ms"
+                for name in names if name in self.timers and self.timers[name].count
+            ]
+
+
+# Process-wide instance used by the pipeline; disabled until enabled
+metrics = Metrics()
+
+
+def serve_metrics(port, registry=metrics, host="127.0.0.1"):
+    """
+    Serves registry as Prometheus text on http://host:port/metrics (and as
+    JSON on /metrics.json) from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: Call shutdown() to stop it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = registry.to_prometheus().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(registry.snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+class ProfileWindow:
+    """
+    Profiles calls made through run() for duration seconds out of every
+    interval seconds and writes one report per window to output_dir.
+
+    Only the thread that opens a window is profiled during it; calls on
+    other threads run unprofiled.
+
+    Args:
+        output_dir (str): Directory for .prof (cProfile) or .html (pyinstrument) files.
+        duration (float): Length of each profiling window in seconds.
+        interval (float): Seconds between window starts.
+        backend (str): "cprofile", or "pyinstrument" if it is installed.
+    """
+
+    def __init__(self, output_dir, duration=5.0, interval=60.0, backend="cprofile"):
+        if backend == "pyinstrument":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                raise ImportError("The pyinstrument backend needs: pip install pyinstrument")
+        elif backend != "cprofile":
+            raise ValueError(f"Unknown profiler backend {backend!r}")
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.duration = duration
+        self.interval = interval
+        self.backend = backend
+        self.windows = 0
+        self._profiler = None
+        self._owner = None
+        self._window_end = 0.0
+        self._next_start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _open(self, now):
+        if self.backend == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler(async_mode="disabled")
+        else:
+            self._profiler = cProfile.Profile()
+        self._owner = threading.get_ident()
+        self._window_end = now + self.duration
+        self._next_start = now + self.interval
+
+    def _close(self):
+        self.windows += 1
+        if self.backend == "pyinstrument":
+            path = os.path.join(self.output_dir, f"profile-{self.windows:03d}.html")
+            with open(path, "w") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.dump_stats(os.path.join(self.output_dir, f"profile-{self.windows:03d}.prof"))
+        self._profiler = None
+        self._owner = None
+
+    def run(self, func, *args, **kwargs):
+        now = time.perf_counter()
+        with self._lock:
+            if self._profiler is None and now >= self._next_start:
+                self._open(now)
+            elif self._profiler is not None and self._owner == threading.get_ident() and now >= self._window_end:
+                self._close()
+            profiled = self._profiler is not None and self._owner == threading.get_ident()
+        if not profiled:
+            return func(*args, **kwargs)
+        if self.backend == "pyinstrument":
+            self._profiler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._profiler.stop()
+        return self._profiler.runcall(func, *args, **kwargs)
+
+    def close(self):
+        """Writes the report of a window still open."""
+        with self._lock:
+            if self._profiler is not None:
+                self._close()
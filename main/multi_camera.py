@@ -0,0 +1,308 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import warnings
+from multiprocessing import shared_memory
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cv2
+import numpy as np
+
+from main.pipeline import classify_landmarks
+from main.video_source import open_source
+from poses.geometry import landmarks_to_array
+from poses.landmarks import IMAGE_CONFIG, DetectorConfig, DetectorPool, extract_landmarks
+
+
+class FrameRing:
+    """
+    Fixed-size BGR frame slots in one multiprocessing.shared_memory block.
+
+    The creating process owns the block and unlinks it; other processes
+    attach by spec and get zero-copy numpy views of the slots.
+
+    Args:
+        shape (tuple): (height, width, 3) of every slot.
+        slots (int): Number of frames the ring holds.
+        name (str, optional): Existing block to attach to.
+    """
+
+    def __init__(self, shape, slots, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = int(np.prod(self.shape)) * slots
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            # Child processes share the owner's resource tracker, so attaching
+            # registers the same name again and the owner's unlink clears it
+            self._shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self._shm.buf)
+
+    @property
+    def spec(self):
+        """Picklable (name, shape, slots) to attach from another process."""
+        return self._shm.name, self.shape, self.slots
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, slots = spec
+        return cls(shape, slots, name)
+
+    def frame(self, slot):
+        """Zero-copy view of one slot."""
+        return self._frames[slot]
+
+    def write(self, slot, frame):
+        """Copies frame into slot, resizing it if its shape differs."""
+        view = self._frames[slot]
+        if frame.shape == self.shape:
+            np.copyto(view, frame)
+        else:
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=view, interpolation=cv2.INTER_AREA)
+
+    def close(self):
+        self._frames = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def _capture_main(camera, spec, ring_spec, stride, work_queue, free_slots, counters, stop_event):
+    # One process per camera: decode into a free slot, announce (camera, slot)
+    warnings.filterwarnings("ignore", category=UserWarning)
+    ring = FrameRing.attach(ring_spec)
+    try:
+        with open_source(spec, stride) as source:
+            live = getattr(source, "live", False)
+            while not stop_event.is_set():
+                ok, frame = source.read()
+                if not ok:
+                    break
+                counters[2 * camera] += 1
+                try:
+                    # Live cameras drop frames when every slot is busy; files wait
+                    slot = free_slots.get(timeout=None if not live else 0)
+                except queue.Empty:
+                    counters[2 * camera + 1] += 1
+                    continue
+                ring.write(slot, frame)
+                work_queue.put((camera, slot, source.index, time.time()))
+    finally:
+        ring.close()
+
+
+def _detector_main(ring_specs, config, work_queue, free_slots, results):
+    # Detector process: reads frames in place, hands the slot back, classifies
+    warnings.filterwarnings("ignore", category=UserWarning)
+    rings = [FrameRing.attach(spec) for spec in ring_specs]
+    try:
+        with DetectorPool() as pool:
+            while True:
+                item = work_queue.get()
+                if item is None:
+                    break
+                camera, slot, index, timestamp = item
+                start = time.perf_counter()
+                pose_landmarks = extract_landmarks(rings[camera].frame(slot), config, pool)
+                free_slots[camera].put(slot)
+                points = None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+                result = classify_landmarks(points)
+                results.put({
+                    "camera": camera,
+                    "index": index,
+                    "timestamp": timestamp,
+                    "label": result.label,
+                    "scores": result.scores,
+                    "inference_ms": round((time.perf_counter() - start) * 1000, 3),
+                })
+    finally:
+        for ring in rings:
+            ring.close()
+        results.put(None)
+
+
+def probe_shape(spec):
+    """Frame shape of a source, read from its first frame."""
+    with open_source(spec) as source:
+        ok, frame = source.read()
+    if not ok:
+        raise IOError(f"Could not read a frame from {spec}")
+    return frame.shape
+
+
+class MultiCameraOrchestrator:
+    """
+    Fans several cameras into one pool of detector processes.
+
+    Each camera gets a capture process and a FrameRing in shared memory.
+    Capture writes a decoded frame into a free slot and queues only
+    (camera, slot, index, timestamp); a detector process reads the slot
+    in place, returns it to the camera's free list as soon as inference
+    is done, and emits a small result record. Frames are never pickled,
+    and every detector is a separate process, so throughput grows with
+    cores rather than being capped by one GIL.
+
+    Frames of a camera may be handled by any detector, so detectors run
+    in static-image mode.
+
+    Args:
+        sources (list): Camera indices, stream URLs or video files.
+        workers (int, optional): Detector processes; defaults to the CPU
+            count minus one capture process per camera.
+        slots (int): Frames buffered per camera.
+        frame_shape (tuple, optional): Slot shape for every camera; frames
+            of another size are resized. Defaults to each camera's own size.
+        config (DetectorConfig): Detector settings; should be static.
+        stride (int): Capture every n-th frame.
+    """
+
+    def __init__(self, sources, workers=None, slots=4, frame_shape=None, config=IMAGE_CONFIG, stride=1):
+        self.sources = [str(source) for source in sources]
+        self.workers = workers or max(1, (os.cpu_count() or 1) - len(self.sources))
+        self.slots = slots
+        self.frame_shape = frame_shape
+        self.config = config
+        self.stride = stride
+        self.rings = []
+
+    def start(self):
+        ctx = mp.get_context()
+        self._stop = ctx.Event()
+        self._work = ctx.Queue(maxsize=len(self.sources) * self.slots)
+        self._results = ctx.Queue()
+        self._free = []
+        # Per camera: frames read, frames dropped for lack of a free slot
+        self._counters = ctx.Array("q", 2 * len(self.sources), lock=False)
+        for spec in self.sources:
+            ring = FrameRing(self.frame_shape or probe_shape(spec), self.slots)
+            free = ctx.Queue()
+            for slot in range(self.slots):
+                free.put(slot)
+            self.rings.append(ring)
+            self._free.append(free)
+
+        self._detectors = [
+            ctx.Process(target=_detector_main, name=f"detector-{i}", daemon=True,
+                        args=([ring.spec for ring in self.rings], self.config, self._work, self._free, self._results))
+            for i in range(self.workers)
+        ]
+        self._captures = [
+            ctx.Process(target=_capture_main, name=f"capture-{camera}", daemon=True,
+                        args=(camera, spec, self.rings[camera].spec, self.stride, self._work,
+                              self._free[camera], self._counters, self._stop))
+            for camera, spec in enumerate(self.sources)
+        ]
+        for process in self._detectors + self._captures:
+            process.start()
+        self.started = time.perf_counter()
+
+    def results(self):
+        """
+        Merged result stream: one record per processed frame, across all
+        cameras, in completion order. Ends when every source is exhausted
+        or stop() is called.
+        """
+        finished = 0
+        captures_done = False
+        while finished < len(self._detectors):
+            if not captures_done and not any(process.is_alive() for process in self._captures):
+                # Every capture ended: let each detector drain the queue and exit
+                captures_done = True
+                for _ in self._detectors:
+                    self._work.put(None)
+            try:
+                record = self._results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if record is None:
+                finished += 1
+                continue
+            record["latency_ms"] = round((time.time() - record["timestamp"]) * 1000, 3)
+            yield record
+
+    def stop(self):
+        self._stop.set()
+        for process in self._captures:
+            process.join(timeout=2)
+
+    def close(self):
+        for process in self._captures + self._detectors:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "cameras": [
+                {"source": spec, "read": self._counters[2 * i], "dropped": self._counters[2 * i + 1]}
+                for i, spec in enumerate(self.sources)
+            ],
+            "workers": self.workers,
+            "seconds": round(elapsed, 3),
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        self.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Classify poses from several cameras in one merged stream.")
+    parser.add_argument("sources", nargs="+", help="Camera indices, stream URLs or video files.")
+    parser.add_argument("--workers", type=int, help="Detector processes (default: spare cores).")
+    parser.add_argument("--slots", type=int, default=4, help="Shared-memory frames per camera.")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"),
+                        help="Resize every camera to this size in shared memory.")
+    parser.add_argument("--stride", type=int, default=1, help="Capture every n-th frame.")
+    parser.add_argument("--complexity", type=int, choices=(0, 1, 2), default=IMAGE_CONFIG.model_complexity,
+                        help="MediaPipe model complexity.")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds.")
+    parser.add_argument("--output", "-o", help="JSONL file for the merged results (default: stdout).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    shape = (args.size[1], args.size[0], 3) if args.size else None
+    config = DetectorConfig(model_complexity=args.complexity, static_image_mode=True)
+    out = open(args.output, "w") if args.output else sys.stdout
+    processed = 0
+    with MultiCameraOrchestrator(args.sources, args.workers, args.slots, shape, config, args.stride) as orchestrator:
+        try:
+            for record in orchestrator.results():
+                out.write(json.dumps(record) + "\n")
+                processed += 1
+                if args.duration and time.perf_counter() - orchestrator.started > args.duration:
+                    orchestrator.stop()
+        except KeyboardInterrupt:
+            orchestrator.stop()
+        summary = orchestrator.stats()
+    if out is not sys.stdout:
+        out.close()
+    summary["processed"] = processed
+    summary["frames_per_sec"] = round(processed / summary["seconds"], 2) if summary["seconds"] > 0 else 0.0
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
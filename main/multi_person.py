@@ -0,0 +1,295 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from main.pipeline import classify_stack
+from main.roi import detect_in_box, landmark_bbox
+from main.tracking import NO_POSE, LabelHysteresis
+from poses.landmarks import IMAGE_CONFIG, DetectorPool, Frame, array_to_landmarks, draw_landmarks
+
+# One classified person in a frame; box is normalized (x0, y0, x1, y1)
+Person = namedtuple("Person", ["id", "box", "points", "label"])
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise intersection over union.
+
+    Args:
+        boxes_a (numpy.ndarray): (N, 4) boxes as (x0, y0, x1, y1).
+        boxes_b (numpy.ndarray): (M, 4) boxes.
+
+    Returns:
+        numpy.ndarray: (N, M) IoU matrix.
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(1, -1, 4)
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return intersection / np.maximum(area_a + area_b - intersection, 1e-9)
+
+
+def suppress_duplicates(boxes, threshold=0.5):
+    """Indices of boxes to keep, dropping any that overlap an earlier kept box by more than threshold."""
+    keep = []
+    if len(boxes) == 0:
+        return keep
+    iou = box_iou(boxes, boxes)
+    for i in range(len(boxes)):
+        if all(iou[i, j] <= threshold for j in keep):
+            keep.append(i)
+    return keep
+
+
+class PersonDetector:
+    """
+    Finds person regions with OpenCV's HOG people detector.
+
+    The detector runs on a downscaled copy of the frame and returns
+    normalized boxes padded by margin, ready to crop for landmark extraction.
+
+    Args:
+        max_side (int): Longest image side the detector sees.
+        margin (float): Padding around each box, relative to its size.
+        nms_threshold (float): Overlap above which detections are merged.
+        min_score (float): Detections scoring below this are dropped.
+    """
+
+    def __init__(self, max_side=640, margin=0.15, nms_threshold=0.45, min_score=0.3):
+        self.max_side = max_side
+        self.margin = margin
+        self.nms_threshold = nms_threshold
+        self.min_score = min_score
+        self._hog = cv2.HOGDescriptor()
+        self._hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, image):
+        """
+        Args:
+            image (numpy.ndarray): BGR frame.
+
+        Returns:
+            list: Normalized (x0, y0, x1, y1) boxes, one per person.
+        """
+        height, width = image.shape[:2]
+        scale = min(1.0, self.max_side / max(height, width))
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+        rects, scores = self._hog.detectMultiScale(small, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        if len(rects) == 0:
+            return []
+        scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        keep = cv2.dnn.NMSBoxes([list(map(int, r)) for r in rects], scores.tolist(),
+                                self.min_score, self.nms_threshold)
+        small_height, small_width = small.shape[:2]
+        boxes = []
+        for i in np.asarray(keep).reshape(-1):
+            x, y, w, h = rects[i]
+            pad_x, pad_y = w * self.margin, h * self.margin
+            boxes.append((
+                max(0.0, (x - pad_x) / small_width),
+                max(0.0, (y - pad_y) / small_height),
+                min(1.0, (x + w + pad_x) / small_width),
+                min(1.0, (y + h + pad_y) / small_height),
+            ))
+        return boxes
+
+
+class _Track:
+    __slots__ = ("id", "box", "missed", "labels")
+
+    def __init__(self, track_id, box, hold_frames):
+        self.id = track_id
+        self.box = box
+        self.missed = 0
+        self.labels = LabelHysteresis(hold_frames)
+
+
+class PersonTracker:
+    """
+    Keeps stable person IDs across frames by greedy IoU matching.
+
+    Args:
+        iou_threshold (float): Minimum overlap to continue a track.
+        max_missed (int): Frames a track survives without a match.
+        hold_frames (int): Frames a pose must hold before a person's label
+            changes (1 announces every frame's label).
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=15, hold_frames=1):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.hold_frames = hold_frames
+        self.tracks = []
+        self._next_id = 1
+
+    def reset(self):
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes, labels):
+        """
+        Matches this frame's boxes to existing tracks.
+
+        Args:
+            boxes (list): Normalized boxes of the people found in the frame.
+            labels (list): Raw pose label of each box.
+
+        Returns:
+            list: (track id, stable label) for each box, in input order.
+        """
+        assigned = [None] * len(boxes)
+        if self.tracks and boxes:
+            iou = box_iou(boxes, [track.box for track in self.tracks])
+            # Best overlaps first, each box and track used at most once
+            for flat in np.argsort(-iou, axis=None):
+                i, j = np.unravel_index(flat, iou.shape)
+                if iou[i, j] < self.iou_threshold:
+                    break
+                if assigned[i] is None and all(a is not self.tracks[j] for a in assigned):
+                    assigned[i] = self.tracks[j]
+
+        matched = {id(track) for track in assigned if track is not None}
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        results = []
+        for i, (box, label) in enumerate(zip(boxes, labels)):
+            track = assigned[i]
+            if track is None:
+                track = _Track(self._next_id, box, self.hold_frames)
+                self._next_id += 1
+                self.tracks.append(track)
+            track.box = box
+            track.missed = 0
+            results.append((track.id, track.labels.update(label)))
+        return results
+
+
+class MultiPoseClassifier:
+    """
+    Classifies every person in a frame.
+
+    Person regions come from PersonDetector every detect_every frames and
+    from each person's own landmarks in between. Landmarks are extracted
+    per region on a thread pool, each thread with its own detector (the
+    MediaPipe graph releases the GIL while it runs), then all people are
+    classified in one batched call with the rules or the model chosen for
+    single-person mode (see pipeline.classify_stack). Wall time per frame
+    therefore grows with people / cores rather than with people.
+
+    Args:
+        workers (int, optional): Extraction threads; defaults to the CPU count.
+        config (DetectorConfig): Detector settings. Crops of different
+            people share detectors, so it should be static.
+        detect_every (int): Frames between person detector runs.
+        detector (PersonDetector, optional): Person region detector.
+        tracker (PersonTracker, optional): Stable ID assignment.
+        margin (float): Padding of landmark-derived boxes.
+    """
+
+    def __init__(self, workers=None, config=IMAGE_CONFIG, detect_every=10,
+                 detector=None, tracker=None, margin=0.25):
+        self.workers = workers or os.cpu_count() or 1
+        self.config = config
+        self.detect_every = max(1, detect_every)
+        self.detector = detector or PersonDetector()
+        self.tracker = tracker or PersonTracker()
+        self.margin = margin
+        self.frames = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="person")
+        self._local = threading.local()
+        self._pools = []
+        self._pools_lock = threading.Lock()
+        self._boxes = []
+
+    def _pool(self):
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = DetectorPool()
+            with self._pools_lock:
+                self._pools.append(pool)
+        return pool
+
+    def _extract(self, image, box):
+        return detect_in_box(image, box, self.config, self._pool())
+
+    def process(self, frame):
+        """
+        Args:
+            frame (Frame or numpy.ndarray): Video frame or image.
+
+        Returns:
+            list: Person tuples ordered by ID.
+        """
+        image = frame.bgr if isinstance(frame, Frame) else frame
+        if self.frames % self.detect_every == 0 or not self._boxes:
+            boxes = self.detector.detect(image)
+            # Keep following people the detector missed this time
+            boxes += self._boxes
+        else:
+            boxes = self._boxes
+        self.frames += 1
+
+        found = [
+            (box, points)
+            for box, points in zip(boxes, self._executor.map(lambda box: self._extract(image, box), boxes))
+            if points is not None
+        ]
+        # Crops of the same person give near-identical landmark boxes
+        landmark_boxes = [landmark_bbox(points, self.margin) or box for box, points in found]
+        keep = suppress_duplicates(landmark_boxes)
+        self._boxes = [landmark_boxes[i] for i in keep]
+        stacked = np.stack([found[i][1] for i in keep]) if keep else np.empty((0, 33, 4), np.float32)
+
+        # Same rules, model or cascade as single-person mode, one call for everyone
+        labels = classify_stack(stacked)
+        ids = self.tracker.update(self._boxes, labels)
+        people = [Person(track_id, box, points, label)
+                  for (track_id, label), box, points in zip(ids, self._boxes, stacked)]
+        return sorted(people, key=lambda person: person.id)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._pools_lock:
+            for pool in self._pools:
+                pool.close()
+            self._pools.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def render_people(frame, people, show_debug=False):
+    """
+    Draws every person's skeleton, box and "#id label" into the frame in place.
+
+    Returns:
+        numpy.ndarray: The annotated BGR buffer.
+    """
+    image = frame.bgr if isinstance(frame, Frame) else frame
+    height, width = image.shape[:2]
+    for person in people:
+        draw_landmarks(image, array_to_landmarks(person.points))
+        x0, y0, x1, y1 = person.box
+        color = (0, 255, 0) if person.label != NO_POSE else (0, 0, 255)
+        top_left = (int(x0 * width), int(y0 * height))
+        cv2.rectangle(image, top_left, (int(x1 * width), int(y1 * height)), color, 2)
+        cv2.putText(image, f"#{person.id} {person.label}", (top_left[0], max(20, top_left[1] - 8)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    cv2.putText(image, f"People: {len(people)}", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    if show_debug:
+        cv2.putText(image, "Debug Mode ON", (50, 100),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+    return image
@@ -0,0 +1,256 @@
+import cv2
+import numpy as np
+
+from main.metrics import metrics
+from poses.geometry import landmarks_to_array, compute_features
+from poses.landmarks import VIDEO_CONFIG, Frame, array_to_landmarks, extract_landmarks, draw_landmarks
+from poses.registry import reference_classifiers
+from poses.rules import PoseResult, get_rule_engine
+
+# Hand-written reference classifiers in the order they are checked; the
+# first match wins. The default path evaluates poses/definitions instead.
+# Modules are discovered from source and imported on first call.
+POSE_CLASSIFIERS = reference_classifiers()
+
+
+_condition_keys = {}
+
+# Trained PoseModel that replaces the rule engine in classify_landmarks; None means rules
+_pose_model = None
+# PoseScheduler running POSE_CLASSIFIERS in classify_landmarks instead of the rule engine
+_scheduler = None
+
+
+def use_pose_model(model):
+    """
+    Classifies with a trained PoseModel from now on, process-wide; None
+    switches back to the rule engine.
+    """
+    global _pose_model
+    _pose_model = model
+
+
+def use_scheduler(scheduler):
+    """
+    Classifies with the hand-written POSE_CLASSIFIERS, ordered per frame by
+    a PoseScheduler, from now on, process-wide; None switches back to the
+    rule engine. The scheduler learns from frame order, so feed it from one
+    thread.
+    """
+    global _scheduler
+    _scheduler = scheduler
+
+
+def _record_evaluation(evaluation, label):
+    # Outcome counter plus one failure counter per (pose, condition)
+    engine = evaluation.engine
+    keys = _condition_keys.get(id(engine))
+    if keys is None:
+        columns = {column: (pose, name) for pose, conditions in engine.pose_conditions.items()
+                   for name, column in conditions}
+        keys = _condition_keys[id(engine)] = tuple(
+            (("condition", columns[c][1]), ("pose", columns[c][0])) for c in range(len(columns))
+        )
+    metrics.count("pose_result", label=label)
+    metrics.count_vector("condition_failed", keys, ~evaluation.condition_pass)
+
+
+def classify_landmarks(points, debug_info=None):
+    """
+    Evaluates every pose definition against one set of landmarks, scores
+    every pose with the model set by use_pose_model, or runs the scheduled
+    reference cascade set by use_scheduler.
+
+    Args:
+        points (numpy.ndarray): (33, 4) array from landmarks_to_array, or None.
+        debug_info (list, optional): Receives one line per pose with the
+            conditions that failed.
+
+    Returns:
+        PoseResult: The first matching "<Name> Pose Detected" label, or
+        "No Pose Detected", with every pose's score and condition margins.
+    """
+    if points is None:
+        if metrics.enabled:
+            metrics.count("pose_result", label="No Pose Detected")
+        return PoseResult()
+
+    if _pose_model is not None:
+        with metrics.timer("classify"):
+            result = _pose_model.classify(points)
+        if metrics.enabled:
+            metrics.count("pose_result", label=result.label)
+        if debug_info is not None:
+            debug_info.extend(f"{pose}: {score:.2f}" for pose, score in result.ranking()[:3])
+        return result
+
+    if _scheduler is not None:
+        with metrics.timer("classify"):
+            label = classify_reference(points, debug_info, _scheduler)
+        if metrics.enabled:
+            metrics.count("pose_result", label=label)
+        return PoseResult(label, get_rule_engine().pose_for(label))
+
+    with metrics.timer("classify"):
+        evaluation = get_rule_engine().evaluate(points)
+        result = evaluation.result()
+    if metrics.enabled:
+        _record_evaluation(evaluation, result.label)
+    if debug_info is not None:
+        debug_info.extend(evaluation.debug_lines())
+    return result
+
+
+def classify_stack(points):
+    """
+    Labels for an (N, 33, 4) stack of people or frames, from the same
+    classifier classify_landmarks uses: one batched pass for the rules or
+    the model, the scheduled cascade person by person.
+
+    Returns:
+        list: One label per frame.
+    """
+    if not len(points):
+        return []
+    if _pose_model is not None:
+        labels = _pose_model.predict(points)
+    elif _scheduler is not None:
+        labels = [classify_reference(frame_points, scheduler=_scheduler) for frame_points in points]
+    else:
+        labels = get_rule_engine().evaluate(points).labels()
+    if metrics.enabled:
+        for label in labels:
+            metrics.count("pose_result", label=label)
+    return labels
+
+
+def classify_reference(points, debug_info=None, scheduler=None):
+    """
+    Runs the hand-written classifiers in POSE_CLASSIFIERS one after another.
+
+    Args:
+        points (numpy.ndarray): (33, 4) array from landmarks_to_array, or None.
+        debug_info (list, optional): Receives one line per classifier checked.
+        scheduler (PoseScheduler, optional): Picks and orders the classifiers
+            per frame instead of the fixed POSE_CLASSIFIERS order.
+
+    Returns:
+        str: The first matching "<Name> Pose Detected" string, or
+        "No Pose Detected".
+    """
+    if points is None:
+        return "No Pose Detected"
+
+    # Angles, distances and alignments are computed once for all classifiers
+    features = compute_features(points)
+    if scheduler is not None:
+        return scheduler.classify(points, features, debug_info)
+    for pose_func, pose_name in POSE_CLASSIFIERS:
+        try:
+            detected = bool(pose_func(points, features))
+        except Exception as e:
+            if debug_info is not None:
+                debug_info.append(f"Error in {pose_name}: {e}")
+            continue
+        if debug_info is not None:
+            debug_info.append(f"{pose_name}: {detected}")
+        if detected:
+            return pose_name
+
+    return "No Pose Detected"
+
+
+def analyze_frame(frame, debug_info=None, config=VIDEO_CONFIG, pool=None, roi=None, backend=None):
+    """
+    Runs pose inference once on a frame and classifies the result, without
+    touching the pixels.
+
+    Args:
+        frame (Frame or numpy.ndarray): Frame, or a BGR image or video frame.
+        debug_info (list, optional): Receives one line per pose checked.
+        config (DetectorConfig): Detector settings for the landmark stage.
+        pool (DetectorPool, optional): Detector pool; defaults to the shared one.
+        roi (RoiTracker, optional): Crops the detector input to the person
+            found in the previous frame.
+        backend (LandmarkBackend or ComplexityController, optional): Landmark
+            model to use instead of the MediaPipe detector for config.
+
+    Returns:
+        tuple: Pose landmarks (or None) and PoseResult.
+    """
+    with metrics.timer("inference"):
+        if backend is not None:
+            points = backend.detect(frame, pool)
+            pose_landmarks = None if points is None else array_to_landmarks(points)
+        elif roi is not None:
+            pose_landmarks, points = roi.extract(frame, config, pool)
+        else:
+            pose_landmarks = extract_landmarks(frame, config, pool)
+            points = None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+    if pose_landmarks is None:
+        if metrics.enabled:
+            metrics.count("pose_result", label="No Pose Detected")
+        return None, PoseResult()
+    return pose_landmarks, classify_landmarks(points, debug_info)
+
+
+def render_frame(frame, pose_landmarks, result, show_debug=False, debug_lines=()):
+    """
+    Single annotation step: draws the skeleton, result and debug marker
+    into the frame's BGR buffer in place. Only call it on frames that are
+    actually displayed or saved.
+
+    Args:
+        debug_lines (list): Extra lines shown under the debug marker.
+
+    Returns:
+        numpy.ndarray: The annotated BGR buffer.
+    """
+    with metrics.timer("render"):
+        image = frame.bgr if isinstance(frame, Frame) else frame
+        if pose_landmarks is not None:
+            draw_landmarks(image, pose_landmarks)
+        cv2.putText(image, result, (50, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1,
+                    (0, 255, 0) if result != "No Pose Detected" else (0, 0, 255),
+                    2)
+        if show_debug:
+            cv2.putText(image, "Debug Mode ON", (50, 100),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+            for i, line in enumerate(debug_lines):
+                cv2.putText(image, line, (50, 130 + 25 * i),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+    return image
+
+
+def warmup(configs=(VIDEO_CONFIG,), pool=None):
+    """
+    Pays the start-up cost up front: imports mediapipe, builds the
+    detectors for configs, runs each once on a blank frame and compiles
+    the pose rules.
+    """
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    for config in configs:
+        extract_landmarks(blank, config, pool)
+    get_rule_engine()
+
+
+def process_frame(frame, debug_info=None, config=VIDEO_CONFIG, pool=None):
+    """
+    Runs pose inference once on a BGR frame, classifies the result and
+    draws the skeleton onto the frame in place.
+
+    Args:
+        frame (Frame or numpy.ndarray): Frame, or a BGR image or video frame.
+        debug_info (list, optional): Receives one line per pose checked.
+        config (DetectorConfig): Detector settings for the landmark stage.
+        pool (DetectorPool, optional): Detector pool; defaults to the shared one.
+
+    Returns:
+        tuple: Annotated BGR frame and detection result.
+    """
+    frame = frame if isinstance(frame, Frame) else Frame(frame)
+    pose_landmarks, result = analyze_frame(frame, debug_info, config, pool)
+    if pose_landmarks is not None:
+        draw_landmarks(frame.bgr, pose_landmarks)
+    return frame.bgr, result
@@ -0,0 +1,246 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from collections import Counter
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from poses.geometry import NUM_LANDMARKS
+from poses.rules import get_rule_engine
+
+# One .npy file per column and chunk: <chunk>.<column>.npy
+COLUMNS = ("index", "timestamp", "points")
+FORMAT_VERSION = 1
+
+
+class LandmarkRecorder:
+    """
+    Appends (frame index, timestamp, 33x4 landmarks) rows to a session
+    directory of column shards.
+
+    Rows are buffered in preallocated arrays and written as one shard per
+    column every chunk_frames rows, so a crash loses at most one chunk.
+    Frames without a pose are stored as NaN rows. float16 keeps a frame at
+    280 bytes, about 30 MB per hour at 30 FPS.
+
+    An existing directory is appended to: meta.json keeps one entry per
+    recording session (first chunk, frames, dtype, fps) and the total
+    frame count, updated with every shard written.
+
+    Args:
+        directory (str): Session directory; created if missing.
+        chunk_frames (int): Rows per shard.
+        dtype: numpy.float16 or numpy.float32 for the landmark values.
+        fps (float, optional): Frame rate of the source, kept in meta.json.
+
+    Raises:
+        ValueError: If directory holds a recording of another format.
+    """
+
+    def __init__(self, directory, chunk_frames=9000, dtype=np.float16, fps=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_frames = chunk_frames
+        self.dtype = np.dtype(dtype)
+        self.frames = 0
+        self._chunk = len(glob.glob(os.path.join(directory, "*.points.npy")))
+        self._lock = threading.Lock()
+        self._meta = self._load_meta()
+        self._session = {"chunk": self._chunk, "frames": 0, "dtype": self.dtype.name, "fps": fps}
+        self._meta["sessions"].append(self._session)
+        self._allocate()
+        self._write_meta()
+
+    def _load_meta(self):
+        path = os.path.join(self.directory, "meta.json")
+        meta = {"version": FORMAT_VERSION, "dtype": self.dtype.name, "landmarks": NUM_LANDMARKS}
+        if os.path.exists(path):
+            with open(path) as f:
+                meta = json.load(f)
+            if meta.get("version") != FORMAT_VERSION or meta.get("landmarks") != NUM_LANDMARKS:
+                raise ValueError(f"Can't append to {self.directory}: recorded in another format")
+        if "sessions" not in meta:
+            # Recorded before sessions were tracked: one session of the shards on disk
+            frames = sum(len(np.load(shard, mmap_mode="r"))
+                         for shard in glob.glob(os.path.join(self.directory, "*.index.npy")))
+            meta["sessions"] = []
+            if frames:
+                meta["sessions"].append({"chunk": 0, "frames": frames, "dtype": meta["dtype"], "fps": None})
+        return meta
+
+    def _write_meta(self):
+        self._meta["frames"] = sum(session["frames"] for session in self._meta["sessions"])
+        path = os.path.join(self.directory, "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self._meta, f)
+        os.replace(path + ".tmp", path)
+
+    def _allocate(self):
+        self._index = np.empty(self.chunk_frames, dtype=np.int64)
+        self._timestamp = np.empty(self.chunk_frames, dtype=np.float64)
+        self._points = np.empty((self.chunk_frames, NUM_LANDMARKS, 4), dtype=self.dtype)
+        self._rows = 0
+
+    def append(self, index, timestamp, points):
+        """Adds one frame; points is a (33, 4) array or None for "no pose"."""
+        with self._lock:
+            row = self._rows
+            self._index[row] = index
+            self._timestamp[row] = timestamp
+            if points is None:
+                self._points[row] = np.nan
+            else:
+                self._points[row] = points
+            self._rows += 1
+            self.frames += 1
+            if self._rows == self.chunk_frames:
+                self._write()
+
+    def _write(self):
+        if not self._rows:
+            return
+        name = f"{self._chunk:06d}"
+        columns = {
+            "index": self._index[:self._rows],
+            "timestamp": self._timestamp[:self._rows],
+            "points": self._points[:self._rows],
+        }
+        # The points shard goes last and marks the chunk complete
+        for column in COLUMNS:
+            path = os.path.join(self.directory, f"{name}.{column}.npy")
+            np.save(path + ".tmp.npy", columns[column])
+            os.replace(path + ".tmp.npy", path)
+        self._session["frames"] += self._rows
+        self._write_meta()
+        self._chunk += 1
+        self._allocate()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class LandmarkRecording:
+    """
+    Read side of a session directory. Shards are memory-mapped, so
+    opening is instant and only the chunks being read are paged in.
+
+    Attributes:
+        meta (dict): Contents of meta.json: format, total frames and one
+            entry per recording session.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        meta_path = os.path.join(directory, "meta.json")
+        self.meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+        self._chunks = []
+        for points_path in sorted(glob.glob(os.path.join(directory, "*.points.npy"))):
+            prefix = points_path[:-len(".points.npy")]
+            self._chunks.append(tuple(np.load(f"{prefix}.{column}.npy", mmap_mode="r") for column in COLUMNS))
+        if not self._chunks:
+            raise IOError(f"No landmark recording in {directory}")
+
+    def __len__(self):
+        return sum(len(index) for index, _, _ in self._chunks)
+
+    def chunks(self):
+        """Yields (index, timestamp, points) memory-mapped arrays per chunk."""
+        yield from self._chunks
+
+    def arrays(self):
+        """Whole recording as in-memory (index, timestamp, float32 points) arrays."""
+        return (
+            np.concatenate([index for index, _, _ in self._chunks]),
+            np.concatenate([timestamp for _, timestamp, _ in self._chunks]),
+            np.concatenate([points for _, _, points in self._chunks]).astype(np.float32),
+        )
+
+    def frames(self):
+        """
+        Replay source: yields (index, timestamp, points) per frame, with
+        points a float32 (33, 4) array or None where no pose was found.
+        """
+        for index, timestamp, points in self._chunks:
+            points = np.asarray(points, dtype=np.float32)
+            missing = np.isnan(points).any(axis=(1, 2))
+            for i in range(len(index)):
+                yield int(index[i]), float(timestamp[i]), None if missing[i] else points[i]
+
+    def classify(self, engine=None):
+        """
+        Re-evaluates the pose rules over the whole recording, one batched
+        evaluation per chunk.
+
+        Returns:
+            list: (index, timestamp, label) per frame.
+        """
+        engine = engine or get_rule_engine()
+        samples = []
+        for index, timestamp, points in self._chunks:
+            points = np.asarray(points, dtype=np.float32)
+            found = ~np.isnan(points).any(axis=(1, 2))
+            labels = np.full(len(index), "No Pose Detected", dtype=object)
+            if found.any():
+                labels[found] = engine.evaluate(points[found]).labels()
+            samples.extend(zip(index.tolist(), timestamp.tolist(), labels.tolist()))
+        return samples
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-evaluate the pose rules on a recorded session.")
+    parser.add_argument("directory", help="Session directory written by --record.")
+    parser.add_argument("--timeline", action="store_true", help="Print pose segments instead of label counts.")
+    parser.add_argument("--min-duration", type=float, default=1.0, help="Shortest timeline segment, in seconds.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        recording = LandmarkRecording(args.directory)
+    except IOError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    samples = recording.classify()
+    elapsed = time.perf_counter() - start
+    summary = {
+        "frames": len(samples),
+        "seconds": round(elapsed, 3),
+        "frames_per_minute": round(len(samples) / elapsed * 60) if elapsed > 0 else None,
+    }
+    if args.timeline:
+        from main.analyze_video import build_timeline
+        summary["segments"] = build_timeline(samples, min_duration=args.min_duration)
+    else:
+        summary["labels"] = dict(Counter(label for _, _, label in samples).most_common())
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
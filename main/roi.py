@@ -0,0 +1,177 @@
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from poses.geometry import landmarks_to_array
+from poses.landmarks import VIDEO_CONFIG, Frame, array_to_landmarks, extract_landmarks
+
+
+def landmark_bbox(points, margin=0.25, min_visibility=0.5):
+    """
+    Normalized (x0, y0, x1, y1) box around the visible landmarks, grown by
+    margin times its size on each side and clipped to the frame.
+
+    Returns:
+        tuple or None: The box, or None when too few landmarks are visible.
+    """
+    visible = points[points[:, 3] >= min_visibility, :2]
+    if len(visible) < 4:
+        return None
+    (x0, y0), (x1, y1) = visible.min(axis=0), visible.max(axis=0)
+    pad_x, pad_y = (x1 - x0) * margin, (y1 - y0) * margin
+    return (
+        float(max(0.0, x0 - pad_x)),
+        float(max(0.0, y0 - pad_y)),
+        float(min(1.0, x1 + pad_x)),
+        float(min(1.0, y1 + pad_y)),
+    )
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def _area(box):
+    return max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
+
+
+def detect_in_box(image, box, config=VIDEO_CONFIG, pool=None, resolution=None):
+    """
+    Runs the detector on the part of image inside box.
+
+    Args:
+        image (numpy.ndarray): Full BGR frame.
+        box (tuple): Normalized (x0, y0, x1, y1) region to crop.
+        config (DetectorConfig): Detector settings.
+        pool (DetectorPool, optional): Detector pool.
+        resolution (AdaptiveResolution, optional): Downscales the crop.
+
+    Returns:
+        numpy.ndarray or None: (33, 4) landmarks in full-frame normalized
+        coordinates, or None when no person is found in the crop.
+    """
+    height, width = image.shape[:2]
+    left, top = int(box[0] * width), int(box[1] * height)
+    right, bottom = max(left + 1, int(np.ceil(box[2] * width))), max(top + 1, int(np.ceil(box[3] * height)))
+    crop = image[top:bottom, left:right]
+    if resolution is not None:
+        scale = resolution.scale_for(crop.shape)
+        if scale < 1.0:
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    pose_landmarks = extract_landmarks(crop, config, pool)
+    if pose_landmarks is None:
+        return None
+
+    # Crop-normalized -> frame-normalized; z shares the x scale
+    points = landmarks_to_array(pose_landmarks)
+    crop_width, crop_height = (right - left) / width, (bottom - top) / height
+    points[:, 0] = left / width + points[:, 0] * crop_width
+    points[:, 1] = top / height + points[:, 1] * crop_height
+    points[:, 2] *= crop_width
+    return points
+
+
+class AdaptiveResolution:
+    """
+    Caps the detector input size, shrinking it while frames take longer than
+    the target FPS allows and growing it back when there is headroom.
+
+    Args:
+        target_fps (float): Frame rate to hold.
+        max_side (int): Largest allowed input side in pixels.
+        min_side (int): Smallest allowed input side in pixels.
+        step (float): Factor applied to the cap on each adjustment.
+        window (int): Frames averaged before each adjustment.
+    """
+
+    def __init__(self, target_fps=15.0, max_side=1280, min_side=256, step=0.85, window=15):
+        self.target_fps = target_fps
+        self.max_side = max_side
+        self.min_side = min_side
+        self.step = step
+        self.side = max_side
+        self._times = deque(maxlen=window)
+
+    def record(self, seconds):
+        """Feeds one frame's processing time and adjusts the cap when the window is full."""
+        self._times.append(seconds)
+        if len(self._times) < self._times.maxlen:
+            return
+        fps = 1.0 / max(np.mean(self._times), 1e-6)
+        if fps < self.target_fps and self.side > self.min_side:
+            self.side = max(self.min_side, int(self.side * self.step))
+            self._times.clear()
+        elif fps > self.target_fps * 1.5 and self.side < self.max_side:
+            self.side = min(self.max_side, int(self.side / self.step))
+            self._times.clear()
+
+    def scale_for(self, shape):
+        """Resize factor (<= 1) that brings an image of shape under the current cap."""
+        return min(1.0, self.side / max(shape[0], shape[1]))
+
+
+class RoiTracker:
+    """
+    Crops the detector input to the person found in the previous frame.
+
+    The crop is only moved when the person leaves it or shrinks well inside
+    it, so MediaPipe's own tracking sees a steady window. When no pose is
+    found in the crop, the same frame is retried on the full image.
+    Landmarks are mapped back to full-frame normalized coordinates.
+
+    Args:
+        margin (float): Padding around the landmark box, relative to its size.
+        min_visibility (float): Landmarks below this don't shape the box.
+        resolution (AdaptiveResolution, optional): Downscales the input.
+        crop (bool): With False only the adaptive downscaling is applied.
+    """
+
+    def __init__(self, margin=0.25, min_visibility=0.5, resolution=None, crop=True):
+        self.margin = margin
+        self.min_visibility = min_visibility
+        self.resolution = resolution
+        self.crop = crop
+        self.box = None
+
+    def reset(self):
+        self.box = None
+
+    def _detect(self, image, box, config, pool):
+        return detect_in_box(image, box, config, pool, self.resolution)
+
+    def extract(self, frame, config=VIDEO_CONFIG, pool=None):
+        """
+        Pose landmarks for frame, detected inside the current region of interest.
+
+        Args:
+            frame (Frame or numpy.ndarray): Video frame.
+            config (DetectorConfig): Detector settings.
+            pool (DetectorPool, optional): Detector pool.
+
+        Returns:
+            tuple: (pose_landmarks, points) in full-frame coordinates, or
+            (None, None) when no person is found.
+        """
+        image = frame.bgr if isinstance(frame, Frame) else frame
+        start = time.perf_counter()
+        points = self._detect(image, self.box or (0.0, 0.0, 1.0, 1.0), config, pool)
+        if points is None and self.box is not None:
+            # Lost inside the crop: fall back to full-frame detection
+            self.box = None
+            points = self._detect(image, (0.0, 0.0, 1.0, 1.0), config, pool)
+        if self.resolution is not None:
+            self.resolution.record(time.perf_counter() - start)
+        if points is None:
+            self.box = None
+            return None, None
+        if not self.crop:
+            return array_to_landmarks(points), points
+
+        box = landmark_bbox(points, self.margin, self.min_visibility)
+        if box is None:
+            self.box = None
+        elif self.box is None or not _contains(self.box, box) or _area(box) < 0.5 * _area(self.box):
+            self.box = box
+        return array_to_landmarks(points), points
@@ -0,0 +1,103 @@
+import time
+
+from poses.geometry import ORIENTATIONS, body_orientation
+from poses.rules import load_definitions
+
+
+class PoseScheduler:
+    """
+    Orders a first-match classifier cascade so matches are found early.
+
+    Each frame:
+      1. The previous frame's pose goes first, since poses are held.
+      2. The rest run by expected hits per unit of cost: a decayed hit
+         rate divided by the measured evaluation time.
+      3. Once a classifier matches, only classifiers ahead of it in the
+         fixed order still run, so the result is the same first match the
+         unscheduled cascade returns; everything behind it is skipped.
+
+    With prune_orientation, classifiers whose pose is not listed for the
+    frame's coarse body orientation (upright, horizontal, inverted) are
+    skipped as well. That changes results: a pose whose rules pass in an
+    orientation its definition does not list is no longer reported, and a
+    pose behind it may win instead.
+
+    Args:
+        classifiers (list): (func, label) pairs in priority order;
+            func(points, features) -> bool.
+        orientations (dict, optional): label -> allowed orientation names.
+            Defaults to the "orientations" of the pose definitions; labels
+            without an entry are never skipped.
+        decay (float): Weight kept by the old hit rate and cost on each update.
+        prune_orientation (bool): Skip poses not listed for the orientation.
+    """
+
+    def __init__(self, classifiers, orientations=None, decay=0.98, prune_orientation=False):
+        self.classifiers = list(classifiers)
+        self.prune_orientation = prune_orientation
+        if orientations is None:
+            orientations = {d["label"]: d["orientations"] for d in load_definitions() if "orientations" in d}
+        self.allowed = [
+            {ORIENTATIONS.index(o) for o in orientations.get(label, ORIENTATIONS)}
+            for _, label in self.classifiers
+        ]
+        self.decay = decay
+        count = len(self.classifiers)
+        # Start from a uniform prior so untried classifiers still get a turn
+        self.hit_rate = [1.0 / count] * count
+        self.cost = [1e-5] * count
+        self.previous = None
+        self.frames = 0
+        self.evaluated = 0
+
+    def order(self, points):
+        """Indices of the classifiers worth running on points, best first."""
+        candidates = list(range(len(self.classifiers)))
+        if self.prune_orientation:
+            orientation = int(body_orientation(points))
+            candidates = [i for i in candidates if orientation in self.allowed[i]]
+        candidates.sort(key=lambda i: (i != self.previous, -self.hit_rate[i] / self.cost[i]))
+        return candidates
+
+    def classify(self, points, features, debug_info=None):
+        """
+        Runs the cascade in scheduled order and learns from the outcome.
+
+        Returns:
+            str: The first matching label, or "No Pose Detected".
+        """
+        self.frames += 1
+        matched = None
+        for i in self.order(points):
+            # Only a classifier ahead of the current match can still win
+            if matched is not None and i > matched:
+                continue
+            pose_func, label = self.classifiers[i]
+            start = time.perf_counter()
+            try:
+                detected = bool(pose_func(points, features))
+            except Exception as e:
+                if debug_info is not None:
+                    debug_info.append(f"Error in {label}: {e}")
+                continue
+            finally:
+                self.evaluated += 1
+                self.cost[i] = self.decay * self.cost[i] + (1 - self.decay) * (time.perf_counter() - start)
+            if debug_info is not None:
+                debug_info.append(f"{label}: {detected}")
+            if detected:
+                matched = i
+
+        for i in range(len(self.classifiers)):
+            self.hit_rate[i] = self.decay * self.hit_rate[i] + (1 - self.decay) * (i == matched)
+        self.previous = matched
+        return "No Pose Detected" if matched is None else self.classifiers[matched][1]
+
+    def stats(self):
+        """Average classifiers evaluated per frame and the current order priors."""
+        return {
+            "frames": self.frames,
+            "rules_per_frame": round(self.evaluated / self.frames, 3) if self.frames else 0.0,
+            "hit_rate": {label: round(rate, 4) for (_, label), rate in zip(self.classifiers, self.hit_rate)},
+            "cost_us": {label: round(cost * 1e6, 2) for (_, label), cost in zip(self.classifiers, self.cost)},
+        }
@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiohttp import WSMsgType, web
+
+from main.batch import _init_worker, classify_encoded
+from main.metrics import LatencyHistogram
+from poses.landmarks import IMAGE_CONFIG, DetectorConfig
+
+
+class Overloaded(Exception):
+    """Raised by MicroBatcher.submit when the request queue is full or the batcher is closing."""
+
+
+def classify_batch(blobs):
+    """Worker side of a micro-batch: one record per encoded frame."""
+    return [classify_encoded(data) for data in blobs]
+
+
+def _warmup():
+    return os.getpid()
+
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into batches for the worker processes.
+
+    A batch is dispatched once it holds max_batch frames or its oldest
+    frame has waited max_delay_ms, whichever comes first. At most
+    max_in_flight batches run at a time; while all are busy, requests
+    wait in a queue of max_queue frames and further ones are rejected
+    with Overloaded.
+
+    close() lets running batches finish and fails every frame still
+    waiting with Overloaded, so no request is left hanging at shutdown.
+
+    Args:
+        executor (ProcessPoolExecutor): Warm worker processes.
+        max_batch (int): Largest batch handed to one worker.
+        max_delay_ms (float): Longest a frame waits for its batch to fill.
+        max_queue (int): Frames allowed to wait before requests are rejected.
+        max_in_flight (int): Batches running at once, normally the worker count.
+    """
+
+    def __init__(self, executor, max_batch=8, max_delay_ms=10.0, max_queue=64, max_in_flight=1):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks = set()
+        self._runner = None
+        self._closing = False
+        self.in_flight = 0
+        self.max_depth = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_frames = 0
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    async def submit(self, data):
+        """Queues one encoded frame and waits for its record."""
+        if self._closing or self._queue.full():
+            self.rejected += 1
+            raise Overloaded()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((data, future, time.perf_counter()))
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return await future
+
+    def start(self):
+        """Starts the batching loop on the running event loop."""
+        self._runner = asyncio.create_task(self.run())
+
+    async def close(self):
+        """Stops batching, waits for running batches and fails queued frames."""
+        self._closing = True
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        self._fail_queued()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _fail_queued(self, batch=()):
+        pending = list(batch)
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(Overloaded())
+
+    async def run(self):
+        """Batching loop; start() runs it until close()."""
+        while True:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = batch[0][2] + self.max_delay
+                while len(batch) < self.max_batch:
+                    timeout = deadline - time.perf_counter()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                # Frames collected for a batch that will never be dispatched
+                self._fail_queued(batch)
+                raise
+            # Frames that queued up while every worker was busy join this batch
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            records = await loop.run_in_executor(self.executor, classify_batch, [data for data, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), record in zip(batch, records):
+                if not future.done():
+                    future.set_result(record)
+        finally:
+            self.in_flight -= 1
+            self.batches += 1
+            self.batched_frames += len(batch)
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "in_flight_batches": self.in_flight,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_frames / self.batches, 3) if self.batches else 0.0,
+            "rejected": self.rejected,
+        }
+
+
+async def handle_detect(request):
+    """POST /detect: body is one encoded frame, reply is its JSON record."""
+    app = request.app
+    start = time.perf_counter()
+    data = await request.read()
+    if not data:
+        return web.json_response({"error": "Empty request body."}, status=400)
+    try:
+        record = await app["batcher"].submit(data)
+    except Overloaded:
+        return web.json_response({"error": "Server overloaded, retry later."}, status=503,
+                                 headers={"Retry-After": "1"})
+    app["latency"]["http"].observe((time.perf_counter() - start) * 1000)
+    return web.json_response(record)
+
+
+async def handle_ws(request):
+    """
+    GET /ws: each binary message is one encoded frame; each reply is its
+    JSON record plus a per-connection sequence number.
+    """
+    app = request.app
+    ws = web.WebSocketResponse(max_msg_size=app["max_frame_bytes"])
+    await ws.prepare(request)
+    seq = 0
+    async for msg in ws:
+        if msg.type == WSMsgType.BINARY:
+            start = time.perf_counter()
+            try:
+                record = await app["batcher"].submit(msg.data)
+            except Overloaded:
+                await ws.send_json({"seq": seq, "error": "overloaded"})
+            else:
+                app["latency"]["ws"].observe((time.perf_counter() - start) * 1000)
+                await ws.send_json({"seq": seq, **record})
+            seq += 1
+        elif msg.type == WSMsgType.TEXT and msg.data == "close":
+            await ws.close()
+        elif msg.type == WSMsgType.ERROR:
+            break
+    return ws
+
+
+async def handle_metrics(request):
+    app = request.app
+    return web.json_response({
+        "uptime_s": round(time.perf_counter() - app["started"], 3),
+        "batcher": app["batcher"].stats(),
+        "latency": {name: histogram.summary() for name, histogram in app["latency"].items()},
+    })
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok"})
+
+
+def create_app(workers=None, config=IMAGE_CONFIG, max_batch=8, max_delay_ms=10.0, max_queue=64,
+               cache_path=None, max_frame_bytes=8 * 1024 * 1024, warmup=False):
+    """
+    Builds the aiohttp application.
+
+    Args:
+        workers (int, optional): Worker processes; defaults to the CPU count.
+        config (DetectorConfig): Detector settings of every worker.
+        max_batch (int): Largest micro-batch.
+        max_delay_ms (float): Longest a frame waits for its batch to fill.
+        max_queue (int): Frames allowed to wait before requests get 503.
+        cache_path (str, optional): SQLite landmark cache shared by the workers.
+        max_frame_bytes (int): Largest accepted WebSocket frame.
+        warmup (bool): Start every worker and load its detector before
+            serving; otherwise that happens on the first requests.
+    """
+    workers = workers or os.cpu_count() or 1
+    app = web.Application(client_max_size=max_frame_bytes)
+    app["max_frame_bytes"] = max_frame_bytes
+    app["latency"] = {"http": LatencyHistogram(), "ws": LatencyHistogram()}
+
+    async def start(app):
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(config, cache_path, warmup))
+        if warmup:
+            # Start every worker and load its detector before taking requests
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(executor, _warmup) for _ in range(workers)))
+        app["executor"] = executor
+        app["batcher"] = MicroBatcher(executor, max_batch, max_delay_ms, max_queue, max_in_flight=workers)
+        app["batcher"].start()
+        app["started"] = time.perf_counter()
+
+    async def stop(app):
+        await app["batcher"].close()
+        app["executor"].shutdown(wait=True, cancel_futures=True)
+
+    app.on_startup.append(start)
+    app.on_cleanup.append(stop)
+    app.router.add_post("/detect", handle_detect)
+    app.router.add_get("/ws", handle_ws)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/healthz", handle_health)
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve yoga pose detection over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes.")
+    parser.add_argument("--complexity", type=int, choices=(0, 1, 2), default=IMAGE_CONFIG.model_complexity,
+                        help="MediaPipe model complexity.")
+    parser.add_argument("--max-batch", type=int, default=8, help="Largest micro-batch.")
+    parser.add_argument("--max-delay-ms", type=float, default=10.0,
+                        help="Longest a frame waits for its micro-batch to fill.")
+    parser.add_argument("--max-queue", type=int, default=64,
+                        help="Frames allowed to wait before requests are rejected with 503.")
+    parser.add_argument("--cache", help="SQLite landmark cache shared by the workers.")
+    parser.add_argument("--warmup", action="store_true",
+                        help="Start the workers and load their models before accepting requests.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = DetectorConfig(model_complexity=args.complexity, static_image_mode=True)
+    app = create_app(args.workers, config, args.max_batch, args.max_delay_ms, args.max_queue, args.cache,
+                     warmup=args.warmup)
+    print(json.dumps({"listening": f"http://{args.host}:{args.port}", "workers": args.workers}), file=sys.stderr)
+    web.run_app(app, host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
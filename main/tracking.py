@@ -0,0 +1,192 @@
+import math
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from main.pipeline import classify_landmarks
+from poses.geometry import landmarks_to_array
+from poses.landmarks import VIDEO_CONFIG, extract_landmarks
+from poses.rules import PoseResult
+
+NO_POSE = "No Pose Detected"
+
+
+class EmaFilter:
+    """Exponential moving average over (33, 4) landmark arrays."""
+
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self._state = None
+
+    def reset(self):
+        self._state = None
+
+    def __call__(self, points, timestamp=None):
+        if self._state is None:
+            self._state = points.astype(np.float32, copy=True)
+        else:
+            self._state += self.alpha * (points - self._state)
+        return self._state.copy()
+
+
+class OneEuroFilter:
+    """
+    One Euro filter over (33, 4) landmark arrays: smooths hard when a
+    landmark is still and follows quickly when it moves.
+
+    Args:
+        min_cutoff (float): Cutoff frequency (Hz) at rest; lower is smoother.
+        beta (float): How fast the cutoff rises with speed; higher lags less.
+        d_cutoff (float): Cutoff frequency for the speed estimate.
+        frequency (float): Assumed frame rate when no timestamps are given.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0, frequency=30.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.frequency = frequency
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._dx = None
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, points, timestamp=None):
+        points = points.astype(np.float32)
+        if self._x is None:
+            self._x = points.copy()
+            self._dx = np.zeros_like(points)
+            self._t = timestamp
+            return self._x.copy()
+
+        if timestamp is not None and self._t is not None and timestamp > self._t:
+            dt = timestamp - self._t
+        else:
+            dt = 1.0 / self.frequency
+        self._t = timestamp
+
+        dx = (points - self._x) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx += a_d * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        tau = 1.0 / (2 * np.pi * cutoff)
+        a = 1.0 / (1.0 + tau / dt)
+        self._x += a * (points - self._x)
+        return self._x.copy()
+
+
+LANDMARK_FILTERS = {
+    "none": None,
+    "ema": EmaFilter,
+    "one-euro": OneEuroFilter,
+}
+
+
+class LabelHysteresis:
+    """
+    Announces a pose only once it has held for long enough.
+
+    The announced label changes when another label wins at least
+    hold_frames of the last window frames; until then the previous
+    announcement stands.
+    """
+
+    def __init__(self, hold_frames=5, window=None):
+        self.hold_frames = hold_frames
+        self._votes = deque(maxlen=window or hold_frames)
+        self.current = NO_POSE
+
+    def reset(self):
+        self._votes.clear()
+        self.current = NO_POSE
+
+    def update(self, label):
+        self._votes.append(label)
+        candidate, votes = Counter(self._votes).most_common(1)[0]
+        if candidate != self.current and votes >= self.hold_frames:
+            self.current = candidate
+        return self.current
+
+
+class PoseTracker:
+    """
+    Stateful video mode: one tracking-enabled detector across frames, a
+    landmark filter and a hold-to-announce label.
+
+    Frames must arrive in order, so run it with a single inference worker.
+
+    Args:
+        landmark_filter: EmaFilter, OneEuroFilter or None.
+        hold_frames (int): Frames a pose must hold before it is announced.
+        window (int, optional): Voting window; defaults to hold_frames.
+        config (DetectorConfig): Detector settings; must not be static.
+        roi (RoiTracker, optional): Crops the detector input to the person.
+        classify: classify(points, debug_info) -> PoseResult for the filtered
+            landmarks; defaults to classify_landmarks.
+    """
+
+    def __init__(self, landmark_filter=None, hold_frames=5, window=None, config=VIDEO_CONFIG, roi=None,
+                 classify=classify_landmarks):
+        if config.static_image_mode:
+            raise ValueError("PoseTracker needs a tracking detector (static_image_mode=False)")
+        self.landmark_filter = landmark_filter
+        self.labels = LabelHysteresis(hold_frames, window)
+        self.config = config
+        self.roi = roi
+        self.classify = classify
+        self.points = None
+        # Pose name of every label classified so far, for announcing a held label
+        self._poses = {}
+
+    def reset(self):
+        self.points = None
+        self.labels.reset()
+        if self.roi is not None:
+            self.roi.reset()
+        if self.landmark_filter is not None:
+            self.landmark_filter.reset()
+
+    def update(self, frame, pool=None, debug_info=None):
+        """
+        Processes the next frame.
+
+        Args:
+            frame (Frame or numpy.ndarray): Next video frame.
+            pool (DetectorPool, optional): Pool holding the tracking detector.
+            debug_info (list, optional): Receives per-pose condition lines.
+
+        Returns:
+            tuple: Raw pose landmarks (or None) for drawing and the stable label.
+        """
+        if self.roi is not None:
+            pose_landmarks, points = self.roi.extract(frame, self.config, pool)
+        else:
+            pose_landmarks = extract_landmarks(frame, self.config, pool)
+            points = None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+        if pose_landmarks is None:
+            # Tracking lost: start the filter afresh on the next detection
+            self.points = None
+            if self.landmark_filter is not None:
+                self.landmark_filter.reset()
+            stable = self.labels.update(NO_POSE)
+            return None, PoseResult(stable, self._poses.get(stable))
+
+        if self.landmark_filter is not None:
+            timestamp = getattr(frame, "timestamp", None)
+            points = self.landmark_filter(points, time.perf_counter() if timestamp is None else timestamp)
+        self.points = points
+        result = self.classify(points, debug_info)
+        self._poses[result.label] = result.pose
+        stable = self.labels.update(result.label)
+        if stable == result.label:
+            return pose_landmarks, result
+        # The announced label with this frame's scores and margins, not those of the frame that set it
+        return pose_landmarks, PoseResult(stable, self._poses.get(stable), result.scores, result.margins)
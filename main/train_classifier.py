@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+from collections import Counter
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cv2
+import numpy as np
+
+from main.batch import collect_images
+from main.build_templates import label_for
+from main.landmark_cache import extract_landmarks_cached
+from main.recording import LandmarkRecording
+from poses.geometry import landmarks_to_array
+from poses.landmarks import IMAGE_CONFIG, extract_landmarks
+from poses.learned import train_pose_model
+from poses.rules import NO_POSE, get_rule_engine
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_MODEL_PATH = os.path.join(REPO_ROOT, "pose_model.npz")
+# Hand-corrected timeline inside a session directory
+SESSION_LABELS = "labels.json"
+
+
+def session_frames(directory, engine, rule_labels=True):
+    """
+    Landmark frames of a recorded session with their labels.
+
+    Frames are labelled by <directory>/labels.json when it exists (a
+    timeline from `recording.py --timeline` or analyze_video.py, corrected
+    by hand; frames outside every segment are left out), otherwise by the
+    rules, or not at all without rule_labels. Frames without a pose are
+    skipped.
+
+    Returns:
+        tuple: (N, 33, 4) points and N labels.
+    """
+    recording = LandmarkRecording(directory)
+    _, timestamps, points = recording.arrays()
+    found = ~np.isnan(points).any(axis=(1, 2))
+    points, timestamps = points[found], timestamps[found]
+    if not len(points):
+        return points, []
+
+    labels_path = os.path.join(directory, SESSION_LABELS)
+    if not os.path.exists(labels_path):
+        return (points, engine.evaluate(points).labels()) if rule_labels else (points[:0], [])
+    with open(labels_path) as f:
+        segments = json.load(f)
+    segments = segments["segments"] if isinstance(segments, dict) else segments
+    labels = np.full(len(points), None, dtype=object)
+    for segment in segments:
+        labels[(timestamps >= segment["start"]) & (timestamps < segment["end"])] = segment["label"]
+    keep = np.array([label is not None for label in labels], dtype=bool)
+    return points[keep], labels[keep].tolist()
+
+
+def image_frames(paths, engine, config=IMAGE_CONFIG, cache=None, rule_labels=True):
+    """
+    Landmarks of labelled images: the pose named by the image's folder or
+    file name (see build_templates.label_for), or the rules' label when the
+    name is not a known pose (such images are skipped without rule_labels).
+    With a LandmarkCache, inference only runs for images not seen before.
+    """
+    names = {name: label for name, label in zip(engine.pose_names, engine.labels)}
+    known = set(engine.labels) | {NO_POSE}
+    points, labels = [], []
+    for path in paths:
+        label = label_for(path, names)
+        if label not in known and not rule_labels:
+            continue
+        if cache is not None:
+            with open(path, "rb") as f:
+                frame_points, _, _ = extract_landmarks_cached(cache, f.read(), config)
+        else:
+            image = cv2.imread(path)
+            pose_landmarks = None if image is None else extract_landmarks(image, config)
+            frame_points = None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+        if frame_points is None:
+            continue
+        points.append(frame_points)
+        labels.append(label if label in known else engine.evaluate(frame_points).label())
+    return np.array(points, dtype=np.float32).reshape(-1, 33, 4), labels
+
+
+def load_dataset(inputs, engine, cache=None, rule_labels=True):
+    """Session directories and images/globs/directories into one labelled set."""
+    sessions = [item for item in inputs if os.path.isfile(os.path.join(item, "meta.json"))]
+    images = collect_images([item for item in inputs if item not in sessions])
+    parts = [session_frames(directory, engine, rule_labels) for directory in sessions]
+    if images:
+        parts.append(image_frames(images, engine, cache=cache, rule_labels=rule_labels))
+    parts = [(points, labels) for points, labels in parts if len(labels)]
+    if not parts:
+        return np.empty((0, 33, 4), dtype=np.float32), []
+    return np.concatenate([points for points, _ in parts]), [label for _, labels in parts for label in labels]
+
+
+def _per_frame_us(classify, points, repeats=200):
+    # Single-frame latency, the way the live pipeline calls it
+    frames = points[np.arange(repeats) % len(points)]
+    start = time.perf_counter()
+    for frame in frames:
+        classify(frame)
+    return round((time.perf_counter() - start) / repeats * 1e6, 1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train a decision-tree pose classifier on landmarks.")
+    parser.add_argument("inputs", nargs="+",
+                        help="Recorded session directories (--record) and/or labelled images, folders or globs.")
+    parser.add_argument("--output", "-o", default=DEFAULT_MODEL_PATH, help="Model file to write (.npz).")
+    parser.add_argument("--rounds", type=int, default=40, help="Boosting rounds (trees).")
+    parser.add_argument("--depth", type=int, default=3, help="Levels per tree.")
+    parser.add_argument("--learning-rate", type=float, default=0.3, help="Shrinkage per tree.")
+    parser.add_argument("--min-leaf", type=int, default=5, help="Fewest frames on either side of a split.")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of frames kept out for evaluation.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the holdout split.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    engine = get_rule_engine()
+    points, labels = load_dataset(args.inputs, engine)
+    if not len(labels):
+        print("No labelled frames found.", file=sys.stderr)
+        return 1
+
+    order = np.random.default_rng(args.seed).permutation(len(labels))
+    split = len(order) - int(len(order) * args.holdout)
+    train, test = order[:split], order[split:]
+    labels = np.array(labels, dtype=object)
+
+    start = time.perf_counter()
+    model = train_pose_model(points[train], labels[train].tolist(), engine, rounds=args.rounds, depth=args.depth,
+                             learning_rate=args.learning_rate, min_leaf=args.min_leaf)
+    train_seconds = time.perf_counter() - start
+    model.save(args.output)
+
+    summary = {
+        "frames": len(labels),
+        "labels": dict(Counter(labels.tolist()).most_common()),
+        "trees": len(model.ensemble),
+        "train_seconds": round(train_seconds, 3),
+        "model_bytes": os.path.getsize(args.output),
+    }
+    if len(test):
+        predicted = np.array(model.predict(points[test]), dtype=object)
+        summary["holdout_accuracy"] = round(float(np.mean(predicted == labels[test])), 4)
+        summary["holdout_rule_agreement"] = round(
+            float(np.mean(predicted == np.array(engine.evaluate(points[test]).labels(), dtype=object))), 4
+        )
+    summary["model_us_per_frame"] = _per_frame_us(model.classify, points)
+    summary["rules_us_per_frame"] = _per_frame_us(lambda frame: engine.evaluate(frame).result(), points)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from main.landmark_cache import LandmarkCache
+from main.train_classifier import load_dataset
+from poses.geometry import REFERENCE_FEATURES, feature_kind
+from poses.rules import NO_POSE, RuleEngine, condition_scale, load_definitions
+
+# One tunable bound: definition and condition it lives in, which check of
+# an "any" condition, "min" or "max", its index among the engine's checks,
+# the current value and the search range
+Param = namedtuple("Param", ["pose", "condition", "check", "key", "bound", "value", "low", "high", "kind"])
+
+
+def tunable_params(definitions, span=3.0, select=None):
+    """
+    Every numeric bound of the pose definitions as a search parameter.
+
+    The range is value +/- span condition scales: the condition's own
+    "scale", or the engine's default for the feature's kind (10 degrees
+    for angles, including min/max/sub/abs of angles, 0.25 for ratios,
+    0.05 otherwise).
+
+    Args:
+        definitions (list): Pose definitions, in the engine's order.
+        span (float): Half-width of the range, in condition scales.
+        select (list, optional): "pose" or "pose.condition" names to tune;
+            everything by default.
+
+    Returns:
+        list: Param tuples.
+    """
+    specs = dict(REFERENCE_FEATURES)
+    for definition in definitions:
+        specs.update(definition.get("features", {}))
+    params = []
+    bound = 0
+    for definition in definitions:
+        pose = definition["name"]
+        for i, condition in enumerate(definition["conditions"]):
+            name = condition.get("name", f"condition_{i}")
+            wanted = select is None or pose in select or f"{pose}.{name}" in select
+            for j, check in enumerate(condition.get("any", [condition])):
+                kind = feature_kind(check["feature"], specs)
+                if kind is None and not condition.get("scale"):
+                    # The range would fall back to 0.05 whatever the units are
+                    raise ValueError(f"{pose}.{name}: {check['feature']!r} mixes feature kinds; "
+                                     "give the condition a \"scale\"")
+                scale = condition.get("scale") or condition_scale(check["feature"], specs)
+                for key in ("min", "max"):
+                    if wanted and key in check:
+                        value = float(check[key])
+                        params.append(Param(pose, name, j, key, bound, value,
+                                            value - span * scale, value + span * scale, kind))
+                bound += 1
+    return params
+
+
+def predicted_classes(detected):
+    """Class index per frame from (..., N, P) detections; P means no pose."""
+    first = np.argmax(detected, axis=-1)
+    return np.where(np.any(detected, axis=-1), first, detected.shape[-1])
+
+
+def confusion_matrices(truth, predicted, n_classes):
+    """(..., C, C) counts of [true class, predicted class] per candidate."""
+    predicted = np.asarray(predicted)
+    candidates = int(np.prod(predicted.shape[:-1]))
+    flat = (np.arange(candidates)[:, np.newaxis] * n_classes + truth) * n_classes + predicted.reshape(candidates, -1)
+    counts = np.bincount(flat.ravel(), minlength=candidates * n_classes * n_classes)
+    return counts.reshape(predicted.shape[:-1] + (n_classes, n_classes))
+
+
+def summarize(confusion):
+    """(..., C, C) confusion -> accuracy, macro F1 and per-class precision/recall/F1 arrays."""
+    confusion = confusion.astype(np.float64)
+    hits = np.diagonal(confusion, axis1=-2, axis2=-1)
+    support = confusion.sum(axis=-1)
+    predicted = confusion.sum(axis=-2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, hits / predicted, 0.0)
+        recall = np.where(support > 0, hits / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    # Classes absent from the corpus don't count towards the macro average
+    present = support > 0
+    macro_f1 = (f1 * present).sum(axis=-1) / np.maximum(present.sum(axis=-1), 1)
+    accuracy = hits.sum(axis=-1) / np.maximum(confusion.sum(axis=(-2, -1)), 1)
+    return {"accuracy": accuracy, "macro_f1": macro_f1, "precision": precision, "recall": recall, "f1": f1,
+            "support": support}
+
+
+def report(confusion, classes):
+    """JSON-ready evaluation of one confusion matrix."""
+    stats = summarize(confusion)
+    return {
+        "accuracy": round(float(stats["accuracy"]), 4),
+        "macro_f1": round(float(stats["macro_f1"]), 4),
+        "per_pose": {
+            label: {
+                "precision": round(float(stats["precision"][i]), 4),
+                "recall": round(float(stats["recall"][i]), 4),
+                "f1": round(float(stats["f1"][i]), 4),
+                "support": int(stats["support"][i]),
+            }
+            for i, label in enumerate(classes)
+        },
+        "confusion": {"labels": classes, "matrix": confusion.tolist()},
+    }
+
+
+# Per-process tuning state, set by _init_worker
+_worker = {}
+
+
+def _init_worker(definitions_dir, features, truth, params):
+    engine = RuleEngine.from_directory(definitions_dir)
+    bound_min, bound_max = engine.bounds
+    _worker.update(
+        engine=engine,
+        features=features,
+        truth=truth,
+        n_classes=len(engine.labels) + 1,
+        bound_min=bound_min,
+        bound_max=bound_max,
+        columns=np.array([p.bound for p in params], dtype=np.intp),
+        is_min=np.array([p.key == "min" for p in params], dtype=bool),
+    )
+
+
+def _score(values):
+    """Accuracy and macro F1 for a (K, params) block of candidate values."""
+    w = _worker
+    k = len(values)
+    bound_min = np.tile(w["bound_min"], (k, 1))
+    bound_max = np.tile(w["bound_max"], (k, 1))
+    bound_min[:, w["columns"][w["is_min"]]] = values[:, w["is_min"]]
+    bound_max[:, w["columns"][~w["is_min"]]] = values[:, ~w["is_min"]]
+    # All K candidates in one evaluation over the precomputed features
+    engine = w["engine"].with_bounds(bound_min[:, np.newaxis], bound_max[:, np.newaxis])
+    predicted = predicted_classes(engine.evaluate_features(w["features"]).detected)
+    stats = summarize(confusion_matrices(w["truth"], predicted, w["n_classes"]))
+    return stats["accuracy"], stats["macro_f1"]
+
+
+def candidates(params, search="random", trials=500, steps=5, seed=0, max_candidates=200_000):
+    """
+    Candidate values, one row per configuration; row 0 is the current one.
+
+    "grid" takes steps evenly spaced values per parameter (the product must
+    stay under max_candidates, so tune a few conditions at a time);
+    "random" draws trials configurations uniformly from the ranges.
+    """
+    current = np.array([[p.value for p in params]], dtype=np.float32)
+    if search == "grid":
+        count = steps ** len(params)
+        if count > max_candidates:
+            raise ValueError(f"Grid of {count} candidates; select fewer parameters or use random search")
+        axes = [np.linspace(p.low, p.high, steps) for p in params]
+        grid = np.array(list(itertools.product(*axes)), dtype=np.float32).reshape(-1, len(params))
+        return np.concatenate([current, grid])
+    rng = np.random.default_rng(seed)
+    low = np.array([p.low for p in params], dtype=np.float32)
+    high = np.array([p.high for p in params], dtype=np.float32)
+    return np.concatenate([current, rng.uniform(low, high, (trials, len(params))).astype(np.float32)])
+
+
+def _coordinate_moves(params, values, steps):
+    # Every single-parameter change of values to one of steps points in its range
+    moves = []
+    for i, param in enumerate(params):
+        for value in np.linspace(param.low, param.high, steps):
+            row = values.copy()
+            row[i] = value
+            moves.append(row)
+    return np.array(moves, dtype=np.float32)
+
+
+def tune(features, truth, params, definitions_dir, method="coordinate", trials=500, steps=7, rounds=20, seed=0,
+         workers=None, batch=8, metric="macro_f1"):
+    """
+    Searches threshold values in parallel processes over precomputed features.
+
+    "grid" and "random" score their candidates once. "coordinate" starts
+    from the current values and, each round, scores every single-parameter
+    move at once and keeps the best, until no move helps or rounds run out.
+
+    Returns:
+        tuple: Best values (one per param) and number of candidates scored.
+    """
+    pick = 1 if metric == "macro_f1" else 0
+
+    def score(values):
+        blocks = [values[i:i + batch] for i in range(0, len(values), batch)]
+        return np.concatenate([result[pick] for result in executor.map(_score, blocks)])
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(definitions_dir, features, truth, params)) as executor:
+        if method != "coordinate":
+            values = candidates(params, method, trials, steps, seed)
+            return values[int(np.argmax(score(values)))], len(values)
+
+        best = np.array([p.value for p in params], dtype=np.float32)
+        best_score = score(best[np.newaxis])[0]
+        scored = 1
+        for _ in range(rounds):
+            moves = _coordinate_moves(params, best, steps)
+            scores = score(moves)
+            scored += len(moves)
+            i = int(np.argmax(scores))
+            if scores[i] <= best_score + 1e-9:
+                break
+            best, best_score = moves[i], scores[i]
+        return best, scored
+
+
+def apply_values(definitions, params, values):
+    """Copies of the definitions with the tuned bounds written in."""
+    tuned = json.loads(json.dumps(definitions))
+    by_name = {definition["name"]: definition for definition in tuned}
+    for param, value in zip(params, values):
+        if np.isclose(param.value, value):
+            continue
+        definition = by_name[param.pose]
+        for i, condition in enumerate(definition["conditions"]):
+            if condition.get("name", f"condition_{i}") == param.condition:
+                check = condition.get("any", [condition])[param.check]
+                check[param.key] = round(float(value), 1 if param.kind == "angle" else 4)
+    return tuned
+
+
+def write_definitions(definitions, directory):
+    os.makedirs(directory, exist_ok=True)
+    for definition in definitions:
+        with open(os.path.join(directory, f"{definition['name']}.json"), "w") as f:
+            json.dump(definition, f, indent=2)
+            f.write("\n")
+
+
+def load_corpus(inputs, engine, cache_path=None):
+    """Labelled landmarks from .npz corpora plus sessions/images (hand labels only)."""
+    corpora = [item for item in inputs if item.endswith(".npz")]
+    others = [item for item in inputs if item not in corpora]
+    points, labels = [], []
+    for path in corpora:
+        data = np.load(path)
+        points.append(data["points"])
+        labels.extend(data["labels"].tolist())
+    if others:
+        cache = LandmarkCache(cache_path) if cache_path else None
+        try:
+            # Tuning against the rules' own labels would be circular
+            more_points, more_labels = load_dataset(others, engine, cache=cache, rule_labels=False)
+        finally:
+            if cache is not None:
+                cache.close()
+        points.append(more_points)
+        labels.extend(more_labels)
+    points = np.concatenate(points) if points else np.empty((0, 33, 4), dtype=np.float32)
+    return points.astype(np.float32), labels
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Evaluate the pose rules on a labelled corpus and tune their thresholds without inference.")
+    parser.add_argument("inputs", nargs="+",
+                        help="Corpus .npz files, hand-labelled session directories (labels.json) "
+                             "and/or images in <pose>/ folders.")
+    parser.add_argument("--definitions", default=None, help="Definitions directory (default: the bundled ones).")
+    parser.add_argument("--cache", help="SQLite landmark cache, so images are only detected once.")
+    parser.add_argument("--save-corpus", help="Write the loaded landmarks and labels to this .npz.")
+    parser.add_argument("--search", choices=("none", "coordinate", "random", "grid"), default="none",
+                        help="'none' only evaluates the current thresholds; 'coordinate' improves one bound "
+                             "at a time, 'random' and 'grid' sample the whole space.")
+    parser.add_argument("--tune", nargs="*", help="Only tune these poses or pose.condition names.")
+    parser.add_argument("--trials", type=int, default=500, help="Random-search candidates.")
+    parser.add_argument("--steps", type=int, default=7, help="Values tried per parameter (coordinate and grid).")
+    parser.add_argument("--rounds", type=int, default=20, help="Coordinate-search rounds.")
+    parser.add_argument("--span", type=float, default=3.0, help="Search range in condition scales around each bound.")
+    parser.add_argument("--metric", choices=("macro_f1", "accuracy"), default="macro_f1", help="Objective.")
+    parser.add_argument("--workers", type=int, help="Search processes (default: all cores).")
+    parser.add_argument("--seed", type=int, default=0, help="Random-search seed.")
+    parser.add_argument("--write", help="Write the best definitions as JSON into this directory.")
+    parser.add_argument("--output", "-o", help="JSON report file (default: stdout).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    definitions_dir = args.definitions or os.path.join(os.path.dirname(__file__), "..", "poses", "definitions")
+    definitions = load_definitions(definitions_dir)
+    engine = RuleEngine(definitions)
+    classes = list(engine.labels) + [NO_POSE]
+
+    points, labels = load_corpus(args.inputs, engine, args.cache)
+    index = {label: i for i, label in enumerate(classes)}
+    unknown = sorted(set(labels) - set(index))
+    if unknown:
+        print(f"Labels not in the pose definitions: {unknown}", file=sys.stderr)
+        return 1
+    if not len(labels):
+        print("No labelled frames found.", file=sys.stderr)
+        return 1
+    if args.save_corpus:
+        np.savez_compressed(args.save_corpus, points=points, labels=np.array(labels))
+    truth = np.array([index[label] for label in labels], dtype=np.intp)
+
+    # Features are computed once; every candidate only moves the bounds
+    start = time.perf_counter()
+    features = engine.feature_set.compute(points)
+    evaluation = engine.evaluate_features(features)
+    rules_us = (time.perf_counter() - start) / len(points) * 1e6
+    baseline = confusion_matrices(truth, predicted_classes(evaluation.detected), len(classes))
+    result = {
+        "frames": len(labels),
+        "rules_us_per_frame_batched": round(rules_us, 2),
+        "current": report(baseline, classes),
+    }
+
+    if args.search != "none":
+        params = tunable_params(definitions, args.span, args.tune)
+        if not params:
+            print("Nothing to tune.", file=sys.stderr)
+            return 1
+        start = time.perf_counter()
+        try:
+            best, scored = tune(features, truth, params, definitions_dir, args.search, args.trials, args.steps,
+                                args.rounds, args.seed, args.workers, metric=args.metric)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        tuned = apply_values(definitions, params, best)
+        tuned_engine = RuleEngine(tuned)
+        confusion = confusion_matrices(
+            truth, predicted_classes(tuned_engine.evaluate_features(features).detected), len(classes))
+        result["search"] = {
+            "method": args.search,
+            "parameters": len(params),
+            "candidates": scored,
+            "seconds": round(time.perf_counter() - start, 3),
+            "metric": args.metric,
+        }
+        result["best"] = report(confusion, classes)
+        result["changes"] = [
+            {"pose": p.pose, "condition": p.condition, "bound": p.key, "old": p.value,
+             "new": round(float(v), 1 if p.kind == "angle" else 4)}
+            for p, v in zip(params, best) if not np.isclose(p.value, v)
+        ]
+        if args.write:
+            write_definitions(tuned, args.write)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from main.metrics import metrics
+from main.pipeline import analyze_frame, warmup
+from poses.landmarks import DetectorPool, Frame
+
+# What a full queue does with a new item
+DROP_LATEST_WINS = "latest"  # discard the oldest queued item
+DROP_KEEP_ALL = "keep-all"  # block the producer until there is room
+DROP_POLICIES = (DROP_LATEST_WINS, DROP_KEEP_ALL)
+
+# Sentinel telling an inference worker that capture has ended
+_STOP = object()
+
+
+class FrameQueue:
+    """A bounded queue between two stages with a configurable drop policy."""
+
+    def __init__(self, maxsize=2, drop_policy=DROP_LATEST_WINS):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {DROP_POLICIES}, got {drop_policy!r}")
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+
+    def put(self, item, stop_event=None):
+        if self.drop_policy == DROP_KEEP_ALL or item is _STOP:
+            while True:
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    if stop_event is not None and stop_event.is_set():
+                        return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=0.1):
+        return self._queue.get(timeout=timeout)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class StageStats:
+    """Rolling latency samples and throughput for one pipeline stage."""
+
+    def __init__(self, name, window=300):
+        self.name = name
+        self.count = 0
+        self._latencies = deque(maxlen=window)
+        self._timestamps = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self._latencies.append(seconds)
+            self._timestamps.append(time.perf_counter())
+        if metrics.enabled:
+            metrics.observe(f"stage_{self.name}", seconds * 1000)
+
+    def summary(self):
+        """Count, achieved FPS and p50/p95/max latency in milliseconds."""
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64) * 1000
+            timestamps = list(self._timestamps)
+        fps = 0.0
+        if len(timestamps) > 1 and timestamps[-1] > timestamps[0]:
+            fps = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+        if not len(latencies):
+            return {"count": self.count, "fps": fps}
+        return {
+            "count": self.count,
+            "fps": round(fps, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+        }
+
+
+class VideoPipeline:
+    """
+    Runs capture, inference and rendering as separate stages.
+
+    A capture thread reads frames into a bounded queue, a pool of inference
+    threads (each with its own detector pool, since MediaPipe graphs are not
+    thread-safe) classifies them into a second queue, and run() renders
+    results on the calling thread, which must own any OpenCV window.
+    Inference never touches pixels, so only rendered frames get annotated.
+
+    Args:
+        capture: Object with read() -> (ok, frame), e.g. cv2.VideoCapture.
+        render (callable): render(frame, pose_landmarks, result) -> False to
+            stop. frame is a Frame.
+        workers (int): Number of inference threads.
+        queue_size (int): Capacity of each inter-stage queue.
+        drop_policy (str): DROP_LATEST_WINS or DROP_KEEP_ALL.
+        process (callable, optional): process(frame, pool) ->
+            (pose_landmarks, result). Defaults to analyze_frame.
+        warmup_configs (list, optional): Detector configs every inference
+            thread loads before capture starts.
+
+    A frame whose processing raises is skipped, and a failed warmup leaves
+    the models to load on the first frame; both are counted in errors and
+    shown in report().
+    """
+
+    def __init__(self, capture, render, workers=1, queue_size=2,
+                 drop_policy=DROP_LATEST_WINS, process=None, warmup_configs=None):
+        self.capture = capture
+        self.render = render
+        self.workers = workers
+        self.process = process or (lambda frame, pool: analyze_frame(frame, pool=pool))
+        self.frames = FrameQueue(queue_size, drop_policy)
+        self.results = FrameQueue(queue_size, drop_policy)
+        self.stats = {
+            name: StageStats(name) for name in ("capture", "inference", "render", "end_to_end")
+        }
+        self.warmup_configs = warmup_configs
+        self._ready = threading.Semaphore(0)
+        self._stop = threading.Event()
+        self._threads = []
+        self._last_rendered = -1
+        self.errors = {}
+        self.last_error = None
+        self._errors_lock = threading.Lock()
+
+    def _capture_loop(self):
+        if self.warmup_configs:
+            for _ in range(self.workers):
+                self._ready.acquire()
+        index = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            ok, frame = self.capture.read()
+            if not ok:
+                break
+            self.stats["capture"].record(time.perf_counter() - start)
+            self.frames.put(Frame(frame, index, start), self._stop)
+            index += 1
+        for _ in range(self.workers):
+            self.frames.put(_STOP, self._stop)
+
+    def _inference_loop(self):
+        with DetectorPool() as pool:
+            if self.warmup_configs:
+                try:
+                    warmup(self.warmup_configs, pool)
+                except Exception as e:
+                    # Models then load on the first frame instead
+                    self._record_error("warmup", e)
+                finally:
+                    self._ready.release()
+            while True:
+                try:
+                    item = self.frames.get()
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                if item is _STOP:
+                    break
+                start = time.perf_counter()
+                try:
+                    pose_landmarks, result = self.process(item, pool)
+                except Exception as e:
+                    # One bad frame must not end the session: skip it
+                    self._record_error("inference", e)
+                    continue
+                self.stats["inference"].record(time.perf_counter() - start)
+                self.results.put((item, pose_landmarks, result), self._stop)
+
+    def _record_error(self, stage, error):
+        with self._errors_lock:
+            self.errors[stage] = self.errors.get(stage, 0) + 1
+            self.last_error = f"{stage}: {type(error).__name__}: {error}"
+        if metrics.enabled:
+            metrics.count("pipeline_error", stage=stage)
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._inference_loop, name=f"inference-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def run(self):
+        """Starts the stages and renders results until capture ends or render returns False."""
+        self.start()
+        inference_threads = self._threads[1:]
+        try:
+            while True:
+                try:
+                    item = self.results.get()
+                except queue.Empty:
+                    if not any(thread.is_alive() for thread in inference_threads):
+                        break
+                    continue
+                frame, pose_landmarks, result = item
+                # Workers can finish out of order; never show an older frame
+                if frame.index < self._last_rendered:
+                    continue
+                self._last_rendered = frame.index
+                start = time.perf_counter()
+                keep_going = self.render(frame, pose_landmarks, result)
+                now = time.perf_counter()
+                self.stats["render"].record(now - start)
+                self.stats["end_to_end"].record(now - frame.timestamp)
+                if keep_going is False:
+                    break
+        finally:
+            self.stop()
+        return self.report()
+
+    def report(self):
+        """Per-stage latency/FPS summary plus queue drop and error counts."""
+        report = {name: stats.summary() for name, stats in self.stats.items()}
+        report["dropped"] = {"frames": self.frames.dropped, "results": self.results.dropped}
+        if self.errors:
+            report["errors"] = {**self.errors, "last": self.last_error}
+        return report
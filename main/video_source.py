@@ -0,0 +1,225 @@
+import glob
+import os
+import queue
+import threading
+
+import cv2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# Beyond this stride, seeking (keyframe + short decode) beats grabbing every frame
+SEEK_STRIDE = 30
+
+
+class VideoSource:
+    """
+    Frame source with the cv2.VideoCapture read() interface plus frame
+    indices, timestamps and stride sampling.
+
+    Attributes:
+        fps (float): Frames per second of the underlying video.
+        frame_count (int or None): Total frames, None for live sources.
+        seekable (bool): Whether seek() is supported.
+        index (int): Index of the frame last returned by read().
+    """
+
+    seekable = False
+
+    def __init__(self, fps=30.0, frame_count=None, stride=1):
+        self.fps = fps or 30.0
+        self.frame_count = frame_count
+        self.stride = max(1, int(stride))
+        self.index = -1
+        self._next = 0
+
+    @property
+    def timestamp(self):
+        """Position of the last frame read, in seconds from the start."""
+        return self.index / self.fps
+
+    def seek(self, index):
+        raise NotImplementedError(f"{type(self).__name__} cannot seek")
+
+    def read(self):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class CaptureSource(VideoSource):
+    """
+    Video file, camera or stream URL read through cv2.VideoCapture.
+
+    Skipped frames are grabbed without being decoded into images; on
+    files with a large stride the source seeks instead.
+    """
+
+    def __init__(self, capture, stride=1, seekable=False, live=False):
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) if seekable else 0
+        # Containers that don't know their length report 0 or -1
+        super().__init__(capture.get(cv2.CAP_PROP_FPS), frame_count if frame_count > 0 else None, stride)
+        self.capture = capture
+        self.seekable = seekable
+        self.live = live
+
+    def seek(self, index):
+        if not self.seekable:
+            super().seek(index)
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+        self._next = index
+
+    def read(self):
+        if self.seekable and self.stride >= SEEK_STRIDE and self.index >= 0:
+            self.seek(self.index + self.stride)
+        elif self.index >= 0:
+            for _ in range(self.stride - 1):
+                if not self.capture.grab():
+                    return False, None
+                self._next += 1
+        ok, frame = self.capture.read()
+        if not ok:
+            return False, None
+        self.index = self._next
+        self._next += 1
+        return True, frame
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageSequenceSource(VideoSource):
+    """Numbered stills (a directory or glob) played back as video at fps."""
+
+    seekable = True
+
+    def __init__(self, paths, fps=30.0, stride=1):
+        super().__init__(fps, len(paths), stride)
+        self.paths = list(paths)
+
+    def seek(self, index):
+        self._next = index
+
+    def read(self):
+        if self.index >= 0:
+            self._next += self.stride - 1
+        if self._next >= len(self.paths):
+            return False, None
+        frame = cv2.imread(self.paths[self._next])
+        if frame is None:
+            return False, None
+        self.index = self._next
+        self._next += 1
+        return True, frame
+
+    def isOpened(self):
+        return bool(self.paths)
+
+
+def open_source(spec, stride=1, fps=None):
+    """
+    Opens a camera index, stream URL, image directory/glob or video file.
+
+    Args:
+        spec (int or str): 0, "2", "rtsp://...", "frames/*.png", "frames/" or "class.mp4".
+        stride (int): Return every stride-th frame.
+        fps (float, optional): Frame rate of image sequences, or an override
+            for sources that report none.
+
+    Returns:
+        VideoSource: The opened source.
+
+    Raises:
+        IOError: If the source cannot be opened.
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        source = CaptureSource(cv2.VideoCapture(int(spec)), stride, live=True)
+    elif "://" in spec:
+        capture = cv2.VideoCapture(spec)
+        # Keep the driver from queueing stale network frames
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        source = CaptureSource(capture, stride, live=True)
+    elif os.path.isdir(spec) or glob.has_magic(spec):
+        pattern = os.path.join(spec, "*") if os.path.isdir(spec) else spec
+        paths = sorted(p for p in glob.glob(pattern) if p.lower().endswith(IMAGE_EXTENSIONS))
+        source = ImageSequenceSource(paths, fps or 30.0, stride)
+    else:
+        source = CaptureSource(cv2.VideoCapture(spec), stride, seekable=True)
+    if not source.isOpened():
+        raise IOError(f"Could not open video source: {spec}")
+    if fps:
+        source.fps = fps
+    return source
+
+
+class DecodeAhead:
+    """
+    Reads a source on a background thread so decoding overlaps the
+    consumer's inference. Iterating yields (index, timestamp, frame) and
+    blocks rather than dropping frames when the consumer falls behind.
+    An exception raised while reading is re-raised to the consumer after
+    the frames read before it, so a broken file does not pass for a clean
+    end of stream.
+
+    Args:
+        source (VideoSource): Source to read.
+        queue_size (int): Decoded frames buffered ahead of the consumer.
+        end (int, optional): Stop before this frame index.
+    """
+
+    _END = object()
+
+    def __init__(self, source, queue_size=8, end=None):
+        self.source = source
+        self.end = end
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="decode-ahead", daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                ok, frame = self.source.read()
+                if not ok or (self.end is not None and self.source.index >= self.end):
+                    break
+                self._put((self.source.index, self.source.timestamp, frame))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(self._END)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
@@ -0,0 +1,128 @@
+import cv2
+import numpy as np
+
+from poses.geometry import BODY_LANDMARKS, NUM_LANDMARKS, landmarks_to_array
+from poses.landmarks import DetectorConfig, Frame, extract_landmarks
+
+
+def pose_confidence(points):
+    """Mean visibility of the body landmarks; 0.0 when there is no pose."""
+    if points is None:
+        return 0.0
+    return float(np.mean(points[list(BODY_LANDMARKS), 3]))
+
+
+class LandmarkBackend:
+    """
+    Interface of a landmark model: one BGR image in, one (33, 4) float32
+    array of (x, y, z, visibility) out, or None when nobody is found.
+    Coordinates are normalized to the image like MediaPipe's.
+    """
+
+    name = "backend"
+
+    def detect(self, image, pool=None):
+        """
+        Args:
+            image (Frame or numpy.ndarray): Frame, or a BGR image.
+            pool (DetectorPool, optional): Per-thread detector pool, for
+                backends that keep one.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name})"
+
+
+class MediaPipeBackend(LandmarkBackend):
+    """
+    MediaPipe Pose at one model complexity, built through a DetectorPool.
+
+    Args:
+        complexity (int): 0 (lite), 1 (full) or 2 (heavy).
+        static_image_mode (bool): Detect on every frame instead of tracking.
+        min_detection_confidence (float): Person detector threshold.
+    """
+
+    NAMES = ("lite", "full", "heavy")
+
+    def __init__(self, complexity=1, static_image_mode=False, min_detection_confidence=0.5):
+        self.name = self.NAMES[complexity]
+        self.config = DetectorConfig(complexity, static_image_mode, min_detection_confidence)
+
+    def detect(self, image, pool=None):
+        pose_landmarks = extract_landmarks(image, self.config, pool)
+        return None if pose_landmarks is None else landmarks_to_array(pose_landmarks)
+
+
+class OnnxBackend(LandmarkBackend):
+    """
+    ONNX Runtime CPU stand-in for a BlazePose-style landmark model.
+
+    The model takes one (1, size, size, 3) float32 RGB image in [0, 1];
+    its first output starts with 33 rows of values_per_landmark values, of
+    which the first four are x and y in input pixels, z, and a visibility
+    logit. It runs on the whole frame, without MediaPipe's person
+    detector, so it suits crops or single-person views.
+
+    Args:
+        model_path (str): .onnx file.
+        input_size (int): Square input side the model was exported with.
+        values_per_landmark (int): Row width of the output; 5 for BlazePose
+            (the fifth value, presence, is ignored).
+        min_visibility (float): Mean body visibility below which the
+            result counts as "no pose".
+        providers (tuple): ONNX Runtime execution providers.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path, input_size=256, values_per_landmark=5, min_visibility=0.5,
+                 providers=("CPUExecutionProvider",)):
+        # Optional dependency, only needed for this backend
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(model_path, providers=list(providers))
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_size = input_size
+        self.values_per_landmark = values_per_landmark
+        self.min_visibility = min_visibility
+
+    def detect(self, image, pool=None):
+        rgb = image.rgb if isinstance(image, Frame) else cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        blob = cv2.resize(rgb, (self.input_size, self.input_size), interpolation=cv2.INTER_AREA)
+        blob = blob[np.newaxis].astype(np.float32) / 255.0
+        output = self.session.run(None, {self.input_name: blob})[0]
+        width = self.values_per_landmark
+        raw = np.asarray(output, dtype=np.float32).reshape(-1)[:NUM_LANDMARKS * width].reshape(NUM_LANDMARKS, width)
+        points = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+        points[:, :3] = raw[:, :3] / np.float32(self.input_size)
+        points[:, 3] = 1.0 / (1.0 + np.exp(-raw[:, 3]))
+        return points if pose_confidence(points) >= self.min_visibility else None
+
+
+# name -> factory(**options); "lite", "full" and "heavy" take MediaPipeBackend's options
+BACKENDS = {
+    "lite": lambda **options: MediaPipeBackend(0, **options),
+    "full": lambda **options: MediaPipeBackend(1, **options),
+    "heavy": lambda **options: MediaPipeBackend(2, **options),
+    "onnx": lambda **options: OnnxBackend(**options),
+}
+
+
+def create_backend(name, **options):
+    """Builds a backend by name; see BACKENDS."""
+    try:
+        factory = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown landmark backend {name!r}; expected one of {sorted(BACKENDS)}") from None
+    return factory(**options)
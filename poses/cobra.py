@@ -1,90 +1,52 @@
-import cv2
-import mediapipe as mp
-import math
+import numpy as np
 
-# Initialize MediaPipe pose detection
-mp_pose = mp.solutions.pose
-pose_detector = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-mp_drawing = mp.solutions.drawing_utils
+from poses.geometry import PoseLandmark as L, compute_features
 
-def calculate_angle(a, b, c):
-    """
-    Calculates the angle between three points (a, b, c).
-    """
-    angle = math.degrees(math.atan2(c.y - b.y, c.x - b.x) - math.atan2(a.y - b.y, a.x - b.x))
-    return abs(angle)
-
-def is_cobra_pose(image):
+def is_cobra_pose(points, features=None):
     """
     Detects if the given pose is a Cobra Pose based on specific measurements.
     Also checks if feet, knees, and palms are on the floor.
-    """
-    # Convert image to RGB
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    results = pose_detector.process(image_rgb)
-
-    if not results.pose_landmarks:
-        return image, "No Pose Detected"
 
-    # Draw landmarks on the image
-    mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+    Args:
+        points (numpy.ndarray): (33, 4) landmarks or an (N, 33, 4) stack.
+        features (dict, optional): compute_features(points), if already computed.
 
-    # Extract key landmarks
-    left_shoulder = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_SHOULDER]
-    right_shoulder = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-    left_hip = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_HIP]
-    right_hip = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_HIP]
-    left_elbow = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_ELBOW]
-    right_elbow = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_ELBOW]
-    left_wrist = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_WRIST]
-    right_wrist = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_WRIST]
-    left_knee = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_KNEE]
-    right_knee = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_KNEE]
-    left_ankle = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_ANKLE]
-    right_ankle = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_ANKLE]
-    right_ear=results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_EAR]
-    right_pinky = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_PINKY]
+    Returns:
+        numpy.ndarray: True where the pose is detected, one value per frame.
+    """
+    f = compute_features(points) if features is None else features
+    x = points[..., 0]
+    y = points[..., 1]
 
     # Calculate shoulder-hip distances
-    left_shoulder_hip_distance = abs(left_shoulder.y - left_hip.y)
-    right_shoulder_hip_distance = abs(right_shoulder.y - right_hip.y)
+    left_shoulder_hip_distance = np.abs(y[..., L.LEFT_SHOULDER] - y[..., L.LEFT_HIP])
+    right_shoulder_hip_distance = np.abs(y[..., L.RIGHT_SHOULDER] - y[..., L.RIGHT_HIP])
 
     # Check if elbows are bent
-    left_elbow_bent = abs(left_elbow.y - left_wrist.y) < abs(left_shoulder.y - left_elbow.y)
-    right_elbow_bent = abs(right_elbow.y - right_wrist.y) < abs(right_shoulder.y - right_elbow.y)
+    left_elbow_bent = np.abs(y[..., L.LEFT_ELBOW] - y[..., L.LEFT_WRIST]) < np.abs(y[..., L.LEFT_SHOULDER] - y[..., L.LEFT_ELBOW])
+    right_elbow_bent = np.abs(y[..., L.RIGHT_ELBOW] - y[..., L.RIGHT_WRIST]) < np.abs(y[..., L.RIGHT_SHOULDER] - y[..., L.RIGHT_ELBOW])
 
     # Check if hips are grounded
-    hips_grounded = left_hip.y > left_shoulder.y and right_hip.y > right_shoulder.y
+    hips_grounded = (y[..., L.LEFT_HIP] > y[..., L.LEFT_SHOULDER]) & (y[..., L.RIGHT_HIP] > y[..., L.RIGHT_SHOULDER])
 
-    # Check if feet are on the floor
-    feet_on_floor = (
-        abs(left_ankle.y - right_ankle.y) < 0.05  # Feet should be roughly aligned
-    )
-
-    # Check if knees are on the floor
-    knees_on_floor = (
-        abs(left_knee.y - right_knee.y) < 0.03  # Knees should be roughly aligned
-    )
-
-    # Check if palms are on the floor
+    # Feet, knees and wrists should be roughly aligned
+    feet_on_floor = f["ankle_y_gap"] < 0.05
+    knees_on_floor = f["knee_y_gap"] < 0.03
     palms_on_floor = (
-        abs(left_wrist.y - right_wrist.y) < 0.05  # Wrists should be roughly aligned
-        and left_wrist.y > left_elbow.y  # Ensure wrists are below elbows
-        and right_wrist.y > right_elbow.y
+        (f["wrist_y_gap"] < 0.05)
+        & (y[..., L.LEFT_WRIST] > y[..., L.LEFT_ELBOW])  # Ensure wrists are below elbows
+        & (y[..., L.RIGHT_WRIST] > y[..., L.RIGHT_ELBOW])
     )
-    shoulder_hip_knee=calculate_angle(left_shoulder,left_hip,left_knee)
+    shoulder_hip_knee = f["left_hip_angle"]
 
-    head_align=abs(right_ear.x - right_pinky.x)
+    head_align = np.abs(x[..., L.RIGHT_EAR] - x[..., L.RIGHT_PINKY])
 
     # Determine if the Cobra Pose criteria are met
-    if (
-        left_shoulder_hip_distance < 0.2 and right_shoulder_hip_distance < 0.3  # Adjusted thresholds
-        and left_elbow_bent and right_elbow_bent
-        and hips_grounded
-        and feet_on_floor  and palms_on_floor
-        and shoulder_hip_knee<230 and knees_on_floor
-        and head_align < 0.1
-    ):
-        return image, "Cobra Pose Detected"
-
-    return image, "No Pose Detected"
+    return (
+        (left_shoulder_hip_distance < 0.2) & (right_shoulder_hip_distance < 0.3)  # Adjusted thresholds
+        & left_elbow_bent & right_elbow_bent
+        & hips_grounded
+        & feet_on_floor & palms_on_floor
+        & (shoulder_hip_knee < 230) & knees_on_floor
+        & (head_align < 0.1)
+    )
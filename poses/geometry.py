@@ -0,0 +1,349 @@
+from enum import IntEnum
+
+import numpy as np
+
+# Number of landmarks in a MediaPipe pose and values stored per landmark
+NUM_LANDMARKS = 33
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+AXES = {"x": 0, "y": 1, "z": 2}
+
+
+class PoseLandmark(IntEnum):
+    """Landmark indices, in the same order as mediapipe's PoseLandmark."""
+
+    NOSE = 0
+    LEFT_EYE_INNER = 1
+    LEFT_EYE = 2
+    LEFT_EYE_OUTER = 3
+    RIGHT_EYE_INNER = 4
+    RIGHT_EYE = 5
+    RIGHT_EYE_OUTER = 6
+    LEFT_EAR = 7
+    RIGHT_EAR = 8
+    MOUTH_LEFT = 9
+    MOUTH_RIGHT = 10
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_ELBOW = 13
+    RIGHT_ELBOW = 14
+    LEFT_WRIST = 15
+    RIGHT_WRIST = 16
+    LEFT_PINKY = 17
+    RIGHT_PINKY = 18
+    LEFT_INDEX = 19
+    RIGHT_INDEX = 20
+    LEFT_THUMB = 21
+    RIGHT_THUMB = 22
+    LEFT_HIP = 23
+    RIGHT_HIP = 24
+    LEFT_KNEE = 25
+    RIGHT_KNEE = 26
+    LEFT_ANKLE = 27
+    RIGHT_ANKLE = 28
+    LEFT_HEEL = 29
+    RIGHT_HEEL = 30
+    LEFT_FOOT_INDEX = 31
+    RIGHT_FOOT_INDEX = 32
+
+
+def landmarks_to_array(pose_landmarks):
+    """
+    Converts MediaPipe landmarks into a (33, 4) float32 array.
+
+    Args:
+        pose_landmarks: NormalizedLandmarkList or a sequence of landmarks.
+
+    Returns:
+        numpy.ndarray: Rows of (x, y, z, visibility), one per landmark.
+    """
+    landmarks = getattr(pose_landmarks, "landmark", pose_landmarks)
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks], dtype=np.float32
+    )
+
+
+def _index(name):
+    return PoseLandmark[name] if isinstance(name, str) else PoseLandmark(name)
+
+
+def calculate_angles(points, triplets, normalize=False):
+    """
+    Angles in degrees at the middle landmark of each (a, b, c) triplet.
+
+    Matches the scalar calculate_angle in poses/*: the absolute difference of
+    the two atan2 headings, in [0, 360). With normalize the result is folded
+    into [0, 180] like the triangle pose variant.
+
+    Args:
+        points (numpy.ndarray): (..., 33, 4) landmark array or stack of arrays.
+        triplets: (K, 3) landmark indices.
+        normalize (bool or sequence of bool): Fold per triplet into [0, 180].
+
+    Returns:
+        numpy.ndarray: (..., K) angles.
+    """
+    triplets = np.asarray(triplets, dtype=np.intp).reshape(-1, 3)
+    a = points[..., triplets[:, 0], :2]
+    b = points[..., triplets[:, 1], :2]
+    c = points[..., triplets[:, 2], :2]
+    ba = a - b
+    bc = c - b
+    angles = np.abs(np.degrees(
+        np.arctan2(bc[..., 1], bc[..., 0]) - np.arctan2(ba[..., 1], ba[..., 0])
+    ))
+    normalize = np.broadcast_to(np.asarray(normalize, dtype=bool), angles.shape[-1:])
+    return np.where(normalize & (angles > 180), 360 - angles, angles)
+
+
+def calculate_distances(points, pairs):
+    """(..., K) image-plane distances between each (a, b) pair of landmarks."""
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    diff = points[..., pairs[:, 0], :2] - points[..., pairs[:, 1], :2]
+    return np.sqrt(np.sum(diff * diff, axis=-1))
+
+
+def calculate_deltas(points, pairs, axes):
+    """(..., K) signed coordinate differences a.axis - b.axis for each pair."""
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    axes = np.asarray(axes, dtype=np.intp)
+    return points[..., pairs[:, 0], axes] - points[..., pairs[:, 1], axes]
+
+
+# Coarse body orientations, indexed by the codes body_orientation returns
+ORIENTATIONS = ("upright", "horizontal", "inverted")
+
+
+def body_orientation(points, threshold=45.0):
+    """
+    Coarse orientation of the torso from the shoulder and hip midpoints.
+
+    The torso is "upright" when it points down from the shoulders to the
+    hips within threshold degrees of vertical, "inverted" when hips are
+    above shoulders by the same margin, and "horizontal" otherwise.
+
+    Args:
+        points (numpy.ndarray): (33, 4) landmarks or an (N, 33, 4) stack.
+
+    Returns:
+        numpy.ndarray: Index into ORIENTATIONS, one per frame.
+    """
+    shoulders = (points[..., PoseLandmark.LEFT_SHOULDER, :2] + points[..., PoseLandmark.RIGHT_SHOULDER, :2]) / 2
+    hips = (points[..., PoseLandmark.LEFT_HIP, :2] + points[..., PoseLandmark.RIGHT_HIP, :2]) / 2
+    torso = hips - shoulders
+    # +90 with hips straight below the shoulders, -90 straight above
+    elevation = np.degrees(np.arctan2(torso[..., 1], np.abs(torso[..., 0])))
+    return np.where(elevation > threshold, 0, np.where(elevation < -threshold, 2, 1))
+
+
+# Landmarks that describe a pose; the face, hands and feet add mostly noise
+BODY_LANDMARKS = tuple(
+    PoseLandmark[f"{side}_{part}"]
+    for part in ("SHOULDER", "ELBOW", "WRIST", "HIP", "KNEE", "ANKLE")
+    for side in ("LEFT", "RIGHT")
+)
+
+# Index permutation that swaps every LEFT_* landmark with its RIGHT_* twin
+MIRROR_INDEX = tuple(
+    PoseLandmark[name.replace("LEFT", "RIGHT") if "LEFT" in name else name.replace("RIGHT", "LEFT")]
+    for name in PoseLandmark.__members__
+)
+
+
+def normalize_pose(points, indices=BODY_LANDMARKS, mirror=False):
+    """
+    Translation- and scale-free (x, y) coordinates of a pose.
+
+    Landmarks are centred on the hip midpoint and divided by the torso
+    length (shoulder midpoint to hip midpoint), so poses of people of any
+    size anywhere in the frame compare directly.
+
+    Args:
+        points (numpy.ndarray): (33, 4) landmarks or an (N, 33, 4) stack.
+        indices: Landmarks to keep.
+        mirror (bool): Flip left and right first.
+
+    Returns:
+        numpy.ndarray: (..., len(indices), 2) normalized coordinates.
+    """
+    if mirror:
+        points = points[..., list(MIRROR_INDEX), :] * np.array([-1, 1, 1, 1], dtype=points.dtype)
+    xy = points[..., :2]
+    hips = (xy[..., PoseLandmark.LEFT_HIP, :] + xy[..., PoseLandmark.RIGHT_HIP, :]) / 2
+    shoulders = (xy[..., PoseLandmark.LEFT_SHOULDER, :] + xy[..., PoseLandmark.RIGHT_SHOULDER, :]) / 2
+    torso = np.linalg.norm(shoulders - hips, axis=-1)[..., None, None]
+    return (xy[..., list(indices), :] - hips[..., None, :]) / np.maximum(torso, 1e-6)
+
+
+# Features built from other features; each takes the operand arrays.
+# A ratio over a zero denominator (e.g. coincident hips) is undefined: NaN,
+# which fails every bound, rather than an infinity that passes a "min"
+_COMBINATORS = {
+    "ratio": lambda a, b: np.where(b != 0, a / b, np.nan),
+    "sub": lambda a, b: a - b,
+    "abs": np.abs,
+    "min": np.minimum,
+    "max": np.maximum,
+}
+COMBINATOR_KINDS = tuple(_COMBINATORS)
+
+
+def feature_kind(name, specs):
+    """
+    Unit kind of a feature: "angle", "distance", "delta" or "ratio".
+
+    Combinators other than ratio (sub, abs, min, max) take the kind of
+    their operands, so the min of two folded knee angles is an angle. A
+    ratio is a ratio whatever it divides.
+
+    Args:
+        name (str): Feature name.
+        specs (dict): Feature specs by name, e.g. REFERENCE_FEATURES plus
+            a definition's own features.
+
+    Returns:
+        str or None: The kind, or None when operands mix kinds.
+    """
+    spec = specs[name]
+    if "angle" in spec:
+        return "angle"
+    if "distance" in spec:
+        return "distance"
+    if "delta" in spec or "abs_delta" in spec:
+        return "delta"
+    if "ratio" in spec:
+        return "ratio"
+    kind = next(k for k in _COMBINATORS if k in spec)
+    operands = spec[kind] if isinstance(spec[kind], list) else [spec[kind]]
+    kinds = {feature_kind(operand, specs) for operand in operands}
+    return kinds.pop() if len(kinds) == 1 else None
+
+
+class FeatureSet:
+    """
+    A compiled set of named landmark features evaluated in one batched pass.
+
+    Feature specs are plain dicts, one key naming the kind:
+
+        {"angle": ["LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"], "normalize": false}
+        {"distance": ["LEFT_WRIST", "RIGHT_WRIST"]}
+        {"delta": ["LEFT_HIP", "LEFT_KNEE"], "axis": "y"}
+        {"abs_delta": ["LEFT_SHOULDER", "RIGHT_SHOULDER"], "axis": "y"}
+        {"ratio": ["feet_distance", "hip_distance"]}   (also sub, abs, min, max)
+
+    All angles are computed with one kernel call, likewise distances and
+    deltas; combinators run afterwards on the resulting columns.
+    """
+
+    def __init__(self, specs):
+        self.specs = dict(specs)
+        self.names = list(specs)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        angles, distances, deltas, combined = [], [], [], []
+        for name, spec in specs.items():
+            column = self.index[name]
+            if "angle" in spec:
+                angles.append((column, [_index(n) for n in spec["angle"]], spec.get("normalize", False)))
+            elif "distance" in spec:
+                distances.append((column, [_index(n) for n in spec["distance"]]))
+            elif "delta" in spec or "abs_delta" in spec:
+                key = "delta" if "delta" in spec else "abs_delta"
+                deltas.append((column, [_index(n) for n in spec[key]], AXES[spec.get("axis", "y")], key == "abs_delta"))
+            else:
+                kind = next((k for k in _COMBINATORS if k in spec), None)
+                if kind is None:
+                    raise ValueError(f"Unknown feature kind for {name!r}: {spec}")
+                operands = spec[kind] if isinstance(spec[kind], list) else [spec[kind]]
+                for operand in operands:
+                    if operand not in self.index:
+                        raise ValueError(f"Feature {name!r} refers to unknown feature {operand!r}")
+                combined.append((column, kind, [self.index[op] for op in operands]))
+
+        self._angle_cols = np.array([a[0] for a in angles], dtype=np.intp)
+        self._angle_triplets = np.array([a[1] for a in angles], dtype=np.intp).reshape(-1, 3)
+        self._angle_normalize = np.array([a[2] for a in angles], dtype=bool)
+        self._distance_cols = np.array([d[0] for d in distances], dtype=np.intp)
+        self._distance_pairs = np.array([d[1] for d in distances], dtype=np.intp).reshape(-1, 2)
+        self._delta_cols = np.array([d[0] for d in deltas], dtype=np.intp)
+        self._delta_pairs = np.array([d[1] for d in deltas], dtype=np.intp).reshape(-1, 2)
+        self._delta_axes = np.array([d[2] for d in deltas], dtype=np.intp)
+        self._delta_abs = np.array([d[3] for d in deltas], dtype=bool)
+        self._combined = self._order_combinators(combined)
+
+    @staticmethod
+    def _order_combinators(combined):
+        # Combinators may refer to each other; evaluate dependencies first
+        pending = {column: (kind, operands) for column, kind, operands in combined}
+        ordered = []
+        while pending:
+            ready = [c for c, (_, ops) in pending.items() if not any(op in pending for op in ops)]
+            if not ready:
+                raise ValueError("Feature definitions contain a cycle")
+            for column in ready:
+                ordered.append((column,) + pending.pop(column))
+        return ordered
+
+    def compute(self, points):
+        """
+        Evaluates every feature.
+
+        Args:
+            points (numpy.ndarray): (33, 4) landmarks or an (N, 33, 4) stack.
+
+        Returns:
+            numpy.ndarray: (..., F) feature values, columns ordered as names.
+        """
+        points = np.asarray(points, dtype=np.float32)
+        values = np.empty(points.shape[:-2] + (len(self.names),), dtype=np.float32)
+        if len(self._angle_cols):
+            values[..., self._angle_cols] = calculate_angles(
+                points, self._angle_triplets, self._angle_normalize
+            )
+        if len(self._distance_cols):
+            values[..., self._distance_cols] = calculate_distances(points, self._distance_pairs)
+        if len(self._delta_cols):
+            deltas = calculate_deltas(points, self._delta_pairs, self._delta_axes)
+            values[..., self._delta_cols] = np.where(self._delta_abs, np.abs(deltas), deltas)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for column, kind, operands in self._combined:
+                values[..., column] = _COMBINATORS[kind](*(values[..., op] for op in operands))
+        return values
+
+    def as_dict(self, values):
+        """Splits a compute() result into {name: (...,) array}."""
+        return {name: values[..., i] for i, name in enumerate(self.names)}
+
+
+# Every angle, distance and alignment measure used by the pose classifiers
+REFERENCE_FEATURES = {
+    "left_knee_angle": {"angle": ["LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"]},
+    "right_knee_angle": {"angle": ["RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE"]},
+    "left_elbow_angle": {"angle": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"]},
+    "right_elbow_angle": {"angle": ["RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST"]},
+    "left_hip_angle": {"angle": ["LEFT_KNEE", "LEFT_HIP", "LEFT_SHOULDER"]},
+    "left_shoulder_arm_angle": {"angle": ["LEFT_ELBOW", "LEFT_SHOULDER", "LEFT_WRIST"]},
+    "left_knee_angle_folded": {"angle": ["LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"], "normalize": True},
+    "right_knee_angle_folded": {"angle": ["RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE"], "normalize": True},
+    "torso_angle": {"angle": ["NOSE", "RIGHT_HIP", "LEFT_HIP"], "normalize": True},
+    "arm_line_angle": {"angle": ["LEFT_WRIST", "LEFT_SHOULDER", "RIGHT_SHOULDER"], "normalize": True},
+    "wrist_distance": {"distance": ["LEFT_WRIST", "RIGHT_WRIST"]},
+    "feet_distance": {"distance": ["LEFT_ANKLE", "RIGHT_ANKLE"]},
+    "hip_distance": {"distance": ["LEFT_HIP", "RIGHT_HIP"]},
+    "shoulder_distance": {"distance": ["LEFT_SHOULDER", "RIGHT_SHOULDER"]},
+    "feet_hip_ratio": {"ratio": ["feet_distance", "hip_distance"]},
+    "shoulder_tilt": {"abs_delta": ["LEFT_SHOULDER", "RIGHT_SHOULDER"], "axis": "y"},
+    "shoulder_x_gap": {"abs_delta": ["LEFT_SHOULDER", "RIGHT_SHOULDER"], "axis": "x"},
+    "hip_x_gap": {"abs_delta": ["LEFT_HIP", "RIGHT_HIP"], "axis": "x"},
+    "ankle_x_gap": {"abs_delta": ["LEFT_ANKLE", "RIGHT_ANKLE"], "axis": "x"},
+    "ankle_y_gap": {"abs_delta": ["LEFT_ANKLE", "RIGHT_ANKLE"], "axis": "y"},
+    "knee_y_gap": {"abs_delta": ["LEFT_KNEE", "RIGHT_KNEE"], "axis": "y"},
+    "wrist_y_gap": {"abs_delta": ["LEFT_WRIST", "RIGHT_WRIST"], "axis": "y"},
+    "heel_y_gap": {"abs_delta": ["LEFT_HEEL", "RIGHT_HEEL"], "axis": "y"},
+}
+
+reference_feature_set = FeatureSet(REFERENCE_FEATURES)
+
+
+def compute_features(points):
+    """Evaluates REFERENCE_FEATURES for (33, 4) or (N, 33, 4) landmarks as a dict."""
+    return reference_feature_set.as_dict(reference_feature_set.compute(points))
@@ -0,0 +1,152 @@
+import threading
+from collections import namedtuple
+
+import cv2
+
+# mediapipe takes seconds to import; it is loaded on first use
+_solutions = None
+
+
+def _mediapipe():
+    global _solutions
+    if _solutions is None:
+        import mediapipe as mp
+        _solutions = mp.solutions
+    return _solutions
+
+
+def __getattr__(name):
+    # Keeps mp_pose / mp_drawing importable without loading mediapipe eagerly
+    if name == "mp_pose":
+        return _mediapipe().pose
+    if name == "mp_drawing":
+        return _mediapipe().drawing_utils
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Everything that changes which MediaPipe graph gets built
+DetectorConfig = namedtuple(
+    "DetectorConfig",
+    ["model_complexity", "static_image_mode", "min_detection_confidence", "min_tracking_confidence"],
+    defaults=[1, False, 0.5, 0.5],
+)
+
+# Tracking-enabled detector for video streams
+VIDEO_CONFIG = DetectorConfig()
+# Per-image detection for unrelated still photos
+IMAGE_CONFIG = DetectorConfig(static_image_mode=True)
+
+
+class DetectorPool:
+    """
+    Lazily builds MediaPipe pose detectors and shares them by configuration.
+
+    Nothing is loaded until the first get() for a configuration. Use close()
+    or a with-block to release the graphs.
+    """
+
+    def __init__(self):
+        self._detectors = {}
+        self._lock = threading.Lock()
+
+    def get(self, config=VIDEO_CONFIG):
+        """Returns the detector for config, building it on first use."""
+        config = DetectorConfig(*config)
+        detector = self._detectors.get(config)
+        if detector is None:
+            with self._lock:
+                detector = self._detectors.get(config)
+                if detector is None:
+                    detector = _mediapipe().pose.Pose(**config._asdict())
+                    self._detectors[config] = detector
+        return detector
+
+    def preload(self, configs):
+        """Builds the detectors for configs up front, e.g. in a worker initializer."""
+        for config in configs:
+            self.get(config)
+
+    def loaded_configs(self):
+        return list(self._detectors)
+
+    def close(self):
+        with self._lock:
+            detectors = list(self._detectors.values())
+            self._detectors.clear()
+        for detector in detectors:
+            detector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Process-wide pool used when callers don't supply their own
+default_pool = DetectorPool()
+
+
+class Frame:
+    """
+    A BGR image plus a lazily computed, cached RGB view.
+
+    Wrapping a frame lets every consumer share one colour conversion, and
+    annotation writes into bgr in place rather than into copies.
+    """
+
+    __slots__ = ("bgr", "index", "timestamp", "_rgb")
+
+    def __init__(self, bgr, index=0, timestamp=None):
+        self.bgr = bgr
+        self.index = index
+        self.timestamp = timestamp
+        self._rgb = None
+
+    @property
+    def rgb(self):
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+            # Read-only lets MediaPipe take the buffer by reference
+            self._rgb.flags.writeable = False
+        return self._rgb
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+
+def extract_landmarks(image, config=VIDEO_CONFIG, pool=None):
+    """
+    Runs pose inference once on a BGR image.
+
+    Args:
+        image (Frame or numpy.ndarray): Frame, or a BGR image or video frame.
+        config (DetectorConfig): Detector settings to use.
+        pool (DetectorPool, optional): Pool to take the detector from.
+            Defaults to default_pool.
+
+    Returns:
+        NormalizedLandmarkList or None: Detected pose landmarks, or None if no
+        person was found.
+    """
+    detector = (pool or default_pool).get(config)
+    image_rgb = image.rgb if isinstance(image, Frame) else cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    results = detector.process(image_rgb)
+    return results.pose_landmarks
+
+
+def array_to_landmarks(points):
+    """Rebuilds a NormalizedLandmarkList from a (33, 4) array, e.g. for drawing cached landmarks."""
+    from mediapipe.framework.formats import landmark_pb2
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in points.tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+
+def draw_landmarks(image, pose_landmarks):
+    """Draws the pose skeleton onto the image in place."""
+    solutions = _mediapipe()
+    solutions.drawing_utils.draw_landmarks(image, pose_landmarks, solutions.pose.POSE_CONNECTIONS)
+    return image
@@ -0,0 +1,277 @@
+import json
+
+import numpy as np
+
+from poses.geometry import REFERENCE_FEATURES, FeatureSet
+from poses.rules import NO_POSE, PoseResult
+
+
+def _softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+class TreeEnsemble:
+    """
+    Gradient-boosted multi-output decision trees stored as flat arrays.
+
+    Every tree is complete with depth levels: internal node i has children
+    2i+1 and 2i+2, so a tree is one feature index and one threshold per
+    internal node plus a row of class logits per leaf. A node that stopped
+    splitting early has an infinite threshold and sends everything left.
+    Prediction compares every node of every tree in one gather, walks the
+    resulting booleans depth steps down, and sums the reached leaves.
+
+    Args:
+        feature (numpy.ndarray): (T, 2**depth - 1) feature index per node.
+        threshold (numpy.ndarray): (T, 2**depth - 1); x > threshold goes right.
+        leaf (numpy.ndarray): (T, 2**depth, C) leaf values before shrinkage.
+        base (numpy.ndarray): (C,) starting logits (log class priors).
+        learning_rate (float): Scale applied to every tree.
+    """
+
+    def __init__(self, feature, threshold, leaf, base, learning_rate):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.leaf = np.asarray(leaf, dtype=np.float32)
+        self.base = np.asarray(base, dtype=np.float32)
+        self.learning_rate = learning_rate
+        trees, internal = self.feature.shape
+        self.depth = int(np.log2(internal + 1))
+        # Flat views: node j of tree t is entry t * internal + j
+        self._feature = self.feature.ravel()
+        self._threshold = self.threshold.ravel()
+        self._node_offset = np.arange(trees) * internal
+        self._leaf_offset = np.arange(trees) * (internal + 1) - internal
+        self._leaf = self.leaf.reshape(-1, self.leaf.shape[-1]) * np.float32(learning_rate)
+
+    def __len__(self):
+        return len(self.feature)
+
+    def decision_function(self, x):
+        """
+        Args:
+            x (numpy.ndarray): (F,) features or an (N, F) stack.
+
+        Returns:
+            numpy.ndarray: (..., C) class logits.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        right = (x[..., self._feature] > self._threshold).view(np.int8)
+        if x.ndim == 1:
+            node = np.zeros(len(self), dtype=np.intp)
+            for _ in range(self.depth):
+                node = 2 * node + 1 + right[self._node_offset + node]
+            return self.base + self._leaf[self._leaf_offset + node].sum(axis=0)
+        rows = np.arange(len(x))[:, np.newaxis]
+        node = np.zeros((len(x), len(self)), dtype=np.intp)
+        for _ in range(self.depth):
+            node = 2 * node + 1 + right[rows, self._node_offset + node]
+        return self.base + self._leaf[self._leaf_offset + node].sum(axis=1)
+
+    def predict_proba(self, x):
+        return _softmax(self.decision_function(x))
+
+
+def _bin_edges(x, bins):
+    # Up to bins - 1 quantile cut points per feature, from finite values only
+    edges = []
+    for column in x.T:
+        finite = column[np.isfinite(column)]
+        cuts = np.quantile(finite, np.linspace(0, 1, bins + 1)[1:-1]) if len(finite) else []
+        edges.append(np.unique(np.asarray(cuts, dtype=np.float32)))
+    return edges
+
+
+def _best_split(binned, grad, hess, edges, bins, min_leaf, l2):
+    # Histogram of gradient sums per (class, feature, bin), then every cut at once
+    n, features = binned.shape
+    flat = (binned + np.arange(features) * bins).ravel()
+    size = features * bins
+    counts = np.bincount(flat, minlength=size).reshape(features, bins)
+    g = np.stack([np.bincount(flat, np.repeat(grad[:, c], features), size) for c in range(grad.shape[1])])
+    h = np.stack([np.bincount(flat, np.repeat(hess[:, c], features), size) for c in range(hess.shape[1])])
+    g = g.reshape(-1, features, bins)
+    h = h.reshape(-1, features, bins)
+
+    # Left of cut b holds bins 0..b
+    g_left = np.cumsum(g, axis=2)[..., :-1]
+    h_left = np.cumsum(h, axis=2)[..., :-1]
+    n_left = np.cumsum(counts, axis=1)[:, :-1]
+    g_total = g.sum(axis=2, keepdims=True)
+    h_total = h.sum(axis=2, keepdims=True)
+    gain = (
+        g_left ** 2 / (h_left + l2)
+        + (g_total - g_left) ** 2 / (h_total - h_left + l2)
+        - g_total ** 2 / (h_total + l2)
+    ).sum(axis=0)
+    has_edge = np.arange(bins - 1)[np.newaxis] < np.array([len(e) for e in edges])[:, np.newaxis]
+    gain[~has_edge | (n_left < min_leaf) | (n - n_left < min_leaf)] = -np.inf
+    feature, cut = np.unravel_index(np.argmax(gain), gain.shape)
+    if not gain[feature, cut] > 1e-6:
+        return None
+    return feature, cut
+
+
+def fit_boosted_trees(x, y, n_classes, rounds=40, depth=3, learning_rate=0.3, bins=32, min_leaf=5, l2=1.0):
+    """
+    Fits a softmax TreeEnsemble by gradient boosting with histogram splits.
+
+    Args:
+        x (numpy.ndarray): (N, F) features; NaN goes left at every split.
+        y (numpy.ndarray): (N,) class indices.
+        n_classes (int): Number of classes.
+        rounds (int): Trees to grow.
+        depth (int): Levels per tree.
+        learning_rate (float): Shrinkage applied to every tree.
+        bins (int): Quantile bins per feature.
+        min_leaf (int): Fewest frames on either side of a split.
+        l2 (float): Leaf regularization.
+
+    Returns:
+        TreeEnsemble
+    """
+    x = np.nan_to_num(np.asarray(x, dtype=np.float32), nan=-np.inf, posinf=np.inf, neginf=-np.inf)
+    y = np.asarray(y, dtype=np.intp)
+    edges = _bin_edges(x, bins)
+    binned = np.stack([np.searchsorted(e, column, side="left") for e, column in zip(edges, x.T)], axis=1)
+
+    onehot = np.eye(n_classes, dtype=np.float32)[y]
+    prior = (onehot.sum(axis=0) + 1) / (len(y) + n_classes)
+    base = np.log(prior).astype(np.float32)
+    logits = np.tile(base, (len(y), 1))
+
+    internal = 2 ** depth - 1
+    features = np.zeros((rounds, internal), dtype=np.intp)
+    thresholds = np.full((rounds, internal), np.inf, dtype=np.float32)
+    leaves = np.zeros((rounds, 2 ** depth, n_classes), dtype=np.float32)
+    for t in range(rounds):
+        p = _softmax(logits)
+        grad = p - onehot
+        hess = np.maximum(p * (1 - p), 1e-6)
+        node = np.zeros(len(y), dtype=np.intp)
+        for level in range(depth):
+            right = np.zeros(len(y), dtype=bool)
+            for i in range(2 ** level - 1, 2 ** (level + 1) - 1):
+                members = np.flatnonzero(node == i)
+                if len(members) < 2 * min_leaf:
+                    continue
+                split = _best_split(binned[members], grad[members], hess[members], edges, bins, min_leaf, l2)
+                if split is None:
+                    continue
+                feature, cut = split
+                features[t, i] = feature
+                thresholds[t, i] = edges[feature][cut]
+                right[members] = binned[members, feature] > cut
+            node = 2 * node + 1 + right
+        reached = node - internal
+        for j in range(2 ** depth):
+            members = reached == j
+            if members.any():
+                leaves[t, j] = -grad[members].sum(axis=0) / (hess[members].sum(axis=0) + l2)
+        logits += learning_rate * leaves[t, reached]
+    return TreeEnsemble(features, thresholds, leaves, base, learning_rate)
+
+
+class PoseModel:
+    """
+    A trained pose classifier: features, then every pose's probability in
+    one TreeEnsemble pass.
+
+    Classes are the pose labels plus "No Pose Detected". With a fallback
+    RuleEngine, frames whose best probability is below min_probability are
+    classified by the rules instead.
+
+    Args:
+        feature_specs (dict): FeatureSet specs the model was trained on.
+        labels (list): Class labels, "No Pose Detected" included.
+        poses (list): Pose name per class; "" for "No Pose Detected".
+        ensemble (TreeEnsemble): The trees.
+        fallback (RuleEngine, optional): Used for uncertain frames.
+        min_probability (float): Confidence below which fallback is used.
+    """
+
+    def __init__(self, feature_specs, labels, poses, ensemble, fallback=None, min_probability=0.5):
+        self.feature_set = FeatureSet(feature_specs)
+        self.labels = list(labels)
+        self.poses = list(poses)
+        self.ensemble = ensemble
+        self.fallback = fallback
+        self.min_probability = min_probability
+
+    @staticmethod
+    def feature_specs(engine):
+        """Reference features plus everything the engine's definitions add."""
+        return {**REFERENCE_FEATURES, **engine.feature_set.specs}
+
+    def probabilities(self, points):
+        """(..., C) class probabilities for (33, 4) or (N, 33, 4) landmarks."""
+        return self.ensemble.predict_proba(self.feature_set.compute(points))
+
+    def predict(self, points):
+        """Per-frame labels for an (N, 33, 4) stack; uncertain frames go to the fallback like in classify."""
+        probabilities = self.probabilities(points)
+        best = np.argmax(probabilities, axis=-1)
+        labels = [self.labels[i] for i in best]
+        if self.fallback is not None:
+            uncertain = np.flatnonzero(probabilities[np.arange(len(best)), best] < self.min_probability)
+            if len(uncertain):
+                for i, label in zip(uncertain, self.fallback.evaluate(points[uncertain]).labels()):
+                    labels[i] = label
+        return labels
+
+    def classify(self, points):
+        """PoseResult for one frame; scores are class probabilities."""
+        probabilities = self.probabilities(points)
+        best = int(np.argmax(probabilities))
+        if self.fallback is not None and probabilities[best] < self.min_probability:
+            return self.fallback.evaluate(points).result()
+        scores = {pose: round(float(p), 3) for pose, p in zip(self.poses, probabilities) if pose}
+        return PoseResult(self.labels[best], self.poses[best] or None, scores)
+
+    def save(self, path):
+        ensemble = self.ensemble
+        np.savez_compressed(
+            path,
+            feature_specs=json.dumps(self.feature_set.specs),
+            labels=np.array(self.labels),
+            poses=np.array(self.poses),
+            feature=ensemble.feature.astype(np.int16),
+            threshold=ensemble.threshold,
+            leaf=ensemble.leaf,
+            base=ensemble.base,
+            learning_rate=ensemble.learning_rate,
+        )
+
+    @classmethod
+    def load(cls, path, fallback=None, min_probability=0.5):
+        data = np.load(path)
+        ensemble = TreeEnsemble(data["feature"], data["threshold"], data["leaf"], data["base"],
+                                float(data["learning_rate"]))
+        return cls(json.loads(str(data["feature_specs"])), data["labels"].tolist(), data["poses"].tolist(),
+                   ensemble, fallback, min_probability)
+
+
+def train_pose_model(points, labels, engine, **options):
+    """
+    Fits a PoseModel on landmark frames.
+
+    Args:
+        points (numpy.ndarray): (N, 33, 4) landmarks.
+        labels (list): Label per frame: a definition label or "No Pose Detected".
+        engine (RuleEngine): Supplies the class list and extra features.
+        **options: fit_boosted_trees settings.
+
+    Returns:
+        PoseModel
+    """
+    classes = list(engine.labels) + [NO_POSE]
+    poses = list(engine.pose_names) + [""]
+    index = {label: i for i, label in enumerate(classes)}
+    unknown = sorted(set(labels) - set(index))
+    if unknown:
+        raise ValueError(f"Labels not in the pose definitions: {unknown}")
+    specs = PoseModel.feature_specs(engine)
+    x = FeatureSet(specs).compute(points)
+    y = np.array([index[label] for label in labels], dtype=np.intp)
+    return PoseModel(specs, classes, poses, fit_boosted_trees(x, y, len(classes), **options))
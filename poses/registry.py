@@ -0,0 +1,62 @@
+import glob
+import importlib
+import os
+import re
+
+from poses.rules import DEFINITIONS_DIR, load_definitions
+
+POSES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover(directory=POSES_DIR):
+    """
+    Finds pose modules by reading their source, without importing them.
+
+    A pose module is poses/<name>.py defining is_<name>_pose.
+
+    Returns:
+        dict: name -> (module name, function name).
+    """
+    found = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            if re.search(rf"^def is_{name}_pose\(", f.read(), re.MULTILINE):
+                found[name] = (f"poses.{name}", f"is_{name}_pose")
+    return found
+
+
+class LazyClassifier:
+    """Calls a pose module's is_<name>_pose, importing the module on first call."""
+
+    __slots__ = ("module_name", "func_name", "_func")
+
+    def __init__(self, module_name, func_name):
+        self.module_name = module_name
+        self.func_name = func_name
+        self._func = None
+
+    def load(self):
+        if self._func is None:
+            self._func = getattr(importlib.import_module(self.module_name), self.func_name)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return (self._func or self.load())(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyClassifier({self.module_name}.{self.func_name})"
+
+
+def reference_classifiers(directory=POSES_DIR, definitions_dir=DEFINITIONS_DIR):
+    """
+    (classifier, label) pairs for every discovered pose module, in the
+    priority order of the pose definitions; nothing is imported yet.
+    """
+    modules = discover(directory)
+    classifiers = []
+    for definition in load_definitions(definitions_dir):
+        entry = modules.get(definition["name"])
+        if entry is not None:
+            classifiers.append((LazyClassifier(*entry), definition["label"]))
+    return classifiers
@@ -0,0 +1,337 @@
+import copy
+import glob
+import json
+import os
+
+import numpy as np
+
+from poses.geometry import COMBINATOR_KINDS, REFERENCE_FEATURES, FeatureSet, feature_kind
+
+DEFINITIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "definitions")
+NO_POSE = "No Pose Detected"
+
+# Margin (in feature units) that moves a condition score from 0.5 to ~0.73,
+# by feature kind (see geometry.feature_kind); a condition's "scale" overrides it
+DEFAULT_SCALES = {"angle": 10.0, "ratio": 0.25}
+DEFAULT_SCALE = 0.05
+
+
+def condition_scale(feature, specs):
+    """Default score scale of a condition on feature, from its kind."""
+    return DEFAULT_SCALES.get(feature_kind(feature, specs), DEFAULT_SCALE)
+
+
+def load_definition(path):
+    """Reads one pose definition from a .json, .yaml or .yml file."""
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(f"PyYAML is required to load {path}") from None
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def load_definitions(directory=DEFINITIONS_DIR):
+    """Loads every pose definition in directory, ordered by priority then name."""
+    paths = []
+    for pattern in ("*.json", "*.yaml", "*.yml"):
+        paths.extend(glob.glob(os.path.join(directory, pattern)))
+    definitions = [load_definition(path) for path in paths]
+    return sorted(definitions, key=lambda d: (d.get("priority", 100), d["name"]))
+
+
+class PoseResult(str):
+    """
+    Structured outcome for one frame that still reads as its label.
+
+    It compares, prints and renders as the label string, so existing
+    `result == "No Pose Detected"` checks keep working, and adds:
+
+    Attributes:
+        pose (str or None): Name of the detected pose, None if none.
+        scores (dict): pose name -> score in [0, 1]; 0.5 means the
+            required conditions sit on average right at their thresholds.
+        margins (dict): pose name -> {condition: margin}. A margin is the
+            signed distance from the nearest bound in feature units
+            (degrees for angles); negative when the condition fails.
+    """
+
+    def __new__(cls, label=NO_POSE, pose=None, scores=None, margins=None):
+        result = super().__new__(cls, label)
+        result.pose = pose
+        result.scores = scores or {}
+        result.margins = margins or {}
+        return result
+
+    @property
+    def label(self):
+        return str(self)
+
+    @property
+    def detected(self):
+        return self.pose is not None
+
+    def ranking(self):
+        """(pose, score) pairs, best first."""
+        return sorted(self.scores.items(), key=lambda item: -item[1])
+
+    def feedback(self, pose=None, limit=2):
+        """
+        Coaching lines for pose (default: the best-scoring pose): its
+        failing conditions, furthest from their threshold first.
+        """
+        if pose is None:
+            ranking = self.ranking()
+            if not ranking:
+                return []
+            pose = ranking[0][0]
+        failing = sorted((margin, name) for name, margin in self.margins.get(pose, {}).items() if margin <= 0)
+        return [f"{pose} {self.scores[pose]:.2f}"] + [
+            f"{name}: off by {-margin:.2f}" for margin, name in failing[:limit]
+        ]
+
+    def as_dict(self):
+        return {"label": self.label, "pose": self.pose, "scores": self.scores, "margins": self.margins}
+
+
+class RuleEvaluation:
+    """
+    Outcome of RuleEngine.evaluate for one frame or a stack of frames.
+
+    Attributes:
+        detected (numpy.ndarray): (..., P) True where pose P's rules pass.
+        condition_pass (numpy.ndarray): (..., C) result of every condition.
+        condition_margin (numpy.ndarray): (..., C) signed distance of each
+            condition's best check from its nearest bound.
+        scores (numpy.ndarray): (..., P) closeness of each pose in [0, 1].
+        features (numpy.ndarray): (..., F) feature values the rules read.
+    """
+
+    def __init__(self, engine, detected, condition_pass, features, condition_margin=None, scores=None):
+        self.engine = engine
+        self.detected = detected
+        self.condition_pass = condition_pass
+        self.features = features
+        self.condition_margin = condition_margin
+        self.scores = scores
+
+    def label(self):
+        """First detected pose label in definition order, or "No Pose Detected"."""
+        for i, label in enumerate(self.engine.labels):
+            if self.detected[..., i]:
+                return label
+        return NO_POSE
+
+    def labels(self):
+        """Per-frame labels for an (N, ...) evaluation."""
+        first = np.argmax(self.detected, axis=-1)
+        any_detected = np.any(self.detected, axis=-1)
+        return [self.engine.labels[i] if hit else NO_POSE for i, hit in zip(first, any_detected)]
+
+    def conditions(self, pose):
+        """{condition name: passed} for one pose of a single-frame evaluation."""
+        return {
+            name: bool(self.condition_pass[..., column])
+            for name, column in self.engine.pose_conditions[pose]
+        }
+
+    def margins(self, pose):
+        """{condition name: margin} for one pose of a single-frame evaluation."""
+        return {
+            name: round(float(self.condition_margin[..., column]), 3)
+            for name, column in self.engine.pose_conditions[pose]
+        }
+
+    def result(self):
+        """PoseResult of a single-frame evaluation."""
+        label = self.label()
+        pose = self.engine.pose_for(label)
+        return PoseResult(
+            label,
+            pose,
+            {name: round(float(self.scores[..., i]), 3) for i, name in enumerate(self.engine.pose_names)},
+            {name: self.margins(name) for name in self.engine.pose_names},
+        )
+
+    def debug_lines(self):
+        """Readable per-pose, per-condition summary of a single-frame evaluation."""
+        lines = []
+        for i, pose in enumerate(self.engine.pose_names):
+            failed = [name for name, ok in self.conditions(pose).items() if not ok]
+            status = "pass" if self.detected[..., i] else "fail"
+            lines.append(f"{self.engine.labels[i]}: {status}" + (f" (failed: {', '.join(failed)})" if failed else ""))
+        return lines
+
+
+class RuleEngine:
+    """
+    Compiles pose definitions into one vectorized evaluation.
+
+    A definition is data:
+
+        {
+          "name": "chair",
+          "label": "Chair Pose Detected",
+          "priority": 10,
+          "features": {"left_hip_above_knee": {"delta": ["LEFT_KNEE", "LEFT_HIP"], "axis": "y"}},
+          "conditions": [
+            {"name": "knee_bent", "feature": "left_knee_angle", "min": 120},
+            {"name": "hand_raised", "any": [{"feature": "...", "min": 0}, ...]},
+            {"name": "relaxed_shoulders", "feature": "shoulder_tilt", "max": 0.1, "required": false}
+          ],
+          "tolerance": 0
+        }
+
+    Features use the FeatureSet spec format and may also name anything in
+    REFERENCE_FEATURES. Bounds are exclusive. A pose is detected when no
+    more than "tolerance" of its required conditions fail; optional
+    conditions are only reported.
+
+    All features of all poses are computed in one FeatureSet pass and every
+    bound is checked with one array comparison, so the cost barely grows
+    with the number of poses.
+    """
+
+    def __init__(self, definitions):
+        specs = {}
+        for definition in definitions:
+            for name, spec in definition.get("features", {}).items():
+                if specs.get(name, spec) != spec or REFERENCE_FEATURES.get(name, spec) != spec:
+                    raise ValueError(f"Feature {name!r} is defined differently in {definition['name']!r}")
+                specs[name] = spec
+
+        bounds = []  # (feature name, min, max) per atomic check
+        groups = []  # atomic check indices per condition
+        scales = []  # explicit score scale per condition, or None
+        self.pose_names = []
+        self.labels = []
+        self.pose_conditions = {}
+        required_columns = []
+        tolerances = []
+        for definition in definitions:
+            pose = definition["name"]
+            self.pose_names.append(pose)
+            self.labels.append(definition.get("label", f"{pose.replace('_', ' ').title()} Pose Detected"))
+            tolerances.append(definition.get("tolerance", 0))
+            conditions = []
+            required = []
+            for i, condition in enumerate(definition["conditions"]):
+                checks = condition.get("any", [condition])
+                groups.append([len(bounds) + j for j in range(len(checks))])
+                scales.append(condition.get("scale"))
+                for check in checks:
+                    bounds.append((check["feature"], check.get("min", -np.inf), check.get("max", np.inf)))
+                column = len(groups) - 1
+                conditions.append((condition.get("name", f"condition_{i}"), column))
+                if condition.get("required", True):
+                    required.append(column)
+            self.pose_conditions[pose] = conditions
+            required_columns.append(required)
+
+        # Only compute what some condition reads
+        used = {}
+        for feature, _, _ in bounds:
+            used.setdefault(feature, None)
+        pending = list(used)
+        while pending:
+            name = pending.pop()
+            spec = specs.get(name) or REFERENCE_FEATURES.get(name)
+            if spec is None:
+                raise ValueError(f"Unknown feature {name!r}")
+            specs[name] = spec
+            # Pull in the operands of combinator features
+            for key, operands in spec.items():
+                if key in COMBINATOR_KINDS:
+                    for operand in operands if isinstance(operands, list) else [operands]:
+                        if operand not in used:
+                            used[operand] = None
+                            pending.append(operand)
+        self.feature_set = FeatureSet({name: specs[name] for name in used})
+
+        self._bound_columns = np.array([self.feature_set.index[f] for f, _, _ in bounds], dtype=np.intp)
+        self._bound_min = np.array([b[1] for b in bounds], dtype=np.float32)
+        self._bound_max = np.array([b[2] for b in bounds], dtype=np.float32)
+        # Condition passes if any of its checks passes
+        self._any = np.zeros((len(bounds), len(groups)), dtype=np.float32)
+        for column, checks in enumerate(groups):
+            self._any[checks, column] = 1
+        # Pose fails once too many required conditions fail
+        self._required = np.zeros((len(groups), len(definitions)), dtype=np.float32)
+        for pose_index, columns in enumerate(required_columns):
+            self._required[columns, pose_index] = 1
+        self._tolerance = np.array(tolerances, dtype=np.float32)
+
+        # Checks of a condition are contiguous, so per-condition maxima are one reduceat
+        self._group_starts = np.array([checks[0] for checks in groups], dtype=np.intp)
+        self._scale = np.array(
+            [scale or condition_scale(bounds[checks[0]][0], specs) for scale, checks in zip(scales, groups)],
+            dtype=np.float32,
+        )
+        # Pose score: mean score of its required conditions
+        counts = np.maximum(self._required.sum(axis=0), 1)
+        self._required_mean = self._required / counts
+
+    @classmethod
+    def from_directory(cls, directory=DEFINITIONS_DIR):
+        return cls(load_definitions(directory))
+
+    def pose_for(self, label):
+        """Pose name announced as label, or None for labels of no definition."""
+        return self.pose_names[self.labels.index(label)] if label in self.labels else None
+
+    @property
+    def bounds(self):
+        """(min, max) of every atomic check, in definition order; -inf/inf where unbounded."""
+        return self._bound_min.copy(), self._bound_max.copy()
+
+    def with_bounds(self, bound_min, bound_max):
+        """
+        A copy of the engine with other check bounds, e.g. while tuning.
+
+        The bounds may carry leading candidate axes, (K, 1, B) against (N, F)
+        features, to evaluate K threshold sets in one pass.
+        """
+        engine = copy.copy(self)
+        engine._bound_min = np.asarray(bound_min, dtype=np.float32)
+        engine._bound_max = np.asarray(bound_max, dtype=np.float32)
+        return engine
+
+    def evaluate(self, points):
+        """
+        Evaluates every pose definition.
+
+        Args:
+            points (numpy.ndarray): (33, 4) landmarks or an (N, 33, 4) stack.
+
+        Returns:
+            RuleEvaluation: Detection and per-condition results.
+        """
+        return self.evaluate_features(self.feature_set.compute(points))
+
+    def evaluate_features(self, features):
+        """Like evaluate, on (..., F) values already computed by feature_set."""
+        values = features[..., self._bound_columns]
+        # Bounds are exclusive: a check passes when its margin is positive
+        margins = np.minimum(values - self._bound_min, self._bound_max - values)
+        # A condition passes if any of its checks passes; fmax skips NaN checks
+        condition_margin = np.fmax.reduceat(margins, self._group_starts, axis=-1)
+        condition_pass = condition_margin > 0
+        failures = (~condition_pass).astype(np.float32) @ self._required
+        detected = failures <= self._tolerance
+        with np.errstate(over="ignore", invalid="ignore"):
+            condition_score = np.nan_to_num(1 / (1 + np.exp(-condition_margin / self._scale)), nan=0.0)
+        scores = condition_score @ self._required_mean
+        return RuleEvaluation(self, detected, condition_pass, features, condition_margin, scores)
+
+
+_default_engine = None
+
+
+def get_rule_engine():
+    """The engine for the bundled definitions, compiled on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RuleEngine.from_directory()
+    return _default_engine
@@ -0,0 +1,141 @@
+from collections import namedtuple
+
+import numpy as np
+
+from poses.geometry import BODY_LANDMARKS, normalize_pose
+from poses.rules import NO_POSE, PoseResult, get_rule_engine
+
+# One nearest template: its label, cosine similarity in [-1, 1] and where it came from
+TemplateMatch = namedtuple("TemplateMatch", ["label", "score", "source"])
+
+
+class TemplateIndex:
+    """
+    Brute-force nearest-neighbour index over normalized reference poses.
+
+    Each template is the normalize_pose vector of one reference image
+    (and, by default, its mirror image, so left- and right-sided versions
+    of a pose both match). A query is one matrix product against all
+    templates: landmarks the query can't see are masked out of both sides
+    and similarity is the cosine of the remaining coordinates.
+
+    Args:
+        min_visibility (float): Query landmarks below this are ignored.
+        mirror (bool): Also store every template mirrored.
+    """
+
+    def __init__(self, min_visibility=0.5, mirror=True):
+        self.min_visibility = min_visibility
+        self.mirror = mirror
+        self.labels = []
+        self.sources = []
+        self._rows = []
+        self._matrix = None
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, label, points, source=None):
+        """Adds the (33, 4) landmarks of one reference pose under label."""
+        variants = (False, True) if self.mirror else (False,)
+        for mirrored in variants:
+            self._rows.append(normalize_pose(points, mirror=mirrored).reshape(-1).astype(np.float32))
+            self.labels.append(label)
+            self.sources.append(f"{source or label}{' (mirrored)' if mirrored else ''}")
+        self._matrix = None
+
+    @property
+    def matrix(self):
+        """(M, D) template matrix, rebuilt after additions."""
+        if self._matrix is None:
+            self._matrix = np.stack(self._rows) if self._rows else np.empty((0, 2 * len(BODY_LANDMARKS)), np.float32)
+            self._squared = self._matrix ** 2
+        return self._matrix
+
+    def similarities(self, points):
+        """
+        Cosine similarity of every query against every template.
+
+        Args:
+            points (numpy.ndarray): (33, 4) landmarks or an (N, 33, 4) stack.
+
+        Returns:
+            numpy.ndarray: (..., M) similarities.
+        """
+        matrix = self.matrix
+        query = normalize_pose(points).astype(np.float32)
+        visible = points[..., list(BODY_LANDMARKS), 3] >= self.min_visibility
+        mask = np.repeat(visible, 2, axis=-1).astype(np.float32)
+        query = query.reshape(mask.shape) * mask
+        dot = query @ matrix.T
+        template_norm = np.sqrt(mask @ self._squared.T)
+        query_norm = np.linalg.norm(query, axis=-1, keepdims=True)
+        return dot / np.maximum(template_norm * query_norm, 1e-9)
+
+    def query(self, points, k=3, unique_labels=True, min_similarity=None):
+        """
+        The k most similar templates to one pose.
+
+        Args:
+            points (numpy.ndarray): (33, 4) landmarks.
+            k (int): Matches to return.
+            unique_labels (bool): Keep only the best template of each label.
+            min_similarity (float, optional): Leave out templates less similar
+                than this, so a pose unlike every template gets no match.
+
+        Returns:
+            list: TemplateMatch tuples, best first.
+        """
+        if not len(self):
+            return []
+        scores = self.similarities(points)
+        order = np.argsort(-scores)
+        matches, seen = [], set()
+        for i in order:
+            if min_similarity is not None and scores[i] < min_similarity:
+                break
+            label = self.labels[i]
+            if unique_labels and label in seen:
+                continue
+            seen.add(label)
+            matches.append(TemplateMatch(label, float(scores[i]), self.sources[i]))
+            if len(matches) == k:
+                break
+        return matches
+
+    def classify(self, points, min_similarity=0.9):
+        """Label of the closest template, or "No Pose Detected" if none reaches min_similarity."""
+        best = self.query(points, k=1, min_similarity=min_similarity)
+        return best[0].label if best else NO_POSE
+
+    def match(self, points, min_similarity=0.9):
+        """
+        PoseResult of the closest template, scored by its similarity, or None
+        if none reaches min_similarity. Labels of a pose definition carry
+        that pose's name; other templates are named by their label.
+        """
+        best = self.query(points, k=1, min_similarity=min_similarity)
+        if not best:
+            return None
+        label, score = best[0].label, best[0].score
+        pose = get_rule_engine().pose_for(label) or label
+        return PoseResult(label, pose, {pose: round(score, 3)})
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            matrix=self.matrix,
+            labels=np.array(self.labels),
+            sources=np.array(self.sources),
+            min_visibility=self.min_visibility,
+            mirror=self.mirror,
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        index = cls(float(data["min_visibility"]), bool(data["mirror"]))
+        index.labels = data["labels"].tolist()
+        index.sources = data["sources"].tolist()
+        index._rows = list(data["matrix"])
+        return index
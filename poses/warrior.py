@@ -1,41 +1,25 @@
-import cv2
-import mediapipe as mp
-import math
-
-mp_pose = mp.solutions.pose
-pose_detector = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-mp_drawing = mp.solutions.drawing_utils
-
-def calculate_angle(a, b, c):
-    angle = math.degrees(math.atan2(c.y - b.y, c.x - b.x) - math.atan2(a.y - b.y, a.x - b.x))
-    return abs(angle)
-
-def is_warrior_pose(image):
-    # Convert the image to RGB
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    results = pose_detector.process(image_rgb)
-
-    if results.pose_landmarks:
-        mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-
-        # Extract landmarks
-        left_hip = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_HIP]
-        left_knee = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_KNEE]
-        left_ankle = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_ANKLE]
-        left_elbow = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_ELBOW]
-        left_wrist = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_WRIST]
-        left_shoulder = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-
-        # Calculate angles
-        front_knee_angle = calculate_angle(left_hip, left_knee, left_ankle)
-        front_arm_angle = calculate_angle(left_elbow, left_shoulder, left_wrist)
-
-        
-
-        # Warrior pose detection conditions
-        if left_shoulder.y < right_shoulder.y and 200<front_knee_angle <300 and front_arm_angle <2.5:
-            return image, "Warrior Pose Detected"
-
-        return image, "No Pose Detected"
-    
\ No newline at end of file
+from poses.geometry import PoseLandmark as L, compute_features
+
+def is_warrior_pose(points, features=None):
+    """
+    Checks landmarks for Warrior Pose.
+
+    Args:
+        points (numpy.ndarray): (33, 4) landmarks or an (N, 33, 4) stack.
+        features (dict, optional): compute_features(points), if already computed.
+
+    Returns:
+        numpy.ndarray: True where the pose is detected, one value per frame.
+    """
+    f = compute_features(points) if features is None else features
+    y = points[..., 1]
+
+    front_knee_angle = f["left_knee_angle"]
+    front_arm_angle = f["left_shoulder_arm_angle"]
+
+    # Warrior pose detection conditions
+    return (
+        (y[..., L.LEFT_SHOULDER] < y[..., L.RIGHT_SHOULDER])
+        & (200 < front_knee_angle) & (front_knee_angle < 300)
+        & (front_arm_angle < 2.5)
+    )
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from main.analytics import PersonSession, RunningStats, SessionAnalytics
+from poses.rules import NO_POSE
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(size=(200, 3))
+    stats = RunningStats(3)
+    for row in values:
+        stats.add(row)
+    stats.add([np.nan, 0, 0])
+    assert stats.count == 200
+    assert stats.mean == pytest.approx(values.mean(axis=0))
+    assert stats.std() == pytest.approx(values.std(axis=0))
+
+
+def test_already_debounced_labels_keep_their_timing():
+    session = PersonSession(hold_frames=1, min_hold=1.0)
+    points = np.random.default_rng(0).random((33, 4)).astype(np.float32)
+    labels = [NO_POSE] * 10 + ["Tree Pose Detected"] * 60 + ["Chair Pose Detected"] * 45 + [NO_POSE] * 5
+    for i, label in enumerate(labels):
+        session.update(label, points, timestamp=i / 30)
+    summary = session.summary()
+    assert summary["poses"]["Tree Pose Detected"]["total_seconds"] == pytest.approx(2.0)
+    assert summary["poses"]["Chair Pose Detected"]["reps"] == 1
+    assert summary["poses"]["Chair Pose Detected"]["longest_seconds"] == pytest.approx(1.5)
+    # The same landmarks every frame: a perfectly still hold
+    assert summary["poses"]["Tree Pose Detected"]["mean_stability"] == 1.0
+    assert summary["transitions"] == [{"from": "Tree Pose Detected", "to": "Chair Pose Detected", "count": 1}]
+
+
+def test_short_holds_are_not_reps_and_missing_people_expire():
+    analytics = SessionAnalytics(hold_frames=1, min_hold=1.0, expire_after=2.0)
+    for i in range(15):
+        analytics.update("Tree Pose Detected", timestamp=i / 30, person=1)
+    analytics.update(NO_POSE, timestamp=0.5, person=1)
+    analytics.update(NO_POSE, timestamp=5.0, person=2)
+    finished = analytics.summary()["people"]
+    assert [person["person"] for person in finished] == [1, 2]
+    assert finished[0]["poses"] == {}
+    assert 1 not in analytics.people
+
+
+def test_single_flicker_frame_does_not_split_a_hold():
+    session = PersonSession(hold_frames=5, min_hold=1.0)
+    labels = ["Tree Pose Detected"] * 60 + ["Chair Pose Detected"] + ["Tree Pose Detected"] * 60
+    for i, label in enumerate(labels):
+        session.update(label, timestamp=i / 30)
+    session.close(timestamp=len(labels) / 30)
+    summary = session.summary()
+    assert summary["poses"]["Tree Pose Detected"]["reps"] == 1
+    assert "Chair Pose Detected" not in summary["poses"]
+    assert summary["transitions"] == []
+
+
+def test_video_analytics_debounce_unless_hold_does():
+    from main.detect_pose_video import SESSION_HOLD_FRAMES, parse_args, session_analytics
+
+    assert session_analytics(parse_args([])) is None
+    assert session_analytics(parse_args(["--session-summary", "s.json"])).hold_frames == SESSION_HOLD_FRAMES
+    assert session_analytics(parse_args(["--session-summary", "s.json", "--smooth", "ema"])).hold_frames > 1
+    assert session_analytics(parse_args(["--session-summary", "s.json", "--hold", "8"])).hold_frames == 1
@@ -0,0 +1,56 @@
+import csv
+
+import cv2
+import numpy as np
+import pytest
+
+import main.batch as batch
+from main.batch import ResultWriter, run_batch
+
+
+@pytest.fixture
+def fake_detector(monkeypatch):
+    # No MediaPipe: images wider than tall have no person, square ones break the detector
+    def extract_landmarks(image, config=None, pool=None):
+        if image.shape[0] == image.shape[1]:
+            raise RuntimeError("detector failed")
+        return None
+
+    init_worker = batch._init_worker
+    monkeypatch.setattr(batch, "extract_landmarks", extract_landmarks)
+    monkeypatch.setattr("main.landmark_cache.extract_landmarks", extract_landmarks)
+    monkeypatch.setattr(batch, "_init_worker", lambda config, cache_path=None: init_worker(config, cache_path, False))
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = {name: str(tmp_path / f"{name}.png") for name in ("good", "odd", "corrupt")}
+    cv2.imwrite(paths["good"], np.zeros((4, 8, 3), dtype=np.uint8))
+    cv2.imwrite(paths["odd"], np.zeros((8, 8, 3), dtype=np.uint8))
+    with open(paths["corrupt"], "wb") as f:
+        f.write(b"not an image")
+    return paths
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_failing_images_do_not_stop_the_batch(fake_detector, images, tmp_path, cached):
+    output = str(tmp_path / "results.csv")
+    writer = ResultWriter(output)
+    paths = [images["corrupt"], images["odd"], images["good"]]
+    summary = run_batch(paths, writer, workers=1, cache_path=str(tmp_path / "cache.sqlite") if cached else None)
+    writer.close()
+    assert (summary["images"], summary["failures"]) == (3, 2)
+
+    with open(output, newline="") as f:
+        rows = {row["path"]: row for row in csv.DictReader(f)}
+    assert rows[images["good"]]["label"] == "No Pose Detected"
+    assert rows[images["good"]]["error"] == ""
+    assert rows[images["corrupt"]]["label"] == ""
+    assert rows[images["odd"]]["error"] == "RuntimeError: detector failed"
+
+
+def test_classify_encoded_reports_errors(fake_detector):
+    ok, square = cv2.imencode(".png", np.zeros((8, 8, 3), dtype=np.uint8))
+    record = batch.classify_encoded(square.tobytes(), "frame")
+    assert (record["path"], record["label"], record["error"]) == ("frame", None, "RuntimeError: detector failed")
+    assert batch.classify_encoded(b"garbage")["error"] == "Image could not be decoded."
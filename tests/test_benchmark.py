@@ -0,0 +1,50 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import main.benchmark as benchmark
+
+
+class FakeDetector:
+    # Finds nobody, like MediaPipe on an empty frame
+    def process(self, image):
+        return type("Results", (), {"pose_landmarks": None})()
+
+
+class FakePool:
+    def get(self, config):
+        return FakeDetector()
+
+    def preload(self, configs):
+        pass
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    monkeypatch.setattr(benchmark, "default_pool", FakePool())
+
+
+def test_undecodable_frames_are_counted_not_fatal(fake_pool):
+    ok, encoded = cv2.imencode(".jpg", np.zeros((8, 8, 3), dtype=np.uint8))
+    items = [("good", encoded.tobytes()), ("broken", b"not a jpeg"), ("good2", encoded.tobytes())]
+    result, points = benchmark.run_inference_benchmark(items, complexity=0, workers=2)
+    assert (result["frames"], result["errors"]) == (3, 1)
+    assert result["stages"]["decode"]["count"] == 2
+    assert points.shape == (3, 33, 4) and np.isnan(points).all()
+
+
+def test_percentiles_summary():
+    summary = benchmark.percentiles(list(range(1, 101)))
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == pytest.approx(50.5)
+    assert benchmark.percentiles([]) == {"count": 0}
+
+
+def test_worker_start_up_is_not_timed(fake_pool, monkeypatch):
+    # A slow model load in every worker must stay outside the measured seconds
+    monkeypatch.setattr(FakePool, "preload", lambda self, configs: time.sleep(0.5))
+    ok, encoded = cv2.imencode(".jpg", np.zeros((8, 8, 3), dtype=np.uint8))
+    result, _ = benchmark.run_inference_benchmark([("frame", encoded.tobytes())] * 4, complexity=0, workers=2)
+    assert result["seconds"] < 0.4
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import main.complexity as complexity
+from main.complexity import ComplexityController
+
+
+class FakeBackend:
+    # Reports a fixed latency (ms) and landmark visibility, or nobody when visibility is None
+    def __init__(self, name, ms, visibility):
+        self.name = name
+        self.ms = ms
+        self.visibility = visibility
+        self.calls = 0
+
+    def detect(self, image, pool=None):
+        self.calls += 1
+        if self.visibility is None:
+            return None
+        points = np.zeros((33, 4), dtype=np.float32)
+        points[:, 3] = self.visibility
+        return points
+
+    def close(self):
+        pass
+
+
+def fake_clock(monkeypatch, backends):
+    # Each detect() advances perf_counter by its backend's latency
+    now = [0.0]
+    for backend in backends:
+        detect = backend.detect
+
+        def timed(image, pool=None, backend=backend, detect=detect):
+            now[0] += backend.ms / 1000
+            return detect(image, pool)
+
+        backend.detect = timed
+    monkeypatch.setattr(complexity, "time", SimpleNamespace(perf_counter=lambda: now[0]))
+
+
+def test_low_confidence_frames_escalate_when_affordable(monkeypatch):
+    lite, full, heavy = FakeBackend("lite", 5, 0.3), FakeBackend("full", 10, 0.3), FakeBackend("heavy", 20, 0.9)
+    fake_clock(monkeypatch, [lite, full, heavy])
+    controller = ComplexityController([lite, full, heavy], budget_ms=40, window=1000)
+    points = controller.detect(None)
+    assert points[0, 3] == np.float32(0.9)
+    assert (lite.calls, heavy.calls, controller.escalations) == (1, 1, 1)
+
+    # Over budget: the low-confidence frame keeps the base result
+    controller.budget_ms = 10
+    assert controller.detect(None)[0, 3] == np.float32(0.3)
+    assert heavy.calls == 1
+
+
+def test_missing_people_only_escalate_on_request(monkeypatch):
+    lite, heavy = FakeBackend("lite", 5, None), FakeBackend("heavy", 20, 0.9)
+    fake_clock(monkeypatch, [lite, heavy])
+    assert ComplexityController([lite, heavy], budget_ms=100).detect(None) is None
+    assert heavy.calls == 0
+    assert ComplexityController([lite, heavy], budget_ms=100, escalate_missing=True).detect(None) is not None
+
+
+def test_level_follows_the_budget(monkeypatch):
+    lite, full, heavy = FakeBackend("lite", 5, 0.9), FakeBackend("full", 30, 0.9), FakeBackend("heavy", 60, 0.9)
+    fake_clock(monkeypatch, [lite, full, heavy])
+    controller = ComplexityController([lite, full, heavy], budget_ms=20, window=2, headroom=1.0)
+    # lite at 5 ms leaves room for full's assumed 10 ms: move up
+    for _ in range(2):
+        controller.detect(None)
+    assert controller.backend is full
+    # full measures 30 ms, over the 20 ms budget: step back down and stay
+    for _ in range(6):
+        controller.detect(None)
+    assert controller.backend is lite
+    assert controller.stats()["latency_ms"]["full"] == 30.0
+
+
+def test_mediapipe_escalation_never_tracks(monkeypatch):
+    created = {}
+    monkeypatch.setattr(complexity, "create_backend",
+                        lambda name, static_image_mode: created.setdefault(name, static_image_mode))
+    ComplexityController.for_mediapipe(50)
+    assert created == {"lite": False, "full": False, "heavy": True}
@@ -0,0 +1,14 @@
+import pytest
+
+from main.detect_pose_video import parse_args
+
+
+@pytest.mark.parametrize("options", [["--templates", "t.npz"], ["--roi"], ["--smooth", "ema"]])
+def test_multi_rejects_single_person_options(options):
+    with pytest.raises(SystemExit):
+        parse_args(["--multi"] + options)
+
+
+def test_multi_keeps_its_own_options():
+    args = parse_args(["--multi", "--hold", "5", "--model", "model.npz"])
+    assert args.multi and args.hold == 5
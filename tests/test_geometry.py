@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+import pytest
+
+from poses.geometry import (
+    REFERENCE_FEATURES, FeatureSet, PoseLandmark as L, body_orientation, calculate_angles, calculate_distances,
+    compute_features, feature_kind, normalize_pose,
+)
+
+
+def scalar_angle(a, b, c, fold=False):
+    # The per-landmark formula the pose modules started from
+    angle = abs(math.degrees(math.atan2(c[1] - b[1], c[0] - b[0]) - math.atan2(a[1] - b[1], a[0] - b[0])))
+    return 360 - angle if fold and angle > 180 else angle
+
+
+def random_frames(count, seed=0):
+    return np.random.default_rng(seed).random((count, 33, 4)).astype(np.float32)
+
+
+def test_batched_angles_match_scalar_formula():
+    frames = random_frames(50)
+    triplets = [(L.LEFT_HIP, L.LEFT_KNEE, L.LEFT_ANKLE), (L.NOSE, L.RIGHT_HIP, L.LEFT_HIP)]
+    angles = calculate_angles(frames, triplets, normalize=[False, True])
+    for frame, row in zip(frames, angles):
+        for (a, b, c), fold, value in zip(triplets, (False, True), row):
+            assert value == pytest.approx(scalar_angle(frame[a], frame[b], frame[c], fold), abs=1e-3)
+
+
+def test_single_frame_and_stack_agree():
+    frames = random_frames(8)
+    reference = FeatureSet(REFERENCE_FEATURES)
+    batch = reference.compute(frames)
+    assert batch.shape == (8, len(reference.names))
+    for frame, row in zip(frames, batch):
+        np.testing.assert_allclose(reference.compute(frame), row, rtol=1e-6)
+
+
+def test_distances_and_zero_denominator_ratio():
+    frames = random_frames(4)
+    distance = calculate_distances(frames, [(L.LEFT_ANKLE, L.RIGHT_ANKLE)])[:, 0]
+    expected = np.hypot(*(frames[:, L.LEFT_ANKLE, :2] - frames[:, L.RIGHT_ANKLE, :2]).T)
+    np.testing.assert_allclose(distance, expected, rtol=1e-6)
+    # Coincident hips leave feet_hip_ratio undefined rather than infinite
+    frames[:, L.RIGHT_HIP] = frames[:, L.LEFT_HIP]
+    assert np.isnan(compute_features(frames)["feet_hip_ratio"]).all()
+
+
+def test_combinators_resolve_dependencies_and_reject_cycles():
+    features = FeatureSet({
+        "leg_min": {"min": ["left", "right"]},
+        "left": {"angle": ["LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"]},
+        "right": {"angle": ["RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE"]},
+    })
+    values = features.as_dict(features.compute(random_frames(5)))
+    np.testing.assert_array_equal(values["leg_min"], np.minimum(values["left"], values["right"]))
+    with pytest.raises(ValueError):
+        FeatureSet({"a": {"abs": "b"}, "b": {"abs": "a"}})
+
+
+def test_feature_kind_follows_operands():
+    specs = dict(REFERENCE_FEATURES, leg={"min": ["left_knee_angle_folded", "right_knee_angle_folded"]},
+                 mixed={"max": ["left_knee_angle", "hip_distance"]})
+    assert feature_kind("leg", specs) == "angle"
+    assert feature_kind("feet_hip_ratio", specs) == "ratio"
+    assert feature_kind("hip_x_gap", specs) == "delta"
+    assert feature_kind("mixed", specs) is None
+
+
+def test_orientation_and_normalization():
+    frame = np.zeros((33, 4), dtype=np.float32)
+    frame[[L.LEFT_SHOULDER, L.RIGHT_SHOULDER], :2] = [[0.4, 0.2], [0.6, 0.2]]
+    frame[[L.LEFT_HIP, L.RIGHT_HIP], :2] = [[0.4, 0.6], [0.6, 0.6]]
+    assert body_orientation(frame) == 0
+    assert body_orientation(frame[:, [1, 0, 2, 3]]) == 1
+    flipped = frame.copy()
+    flipped[:, 1] = 1 - flipped[:, 1]
+    assert body_orientation(flipped) == 2
+    # Hips at the origin, torso one unit long, whatever the size and position
+    moved = frame.copy()
+    moved[:, :2] = moved[:, :2] * 3 + 5
+    np.testing.assert_allclose(normalize_pose(frame), normalize_pose(moved), atol=1e-5)
+    hips = normalize_pose(frame, indices=[L.LEFT_HIP, L.RIGHT_HIP, L.LEFT_SHOULDER])
+    np.testing.assert_allclose(hips, [[-0.25, 0], [0.25, 0], [-0.25, -1]], atol=1e-6)
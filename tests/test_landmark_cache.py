@@ -0,0 +1,53 @@
+import sqlite3
+
+import numpy as np
+
+from main.landmark_cache import LandmarkCache, content_key
+from poses.landmarks import IMAGE_CONFIG, VIDEO_CONFIG
+
+
+def test_content_key_depends_on_data_and_config():
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    assert content_key(frame, IMAGE_CONFIG) == content_key(frame.copy(), IMAGE_CONFIG)
+    assert content_key(frame, IMAGE_CONFIG) != content_key(frame, VIDEO_CONFIG)
+    assert content_key(frame, IMAGE_CONFIG) != content_key(frame.reshape(8, 2, 3), IMAGE_CONFIG)
+
+
+def test_put_get_round_trip(tmp_path):
+    points = np.random.default_rng(0).random((33, 4)).astype(np.float32)
+    with LandmarkCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.put("pose", points)
+        cache.put("empty", None)
+        hit, cached = cache.get("pose")
+        assert hit
+        np.testing.assert_array_equal(cached, points)
+        assert cache.get("empty") == (True, None)
+        assert cache.get("missing") == (False, None)
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_hits_are_written_on_close(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LandmarkCache(path)
+    cache.put("pose", None)
+    last_used = lambda: sqlite3.connect(path).execute("SELECT last_used FROM landmarks").fetchone()[0]
+    stored = last_used()
+    cache.get("pose")
+    assert last_used() == stored
+    cache.close()
+    assert last_used() > stored
+    # A second close is a no-op
+    cache.close()
+
+
+def test_close_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LandmarkCache(path, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, None)
+    cache.get("a")
+    cache.close()
+    with LandmarkCache(path, max_entries=2) as cache:
+        assert len(cache) == 2
+        assert cache.get("a")[0] and cache.get("c")[0]
+        assert not cache.get("b")[0]
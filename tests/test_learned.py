@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from poses.learned import PoseModel, TreeEnsemble, fit_boosted_trees, train_pose_model
+from poses.rules import NO_POSE, get_rule_engine
+
+
+@pytest.fixture(scope="module")
+def trained():
+    # Random frames labelled by the rules; the model has to learn the rules back
+    engine = get_rule_engine()
+    points = np.random.default_rng(0).random((6000, 33, 4)).astype(np.float32)
+    labels = engine.evaluate(points).labels()
+    return train_pose_model(points[:5000], labels[:5000], engine), points[5000:], labels[5000:]
+
+
+def test_boosted_trees_fit_a_threshold():
+    x = np.random.default_rng(0).random((500, 3)).astype(np.float32)
+    y = ((x[:, 1] > 0.6) + (x[:, 2] > 0.3)).astype(np.intp)
+    ensemble = fit_boosted_trees(x, y, 3, rounds=20)
+    assert isinstance(ensemble, TreeEnsemble)
+    probabilities = ensemble.predict_proba(x)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-5)
+    assert (probabilities.argmax(axis=1) == y).mean() > 0.95
+
+
+def test_model_agrees_with_rules_on_held_out_frames(trained):
+    model, points, labels = trained
+    predicted = model.predict(points)
+    agreement = np.mean([p == label for p, label in zip(predicted, labels)])
+    baseline = labels.count(NO_POSE) / len(labels)
+    assert agreement > baseline
+    # predict() is classify() over a stack
+    assert predicted[:50] == [model.classify(frame).label for frame in points[:50]]
+
+
+def test_save_load_round_trip(trained, tmp_path):
+    model, points, _ = trained
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = PoseModel.load(path)
+    assert loaded.labels == model.labels
+    np.testing.assert_array_equal(loaded.probabilities(points), model.probabilities(points))
+
+
+def test_uncertain_frames_fall_back_to_rules(trained):
+    model, points, labels = trained
+    engine = get_rule_engine()
+    # No probability reaches 1.01, so every frame goes to the rules
+    careful = PoseModel(model.feature_set.specs, model.labels, model.poses, model.ensemble,
+                        fallback=engine, min_probability=1.01)
+    assert careful.predict(points[:200]) == labels[:200]
+    assert careful.classify(points[0]) == labels[0]
+
+
+def test_unknown_labels_are_rejected():
+    points = np.zeros((2, 33, 4), dtype=np.float32)
+    with pytest.raises(ValueError):
+        train_pose_model(points, ["Tree Pose Detected", "Lotus"], get_rule_engine())
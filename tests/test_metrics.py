@@ -0,0 +1,108 @@
+import json
+
+import numpy as np
+import pytest
+
+import main.metrics as metrics_module
+from main.metrics import LatencyHistogram, Metrics, ProfileWindow
+
+
+def test_disabled_timer_is_a_shared_no_op():
+    registry = Metrics()
+    with registry.timer("decode"):
+        pass
+    assert registry.timer("decode") is registry.timer("infer")
+    assert registry.snapshot() == {"timers": {}, "counters": {}}
+
+
+def test_enabled_timer_records_block_time(monkeypatch):
+    now = iter([1.0, 1.025])
+    monkeypatch.setattr(metrics_module.time, "perf_counter", lambda: next(now))
+    registry = Metrics(enabled=True)
+    with registry.timer("infer"):
+        pass
+    summary = registry.snapshot()["timers"]["infer"]
+    assert summary["count"] == 1
+    assert summary["total_ms"] == 25.0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = LatencyHistogram(buckets=(1, 10))
+    for ms in (0.5, 5, 5, 50):
+        histogram.observe(ms)
+    summary = histogram.summary()
+    assert summary["buckets"] == {"le_1": 1, "le_10": 3, "le_+Inf": 4}
+    assert summary["count"] == 4
+    assert summary["max_ms"] == 50
+    assert summary["mean_ms"] == 15.125
+
+
+def test_counters_are_kept_per_label_set():
+    registry = Metrics(enabled=True)
+    registry.count("frames", pose="tree")
+    registry.count("frames", 2, pose="tree")
+    registry.count("frames", pose="chair")
+    registry.count("dropped")
+    counters = registry.snapshot()["counters"]
+    assert {"labels": {"pose": "tree"}, "value": 3} in counters["frames"]
+    assert {"labels": {"pose": "chair"}, "value": 1} in counters["frames"]
+    assert counters["dropped"] == [{"labels": {}, "value": 1}]
+
+
+def test_count_vector_sums_a_stack_of_increments():
+    registry = Metrics(enabled=True)
+    keys = ((("pose", "tree"),), (("pose", "chair"),))
+    registry.count_vector("detected", keys, np.array([[True, False], [True, True]]))
+    registry.count_vector("detected", keys, np.array([False, True]))
+    assert registry.snapshot()["counters"]["detected"] == [
+        {"labels": {"pose": "tree"}, "value": 2},
+        {"labels": {"pose": "chair"}, "value": 2},
+    ]
+
+
+def test_prometheus_text_and_json_export(tmp_path):
+    registry = Metrics(enabled=True)
+    registry.observe("infer", 3.0)
+    registry.count("frames", pose="tree")
+    registry.count("dropped")
+    text = registry.to_prometheus()
+    assert "# TYPE yoga_infer_ms histogram" in text
+    assert 'yoga_infer_ms_bucket{le="5"} 1' in text
+    assert "yoga_infer_ms_count 1" in text
+    assert 'yoga_frames_total{pose="tree"} 1' in text
+    assert "yoga_dropped_total 1" in text
+
+    path = tmp_path / "metrics.json"
+    registry.write_json(str(path))
+    assert json.loads(path.read_text()) == registry.snapshot()
+
+
+def test_reset_and_summary_lines():
+    registry = Metrics(enabled=True)
+    registry.observe("infer", 2.0)
+    registry.observe("infer", 4.0)
+    assert registry.summary_lines(["infer", "decode"]) == ["infer: 3.0 ms"]
+    registry.reset()
+    assert registry.summary_lines(["infer"]) == []
+
+
+def test_profile_window_profiles_only_inside_the_window(tmp_path, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(metrics_module.time, "perf_counter", lambda: now[0])
+    window = ProfileWindow(str(tmp_path), duration=1.0, interval=10.0)
+    assert window.run(sum, [1, 2]) == 3  # opens the first window
+    now[0] = 2.0
+    window.run(sum, [1])  # past its end: the report is written
+    assert window.windows == 1
+    now[0] = 5.0
+    window.run(sum, [1])  # between windows: nothing profiled
+    assert window._profiler is None
+    now[0] = 10.0
+    window.run(sum, [1])
+    window.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["profile-001.prof", "profile-002.prof"]
+
+
+def test_profile_window_rejects_unknown_backend(tmp_path):
+    with pytest.raises(ValueError, match="perf"):
+        ProfileWindow(str(tmp_path), backend="perf")
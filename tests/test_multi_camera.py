@@ -0,0 +1,40 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from main.multi_camera import FrameRing
+
+
+def test_attached_ring_shares_frames():
+    ring = FrameRing((4, 6, 3), slots=3)
+    try:
+        attached = FrameRing.attach(ring.spec)
+        frame = np.random.default_rng(0).integers(0, 256, (4, 6, 3), dtype=np.uint8)
+        ring.write(1, frame)
+        np.testing.assert_array_equal(attached.frame(1), frame)
+        # Views alias the block: writes through one ring show in the other
+        attached.frame(2)[:] = 7
+        assert (ring.frame(2) == 7).all()
+        assert not attached.owner
+        attached.close()
+    finally:
+        ring.close()
+
+
+def test_write_resizes_other_shapes():
+    ring = FrameRing((4, 6, 3), slots=1)
+    try:
+        ring.write(0, np.full((8, 12, 3), 200, dtype=np.uint8))
+        assert ring.frame(0).shape == (4, 6, 3)
+        assert (ring.frame(0) == 200).all()
+    finally:
+        ring.close()
+
+
+def test_owner_close_unlinks_the_block():
+    ring = FrameRing((2, 2, 3), slots=2)
+    name = ring.spec[0]
+    ring.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
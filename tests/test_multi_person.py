@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import main.multi_person as multi_person
+from main.multi_person import MultiPoseClassifier, PersonTracker, box_iou, suppress_duplicates
+from poses.rules import NO_POSE
+
+LEFT, RIGHT = (0.1, 0.1, 0.3, 0.9), (0.6, 0.1, 0.8, 0.9)
+
+
+def shifted(box, dx):
+    return (box[0] + dx, box[1], box[2] + dx, box[3])
+
+
+def test_box_iou_and_duplicate_suppression():
+    iou = box_iou([LEFT, (0.1, 0.1, 0.2, 0.9)], [LEFT, RIGHT])
+    np.testing.assert_allclose(iou, [[1.0, 0.0], [0.5, 0.0]], atol=1e-6)
+    assert suppress_duplicates([LEFT, shifted(LEFT, 0.01), RIGHT]) == [0, 2]
+    assert suppress_duplicates([]) == []
+
+
+def test_ids_follow_people_by_overlap():
+    tracker = PersonTracker(max_missed=1)
+    assert tracker.update([LEFT, RIGHT], ["a", "b"]) == [(1, "a"), (2, "b")]
+    # Listed in the other order and drifting: IDs stick to the people
+    assert tracker.update([shifted(RIGHT, 0.02), shifted(LEFT, 0.02)], ["b", "a"]) == [(2, "b"), (1, "a")]
+    # The right person leaves for longer than max_missed, then someone new appears there
+    tracker.update([LEFT], ["a"])
+    tracker.update([LEFT], ["a"])
+    assert tracker.update([LEFT, RIGHT], ["a", "c"]) == [(1, "a"), (3, "c")]
+
+
+def test_each_person_is_debounced_separately():
+    tracker = PersonTracker(hold_frames=2)
+    assert tracker.update([LEFT, RIGHT], ["a", "b"]) == [(1, NO_POSE), (2, NO_POSE)]
+    assert tracker.update([LEFT, RIGHT], ["a", "c"]) == [(1, "a"), (2, NO_POSE)]
+    assert tracker.update([LEFT, RIGHT], ["x", "c"]) == [(1, "a"), (2, "c")]
+
+
+class FakePersonDetector:
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.calls = 0
+
+    def detect(self, image):
+        self.calls += 1
+        return list(self.boxes)
+
+
+def points_in(box):
+    # Landmarks spread over the middle of box, so their padded box is box again
+    x0, y0, x1, y1 = box
+    points = np.ones((33, 4), dtype=np.float32)
+    points[:, 0] = np.linspace(x0 + (x1 - x0) / 6, x1 - (x1 - x0) / 6, 33)
+    points[:, 1] = np.linspace(y0 + (y1 - y0) / 6, y1 - (y1 - y0) / 6, 33)
+    return points
+
+
+def test_classifier_follows_people_between_detector_runs(monkeypatch):
+    monkeypatch.setattr(multi_person, "detect_in_box", lambda image, box, config, pool: points_in(box))
+    detector = FakePersonDetector([RIGHT, LEFT, shifted(LEFT, 0.005)])
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    with MultiPoseClassifier(workers=2, detect_every=3, detector=detector) as classifier:
+        frames = [classifier.process(image) for _ in range(4)]
+    assert detector.calls == 2
+    for people in frames:
+        # The duplicate crop of the left person is merged; IDs stay in detection order
+        assert [person.id for person in people] == [1, 2]
+        assert people[0].box == pytest.approx(RIGHT, abs=1e-5)
+        assert people[1].box == pytest.approx(LEFT, abs=1e-5)
+        assert all(person.points.shape == (33, 4) and isinstance(person.label, str) for person in people)
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pytest
+
+from main.recording import LandmarkRecorder, LandmarkRecording
+
+
+def synthetic_frames(count, seed=0):
+    return np.random.default_rng(seed).random((count, 33, 4)).astype(np.float32)
+
+
+def test_round_trip_keeps_missing_frames(tmp_path):
+    frames = synthetic_frames(25)
+    with LandmarkRecorder(str(tmp_path), chunk_frames=10, dtype=np.float32, fps=30.0) as recorder:
+        for i, points in enumerate(frames):
+            recorder.append(i, i / 30, None if i % 7 == 3 else points)
+
+    recording = LandmarkRecording(str(tmp_path))
+    assert len(recording) == 25
+    assert len(list(recording.chunks())) == 3
+    for index, timestamp, points in recording.frames():
+        assert timestamp == pytest.approx(index / 30)
+        if index % 7 == 3:
+            assert points is None
+        else:
+            np.testing.assert_array_equal(points, frames[index])
+    labels = recording.classify()
+    assert [label for index, _, label in labels if index % 7 == 3] == ["No Pose Detected"] * 4
+
+
+def test_append_merges_sessions(tmp_path):
+    with LandmarkRecorder(str(tmp_path), chunk_frames=4, fps=30.0) as recorder:
+        for i, points in enumerate(synthetic_frames(6)):
+            recorder.append(i, i / 30, points)
+    with LandmarkRecorder(str(tmp_path), chunk_frames=4, fps=25.0) as recorder:
+        for i, points in enumerate(synthetic_frames(3, seed=1)):
+            recorder.append(6 + i, (6 + i) / 25, points)
+
+    recording = LandmarkRecording(str(tmp_path))
+    assert len(recording) == 9
+    assert recording.meta["frames"] == 9
+    assert [(s["chunk"], s["frames"], s["fps"]) for s in recording.meta["sessions"]] == [(0, 6, 30.0), (2, 3, 25.0)]
+    np.testing.assert_array_equal(recording.arrays()[0], np.arange(9))
+
+
+def test_refuses_other_formats(tmp_path):
+    (tmp_path / "meta.json").write_text(json.dumps({"version": 0, "dtype": "float16", "landmarks": 33}))
+    with pytest.raises(ValueError):
+        LandmarkRecorder(str(tmp_path))
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from poses.registry import LazyClassifier, discover, reference_classifiers
+from poses.rules import load_definitions
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_pose_module(directory, name, body="    return True\n"):
+    (directory / f"{name}.py").write_text(f"def is_{name}_pose(landmarks):\n{body}")
+
+
+def write_definition(directory, name, priority):
+    (directory / f"{name}.json").write_text(json.dumps({
+        "name": name, "label": f"{name.title()} Pose Detected", "priority": priority, "conditions": [],
+    }))
+
+
+def test_discover_reads_sources_without_importing(tmp_path):
+    write_pose_module(tmp_path, "lotus", body="    raise AssertionError\n\nraise ImportError('imported')\n")
+    (tmp_path / "helpers.py").write_text("def is_lotus_pose(landmarks):\n    return True\n")
+    assert discover(str(tmp_path)) == {"lotus": ("poses.lotus", "is_lotus_pose")}
+
+
+def test_reference_classifiers_follow_definition_priority(tmp_path):
+    poses_dir = tmp_path / "poses"
+    definitions_dir = tmp_path / "definitions"
+    poses_dir.mkdir()
+    definitions_dir.mkdir()
+    for name in ("crow", "lotus", "plank"):
+        write_pose_module(poses_dir, name)
+    write_definition(definitions_dir, "plank", 5)
+    write_definition(definitions_dir, "crow", 20)
+    write_definition(definitions_dir, "lotus", 10)
+    write_definition(definitions_dir, "eagle", 1)  # no module: skipped
+
+    classifiers = reference_classifiers(str(poses_dir), str(definitions_dir))
+    assert [(c.module_name, label) for c, label in classifiers] == [
+        ("poses.plank", "Plank Pose Detected"),
+        ("poses.lotus", "Lotus Pose Detected"),
+        ("poses.crow", "Crow Pose Detected"),
+    ]
+    assert all(isinstance(c, LazyClassifier) for c, _ in classifiers)
+
+
+def test_bundled_classifiers_match_definitions():
+    classifiers = reference_classifiers()
+    labels = [d["label"] for d in load_definitions()]
+    assert [label for _, label in classifiers] == labels
+
+
+def test_lazy_classifier_imports_on_first_call(tmp_path, monkeypatch):
+    write_pose_module(tmp_path, "lazy_lotus", body="    return landmarks == 'lotus'\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    classifier = LazyClassifier("lazy_lotus", "is_lazy_lotus_pose")
+    assert "lazy_lotus" not in sys.modules
+    assert classifier("lotus") is True
+    assert "lazy_lotus" in sys.modules
+    assert classifier.load() is sys.modules["lazy_lotus"].is_lazy_lotus_pose
+    monkeypatch.delitem(sys.modules, "lazy_lotus")
+
+
+def test_lazy_classifier_reports_missing_function():
+    with pytest.raises(AttributeError):
+        LazyClassifier("poses.tree", "is_lotus_pose")(None)
+
+
+def test_importing_the_pipeline_loads_neither_mediapipe_nor_pose_modules():
+    code = (
+        "import sys\n"
+        "import main.pipeline\n"
+        "loaded = [m for m in ('mediapipe', 'poses.tree', 'poses.chair') if m in sys.modules]\n"
+        "print(','.join(loaded))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == ""
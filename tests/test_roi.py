@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import main.roi as roi
+from main.roi import AdaptiveResolution, RoiTracker, landmark_bbox
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    # Stand-in for MediaPipe: the person is the white area of the image;
+    # landmarks are spread over it in the input's normalized coordinates
+    inputs = []
+
+    def extract_landmarks(image, config=None, pool=None):
+        inputs.append(image.shape[:2])
+        rows, cols = np.nonzero(image[..., 0] == 255)
+        if not len(rows):
+            return None
+        height, width = image.shape[:2]
+        xs = np.linspace(cols.min(), cols.max() + 1, 33) / width
+        ys = np.linspace(rows.min(), rows.max() + 1, 33) / height
+        return [SimpleNamespace(x=x, y=y, z=0.0, visibility=1.0) for x, y in zip(xs, ys)]
+
+    monkeypatch.setattr(roi, "extract_landmarks", extract_landmarks)
+    monkeypatch.setattr(roi, "array_to_landmarks", lambda points: points)
+    return inputs
+
+
+def frame_with_person(x0, y0, x1, y1, size=(128, 256)):
+    image = np.zeros(size + (3,), dtype=np.uint8)
+    image[y0:y1, x0:x1] = 255
+    return image
+
+
+def test_landmark_bbox_pads_and_clips():
+    points = np.zeros((33, 4), dtype=np.float32)
+    points[:, 0] = np.linspace(0.1, 0.5, 33)
+    points[:, 1] = np.linspace(0.0, 0.4, 33)
+    points[:, 3] = 1.0
+    assert landmark_bbox(points, margin=0.25) == pytest.approx((0.0, 0.0, 0.6, 0.5))
+    points[3:, 3] = 0.0
+    assert landmark_bbox(points) is None
+
+
+def test_crop_follows_the_person_in_full_frame_coordinates(detector):
+    tracker = RoiTracker(margin=0.25)
+    _, points = tracker.extract(frame_with_person(64, 32, 96, 96))
+    assert detector == [(128, 256)]
+    assert tracker.box == pytest.approx((0.21875, 0.125, 0.40625, 0.875))
+    assert (points[0, 0], points[-1, 0]) == pytest.approx((0.25, 0.375))
+
+    # The next frame only runs the detector on the crop, and maps back
+    _, points = tracker.extract(frame_with_person(68, 32, 100, 96))
+    assert detector[1] == (96, 48)
+    assert (points[0, 0], points[-1, 0]) == pytest.approx((0.265625, 0.390625))
+    assert (points[0, 1], points[-1, 1]) == pytest.approx((0.25, 0.75))
+    # Its padded box no longer fits the crop, so the crop moves with it
+    assert tracker.box == pytest.approx((0.234375, 0.125, 0.421875, 0.875))
+
+
+def test_lost_person_is_searched_in_the_full_frame(detector):
+    tracker = RoiTracker()
+    tracker.extract(frame_with_person(64, 32, 96, 96))
+    _, points = tracker.extract(frame_with_person(192, 32, 224, 96))
+    assert detector[1:] == [(96, 48), (128, 256)]
+    assert points[0, 0] == pytest.approx(0.75)
+    assert tracker.extract(np.zeros((128, 256, 3), dtype=np.uint8)) == (None, None)
+    assert tracker.box is None
+
+
+def test_resolution_only_mode_downscales_the_full_frame(detector):
+    resolution = AdaptiveResolution(max_side=128)
+    tracker = RoiTracker(resolution=resolution, crop=False)
+    _, points = tracker.extract(frame_with_person(64, 32, 96, 96))
+    assert detector == [(64, 128)]
+    assert tracker.box is None
+    assert points[0, 0] == pytest.approx(0.25)
+
+
+def test_adaptive_resolution_follows_the_frame_rate():
+    resolution = AdaptiveResolution(target_fps=20, max_side=1000, min_side=500, step=0.5, window=3)
+    for _ in range(3):
+        resolution.record(0.1)
+    assert resolution.side == 500
+    assert resolution.scale_for((1000, 800)) == 0.5
+    for _ in range(3):
+        resolution.record(0.1)
+    assert resolution.side == 500
+    for _ in range(3):
+        resolution.record(0.01)
+    assert resolution.side == 1000
+    assert resolution.scale_for((100, 80)) == 1.0
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from main.pipeline import POSE_CLASSIFIERS
+from poses.geometry import PoseLandmark as L
+from poses.rules import NO_POSE, PoseResult, RuleEngine, get_rule_engine, load_definitions
+
+
+def random_frames(count, seed=0):
+    return np.random.default_rng(seed).random((count, 33, 4)).astype(np.float32)
+
+
+@pytest.mark.parametrize("coincident_hips", [False, True])
+def test_definitions_match_reference_pose_functions(coincident_hips):
+    engine = get_rule_engine()
+    frames = random_frames(20000)
+    if coincident_hips:
+        frames[:, L.RIGHT_HIP] = frames[:, L.LEFT_HIP]
+    evaluation = engine.evaluate(frames)
+    assert [label for _, label in POSE_CLASSIFIERS] == engine.labels
+    for i, (pose_func, label) in enumerate(POSE_CLASSIFIERS):
+        np.testing.assert_array_equal(np.asarray(pose_func(frames)), evaluation.detected[:, i], err_msg=label)
+    # Single frames take the same path as stacks
+    for frame, label in zip(frames[:200], evaluation.labels()[:200]):
+        assert engine.evaluate(frame).label() == label
+
+
+def climb_to_pose(engine, pose_index, rng, count=256, steps=600, wanted=20):
+    # Random frames nudged uphill on the pose's score until enough pass its rules
+    frames = random_frames(count, rng.integers(1 << 31))
+    score = engine.evaluate(frames).scores[:, pose_index]
+    for _ in range(steps):
+        candidate = np.clip(frames + rng.normal(0, 0.02, frames.shape).astype(np.float32), 0, 1)
+        candidate_score = engine.evaluate(candidate).scores[:, pose_index]
+        better = candidate_score > score
+        frames[better], score[better] = candidate[better], candidate_score[better]
+        detected = engine.evaluate(frames).detected[:, pose_index]
+        if detected.sum() >= wanted:
+            break
+    return frames[detected]
+
+
+def test_definitions_match_reference_functions_on_positives_and_boundaries():
+    # Random frames almost never pass a pose (cobra: never), so constructed
+    # positives cover the passing branch, and frames bisected onto the edge
+    # of detection, between a positive and a random negative, the thresholds
+    engine = get_rule_engine()
+    rng = np.random.default_rng(0)
+    for i, (pose_func, label) in enumerate(POSE_CLASSIFIERS):
+        positives = climb_to_pose(engine, i, rng)
+        assert len(positives), f"no positive frame found for {label}"
+        negatives = random_frames(4 * len(positives), rng.integers(1 << 31))
+        negatives = negatives[~engine.evaluate(negatives).detected[:, i]][:len(positives)]
+        mix = lambda t: positives + (negatives - positives) * t[:, None, None]
+        inside, outside = np.zeros(len(positives), np.float32), np.ones(len(positives), np.float32)
+        for _ in range(40):
+            middle = (inside + outside) / 2
+            detected = engine.evaluate(mix(middle)).detected[:, i]
+            inside, outside = np.where(detected, middle, inside), np.where(detected, outside, middle)
+        frames = np.concatenate(
+            [positives, negatives] + [mix(np.clip(inside + offset, 0, 1)) for offset in (-1e-3, -1e-5, 0, 1e-5, 1e-3)]
+            + [mix(outside)]
+        )
+        detected = engine.evaluate(frames).detected[:, i]
+        assert detected.any() and not detected.all()
+        np.testing.assert_array_equal(np.asarray(pose_func(frames)), detected, err_msg=label)
+
+
+def test_tolerance_optional_and_any_conditions():
+    engine = RuleEngine([{
+        "name": "test",
+        "features": {"knee_gap": {"sub": ["left_knee_angle", "right_knee_angle"]}},
+        "conditions": [
+            {"name": "left", "feature": "left_knee_angle", "min": 100},
+            {"name": "right", "feature": "right_knee_angle", "min": 100},
+            {"name": "either", "any": [{"feature": "knee_gap", "min": 50}, {"feature": "knee_gap", "max": -50}]},
+            {"name": "level", "feature": "shoulder_tilt", "max": 0.01, "required": False},
+        ],
+        "tolerance": 1,
+    }])
+    frames = random_frames(5000)
+    evaluation = engine.evaluate(frames)
+    features = engine.feature_set.as_dict(evaluation.features)
+    passed = np.stack([
+        features["left_knee_angle"] > 100,
+        features["right_knee_angle"] > 100,
+        np.abs(features["knee_gap"]) > 50,
+    ])
+    np.testing.assert_array_equal(evaluation.detected[:, 0], passed.sum(axis=0) >= 2)
+    assert evaluation.detected[:, 0].any() and not evaluation.detected[:, 0].all()
+
+
+def test_result_carries_scores_and_margins():
+    engine = get_rule_engine()
+    frame = random_frames(1)[0]
+    result = engine.evaluate(frame).result()
+    assert isinstance(result, PoseResult)
+    assert set(result.scores) == set(engine.pose_names)
+    assert all(0.0 <= score <= 1.0 for score in result.scores.values())
+    legs = result.margins["triangle"]["legs_straight"]
+    features = engine.feature_set.as_dict(engine.feature_set.compute(frame))
+    assert legs == pytest.approx(float(features["leg_angle_folded"]) - 160, abs=1e-3)
+    assert (result == NO_POSE) == (result.pose is None)
+
+
+def test_derived_angle_conditions_score_in_degrees():
+    engine = get_rule_engine()
+    # leg_angle_folded is a min of two folded knee angles: an angle, scored on the 10 degree scale
+    column = dict(engine.pose_conditions["triangle"])["legs_straight"]
+    assert engine._scale[column] == 10.0
+
+
+def test_with_bounds_evaluates_candidate_axes():
+    engine = get_rule_engine()
+    frames = random_frames(300)
+    bound_min, bound_max = engine.bounds
+    candidates = np.stack([bound_min, bound_min + 1000])
+    detected = engine.with_bounds(candidates[:, np.newaxis], bound_max).evaluate(frames).detected
+    np.testing.assert_array_equal(detected[0], engine.evaluate(frames).detected)
+    assert not detected[1].any()
+
+
+def test_definitions_are_ordered_by_priority():
+    priorities = [definition.get("priority", 100) for definition in load_definitions()]
+    assert priorities == sorted(priorities)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from main.pipeline import POSE_CLASSIFIERS, classify_reference
+from main.scheduler import PoseScheduler
+from poses.geometry import ORIENTATIONS, body_orientation
+from poses.rules import NO_POSE, load_definitions
+
+
+def random_frames(count, seed=0):
+    return np.random.default_rng(seed).random((count, 33, 4)).astype(np.float32)
+
+
+def test_scheduled_cascade_matches_fixed_order():
+    frames = random_frames(3000)
+    scheduler = PoseScheduler(POSE_CLASSIFIERS)
+    expected = [classify_reference(points) for points in frames]
+    scheduled = [classify_reference(points, scheduler=scheduler) for points in frames]
+    assert scheduled == expected
+    assert any(label != NO_POSE for label in expected)
+    # Poses behind the first match are skipped
+    assert scheduler.stats()["rules_per_frame"] < len(POSE_CLASSIFIERS)
+
+
+def test_orientation_pruning_drops_unlisted_orientations():
+    frames = random_frames(3000, seed=1)
+    allowed = {d["label"]: d["orientations"] for d in load_definitions()}
+    scheduler = PoseScheduler(POSE_CLASSIFIERS, prune_orientation=True)
+    for points in frames:
+        orientation = ORIENTATIONS[int(body_orientation(points))]
+        # The fixed cascade restricted to poses listed for this orientation
+        expected = NO_POSE
+        for pose_func, label in POSE_CLASSIFIERS:
+            if orientation in allowed[label] and pose_func(points, None):
+                expected = label
+                break
+        assert classify_reference(points, scheduler=scheduler) == expected
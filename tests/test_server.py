@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import main.server as server
+from main.server import MicroBatcher, Overloaded
+
+
+class Batches(list):
+    # Worker stand-in: records each batch and echoes its frames once released
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, blobs):
+        self.append(list(blobs))
+        self.release.wait(5)
+        return [{"frame": data.decode()} for data in blobs]
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    batches = Batches()
+    monkeypatch.setattr(server, "classify_batch", batches)
+    return batches
+
+
+def run(coroutine):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        return asyncio.run(coroutine(executor))
+
+
+def test_concurrent_requests_share_a_batch(batches):
+    async def scenario(executor):
+        batcher = MicroBatcher(executor, max_batch=4, max_delay_ms=50)
+        batcher.start()
+        records = await asyncio.gather(*(batcher.submit(f"{i}".encode()) for i in range(6)))
+        await batcher.close()
+        return records, batcher.stats()
+
+    records, stats = run(scenario)
+    assert [record["frame"] for record in records] == [str(i) for i in range(6)]
+    assert [len(batch) for batch in batches] == [4, 2]
+    assert (stats["batches"], stats["mean_batch_size"]) == (2, 3.0)
+
+
+def test_lone_request_is_flushed_after_max_delay(batches):
+    async def scenario(executor):
+        batcher = MicroBatcher(executor, max_batch=8, max_delay_ms=30)
+        batcher.start()
+        start = time.perf_counter()
+        record = await batcher.submit(b"alone")
+        waited = time.perf_counter() - start
+        await batcher.close()
+        return record, waited
+
+    record, waited = run(scenario)
+    assert record == {"frame": "alone"}
+    assert 0.02 <= waited < 1.0
+    assert batches == [[b"alone"]]
+
+
+def test_full_queue_rejects(batches):
+    async def scenario(executor):
+        batcher = MicroBatcher(executor, max_queue=1)
+        pending = asyncio.ensure_future(batcher.submit(b"queued"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await batcher.submit(b"rejected")
+        await batcher.close()
+        with pytest.raises(Overloaded):
+            await pending
+        return batcher.stats()
+
+    assert run(scenario)["rejected"] == 1
+
+
+def test_close_finishes_running_batches_and_fails_queued_frames(batches):
+    batches.release.clear()
+
+    async def scenario(executor):
+        batcher = MicroBatcher(executor, max_batch=1, max_delay_ms=1, max_in_flight=1)
+        batcher.start()
+        running = asyncio.ensure_future(batcher.submit(b"running"))
+        await asyncio.sleep(0.05)
+        waiting = [asyncio.ensure_future(batcher.submit(f"{i}".encode())) for i in range(3)]
+        await asyncio.sleep(0.05)
+        closing = asyncio.ensure_future(batcher.close())
+        await asyncio.sleep(0.05)
+        batches.release.set()
+        await asyncio.wait_for(closing, 2)
+        with pytest.raises(Overloaded):
+            await batcher.submit(b"late")
+        return await running, await asyncio.gather(*waiting, return_exceptions=True)
+
+    running, waiting = run(scenario)
+    assert running == {"frame": "running"}
+    assert all(isinstance(result, Overloaded) for result in waiting)
+    assert batches == [[b"running"]]
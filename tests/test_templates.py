@@ -0,0 +1,74 @@
+import numpy as np
+
+from poses.geometry import MIRROR_INDEX
+from poses.templates import TemplateIndex
+
+
+def synthetic_poses(count, seed=0):
+    points = np.random.default_rng(seed).random((count, 33, 4)).astype(np.float32)
+    points[..., 3] = 1.0
+    return points
+
+
+def build_index(poses, **kwargs):
+    index = TemplateIndex(**kwargs)
+    for i, points in enumerate(poses):
+        index.add(f"Pose {i}", points, source=f"pose_{i}.jpg")
+    return index
+
+
+def test_jittered_pose_matches_its_template():
+    poses = synthetic_poses(5)
+    index = build_index(poses)
+    assert len(index) == 10
+    rng = np.random.default_rng(1)
+    for i, points in enumerate(poses):
+        jittered = points + rng.normal(0, 0.005, points.shape).astype(np.float32)
+        best = index.query(jittered, k=1)[0]
+        assert (best.label, best.source) == (f"Pose {i}", f"pose_{i}.jpg")
+        assert best.score > 0.99
+    # The batched form agrees with one query at a time
+    assert index.similarities(poses).argmax(axis=1).tolist() == [2 * i for i in range(5)]
+
+
+def test_mirrored_pose_matches_mirrored_template():
+    poses = synthetic_poses(3)
+    mirrored = poses[1][list(MIRROR_INDEX)].copy()
+    mirrored[:, 0] = 1 - mirrored[:, 0]
+    best = build_index(poses).query(mirrored, k=1)[0]
+    assert (best.label, best.source) == ("Pose 1", "pose_1.jpg (mirrored)")
+    assert build_index(poses, mirror=False).query(mirrored, k=1)[0].score < best.score
+
+
+def test_min_similarity_rejects_unlike_poses():
+    index = build_index(synthetic_poses(3))
+    stranger = synthetic_poses(1, seed=7)[0]
+    assert index.query(stranger, min_similarity=0.999) == []
+    assert index.classify(stranger, min_similarity=0.999) == "No Pose Detected"
+    assert index.classify(synthetic_poses(3)[2]) == "Pose 2"
+    assert len(index.query(stranger, k=3)) == 3
+
+
+def test_save_load_round_trip(tmp_path):
+    poses = synthetic_poses(4)
+    index = build_index(poses, min_visibility=0.3)
+    path = str(tmp_path / "templates.npz")
+    index.save(path)
+    loaded = TemplateIndex.load(path)
+    assert (loaded.labels, loaded.sources, loaded.min_visibility) == (index.labels, index.sources, 0.3)
+    np.testing.assert_array_equal(loaded.similarities(poses), index.similarities(poses))
+
+
+def test_match_keeps_the_label_stable_across_scores():
+    poses = synthetic_poses(2)
+    index = TemplateIndex()
+    index.add("Tree Pose Detected", poses[0])
+    index.add("lotus", poses[1])
+    rng = np.random.default_rng(2)
+    results = [index.match(poses[0] + rng.normal(0, 0.005, poses[0].shape).astype(np.float32)) for _ in range(5)]
+    # The score varies frame to frame; the label that analytics and the hold see does not
+    assert {result.label for result in results} == {"Tree Pose Detected"}
+    assert all(result.pose == "tree" and 0.99 < result.scores["tree"] <= 1.0 for result in results)
+    lotus = index.match(poses[1])
+    assert (lotus.label, lotus.pose) == ("lotus", "lotus")
+    assert index.match(synthetic_poses(1, seed=7)[0], min_similarity=0.999) is None
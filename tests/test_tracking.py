@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from main.tracking import NO_POSE, EmaFilter, LabelHysteresis, OneEuroFilter
+
+
+def noisy_track(count=300, seed=0):
+    # A still pose with landmark jitter, at 30 FPS
+    rng = np.random.default_rng(seed)
+    still = rng.random((33, 4)).astype(np.float32)
+    return still, still + rng.normal(0, 0.01, (count, 33, 4)).astype(np.float32)
+
+
+@pytest.mark.parametrize("landmark_filter", [EmaFilter(0.3), OneEuroFilter(min_cutoff=1.0, beta=0.05)])
+def test_filters_reduce_jitter_on_a_still_pose(landmark_filter):
+    still, frames = noisy_track()
+    smoothed = np.array([landmark_filter(points, i / 30) for i, points in enumerate(frames)])
+    raw_error = np.abs(frames[50:] - still).mean()
+    assert np.abs(smoothed[50:] - still).mean() < 0.6 * raw_error
+
+
+def test_one_euro_follows_fast_motion():
+    landmark_filter = OneEuroFilter(min_cutoff=1.0, beta=5.0)
+    start = np.zeros((33, 4), dtype=np.float32)
+    landmark_filter(start, 0.0)
+    for i in range(1, 10):
+        out = landmark_filter(start + 0.1 * i, i / 30)
+    # A responsive cutoff keeps the lag well under the distance covered
+    assert np.abs(out - (start + 0.9)).max() < 0.3
+
+
+def test_filter_reset_starts_afresh():
+    landmark_filter = EmaFilter(0.1)
+    landmark_filter(np.zeros((33, 4), dtype=np.float32))
+    landmark_filter.reset()
+    np.testing.assert_array_equal(landmark_filter(np.ones((33, 4), dtype=np.float32)), 1.0)
+
+
+def test_hysteresis_needs_hold_frames_to_switch():
+    labels = LabelHysteresis(hold_frames=3)
+    sequence = ["Tree", "Tree", "Chair", "Tree", "Tree", "Tree", "Chair", "Chair", "Chair"]
+    shown = [labels.update(label) for label in sequence]
+    assert shown == [NO_POSE, NO_POSE, NO_POSE, NO_POSE, NO_POSE, "Tree", "Tree", "Tree", "Chair"]
+    labels.reset()
+    assert labels.update("Tree") == NO_POSE
+    # hold_frames=1 passes labels straight through
+    passthrough = LabelHysteresis(hold_frames=1)
+    assert [passthrough.update(label) for label in sequence] == sequence
+
+
+class FakeRoi:
+    # Stands in for the detector: every frame is its own landmarks
+    def extract(self, frame, config, pool):
+        return (None, None) if frame is None else ("landmarks", frame)
+
+    def reset(self):
+        pass
+
+
+def test_tracker_reports_the_held_label_with_current_scores():
+    from main.tracking import PoseTracker
+    from poses.rules import PoseResult
+
+    def classify(points, debug_info=None):
+        pose = "tree" if points[0, 0] > 0.5 else "chair"
+        return PoseResult(f"{pose.title()} Pose Detected", pose, {"tree": float(points[0, 0])})
+
+    tracker = PoseTracker(hold_frames=2, roi=FakeRoi(), classify=classify)
+    tree, chair = np.full((33, 4), 0.9, np.float32), np.full((33, 4), 0.2, np.float32)
+    results = [tracker.update(points)[1] for points in (tree, tree, chair)]
+    assert results[1].pose == "tree"
+    # A one-frame disagreement keeps the announced pose but shows this frame's scores
+    assert (results[2].label, results[2].pose) == ("Tree Pose Detected", "tree")
+    assert results[2].scores == {"tree": pytest.approx(0.2)}
+    assert tracker.update(None)[1].label == "Tree Pose Detected"
+    assert tracker.update(None)[1].label == NO_POSE
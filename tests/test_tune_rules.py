@@ -0,0 +1,64 @@
+import copy
+
+import numpy as np
+import pytest
+
+from main.tune_rules import confusion_matrices, predicted_classes, summarize, tunable_params, tune
+from poses.rules import DEFINITIONS_DIR, NO_POSE, RuleEngine, load_definitions
+
+
+def test_every_bound_has_a_kind_and_a_range_in_its_units():
+    params = tunable_params(load_definitions())
+    assert params
+    assert all(param.kind is not None for param in params)
+    legs = next(p for p in params if (p.pose, p.condition) == ("triangle", "legs_straight"))
+    assert legs.kind == "angle"
+    assert (legs.low, legs.high) == (130.0, 190.0)
+
+
+def test_mixed_kind_feature_needs_an_explicit_scale():
+    definition = {
+        "name": "odd",
+        "features": {"odd_mix": {"max": ["left_knee_angle", "feet_hip_ratio"]}},
+        "conditions": [{"name": "mixed", "feature": "odd_mix", "min": 1}],
+    }
+    with pytest.raises(ValueError):
+        tunable_params([definition])
+    definition["conditions"][0]["scale"] = 2
+    assert tunable_params([definition])[0].high == 7
+
+
+def test_summarize_per_class_precision_and_recall():
+    truth = np.array([0, 0, 1, 1, 2])
+    confusion = confusion_matrices(truth, np.array([0, 1, 1, 1, 2]), 3)
+    stats = summarize(confusion)
+    assert confusion.tolist() == [[1, 1, 0], [0, 2, 0], [0, 0, 1]]
+    assert stats["accuracy"] == pytest.approx(0.8)
+    assert stats["precision"].tolist() == pytest.approx([1.0, 2 / 3, 1.0])
+    assert stats["recall"].tolist() == pytest.approx([0.5, 1.0, 1.0])
+
+
+def test_coordinate_search_recovers_a_shifted_threshold():
+    definitions = load_definitions()
+    # Ground truth from definitions whose triangle legs only need 150 degrees
+    shifted = copy.deepcopy(definitions)
+    triangle = next(d for d in shifted if d["name"] == "triangle")
+    next(c for c in triangle["conditions"] if c["name"] == "legs_straight")["min"] = 150
+
+    points = np.random.default_rng(0).random((20000, 33, 4)).astype(np.float32)
+    engine = RuleEngine(definitions)
+    classes = list(engine.labels) + [NO_POSE]
+    index = {label: i for i, label in enumerate(classes)}
+    truth = np.array([index[label] for label in RuleEngine(shifted).evaluate(points).labels()])
+    features = engine.feature_set.compute(points)
+    before = summarize(confusion_matrices(truth, predicted_classes(engine.evaluate(points).detected), len(classes)))
+
+    params = tunable_params(definitions, select=["triangle.legs_straight"])
+    values, scored = tune(features, truth, params, DEFINITIONS_DIR, steps=7, rounds=3, workers=1)
+    assert scored > 1
+    assert values[0] == pytest.approx(150.0)
+    bound_min, bound_max = engine.bounds
+    bound_min[params[0].bound] = values[0]
+    tuned = engine.with_bounds(bound_min, bound_max).evaluate_features(features)
+    after = summarize(confusion_matrices(truth, predicted_classes(tuned.detected), len(classes)))
+    assert after["accuracy"] == 1.0 > before["accuracy"]
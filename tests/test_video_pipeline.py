@@ -0,0 +1,69 @@
+import numpy as np
+
+from main.video_pipeline import DROP_KEEP_ALL, DROP_LATEST_WINS, FrameQueue, VideoPipeline
+
+
+class FakeCapture:
+    # count tiny frames whose first pixel is the frame number
+    def __init__(self, count):
+        self.frames = [np.full((2, 2, 3), i, dtype=np.uint8) for i in range(count)]
+
+    def read(self):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+
+def label_process(frame, pool):
+    return None, f"frame {int(frame.bgr[0, 0, 0])}"
+
+
+def run_pipeline(count, process=label_process, **kwargs):
+    rendered = []
+    pipeline = VideoPipeline(FakeCapture(count), lambda frame, landmarks, result: rendered.append(result),
+                             drop_policy=DROP_KEEP_ALL, process=process, **kwargs)
+    return pipeline.run(), rendered
+
+
+def test_keep_all_renders_every_frame_in_order():
+    report, rendered = run_pipeline(20)
+    assert rendered == [f"frame {i}" for i in range(20)]
+    assert report["inference"]["count"] == 20
+    assert report["dropped"] == {"frames": 0, "results": 0}
+    assert "errors" not in report
+
+
+def test_several_workers_never_render_an_older_frame():
+    report, rendered = run_pipeline(50, workers=3)
+    indices = [int(result.split()[1]) for result in rendered]
+    assert indices == sorted(indices)
+    assert report["inference"]["count"] == 50
+
+
+def test_failing_frames_are_skipped_and_counted():
+    def process(frame, pool):
+        if frame.index % 5 == 2:
+            raise RuntimeError("bad frame")
+        return label_process(frame, pool)
+
+    report, rendered = run_pipeline(20, process=process)
+    assert len(rendered) == 16
+    assert report["errors"] == {"inference": 4, "last": "inference: RuntimeError: bad frame"}
+
+
+def test_failed_warmup_keeps_the_workers(monkeypatch):
+    def broken_warmup(configs, pool):
+        raise RuntimeError("no model")
+
+    monkeypatch.setattr("main.video_pipeline.warmup", broken_warmup)
+    report, rendered = run_pipeline(5, warmup_configs=[None])
+    assert len(rendered) == 5
+    assert report["errors"]["warmup"] == 1
+
+
+def test_latest_wins_drops_the_oldest_item():
+    frames = FrameQueue(maxsize=2, drop_policy=DROP_LATEST_WINS)
+    for i in range(5):
+        frames.put(i)
+    assert [frames.get(), frames.get()] == [3, 4]
+    assert frames.dropped == 3
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+import pytest
+
+import main.analyze_video as analyze_video
+from main.analyze_video import build_timeline, plan_ranges
+from main.video_source import DecodeAhead, VideoSource, open_source
+
+
+class FakeSource(VideoSource):
+    # count frames whose first pixel is their index; fails at fail_at if set
+    def __init__(self, count, fail_at=None, frame_count=None, seekable=False):
+        super().__init__(fps=10.0, frame_count=frame_count)
+        self.count = count
+        self.fail_at = fail_at
+        self.seekable = seekable
+
+    def read(self):
+        if self._next == self.fail_at:
+            raise IOError("corrupt packet")
+        if self._next >= self.count:
+            return False, None
+        self.index = self._next
+        self._next += 1
+        return True, np.full((2, 2, 3), self.index, dtype=np.uint8)
+
+
+def test_decode_ahead_yields_frames_in_order_until_end():
+    reader = DecodeAhead(FakeSource(20), queue_size=2, end=15)
+    items = list(reader)
+    reader.close()
+    assert [index for index, _, _ in items] == list(range(15))
+    assert items[3][1] == pytest.approx(0.3)
+    assert all(frame[0, 0, 0] == index for index, _, frame in items)
+
+
+def test_decode_ahead_raises_read_errors_after_the_good_frames():
+    reader = DecodeAhead(FakeSource(20, fail_at=5))
+    seen = []
+    with pytest.raises(IOError, match="corrupt packet"):
+        for index, _, _ in reader:
+            seen.append(index)
+    reader.close()
+    assert seen == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("frame_count, workers, stride", [(3000, 4, 1), (3001, 3, 7), (1000, 8, 1), (100, 4, 1)])
+def test_plan_ranges_cover_the_video_contiguously(frame_count, workers, stride):
+    ranges = plan_ranges(frame_count, workers, stride)
+    assert ranges[0][0] == 0 and ranges[-1][1] == frame_count
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    assert all(start % stride == 0 for start, _ in ranges)
+    assert len(ranges) <= max(1, min(workers, frame_count // 300))
+
+
+def test_image_sequence_source_strides_and_seeks(tmp_path):
+    for i in range(6):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), np.full((4, 4, 3), i * 10, dtype=np.uint8))
+    with open_source(str(tmp_path), stride=2, fps=5) as source:
+        assert (source.seekable, source.frame_count, source.fps) == (True, 6, 5)
+        indices = []
+        while True:
+            ok, frame = source.read()
+            if not ok:
+                break
+            assert frame[0, 0, 0] == source.index * 10
+            indices.append(source.index)
+        assert indices == [0, 2, 4]
+    with open_source(str(tmp_path)) as source:
+        source.seek(4)
+        assert source.read()[0] and source.index == 4
+
+
+def fake_analyze_range(args):
+    # Module level so worker processes can unpickle it
+    spec, start, end, stride, fps, config = args
+    return [(i, i / 10, f"{start}-{end}") for i in range(start, end if end is not None else 10, stride)]
+
+
+@pytest.mark.parametrize("frame_count, seekable, parallel", [(None, True, False), (0, True, False),
+                                                             (900, False, False), (900, True, True)])
+def test_analyze_video_only_splits_seekable_sources_of_known_length(monkeypatch, frame_count, seekable, parallel):
+    monkeypatch.setattr(analyze_video, "open_source",
+                        lambda spec, stride=1, fps=None: FakeSource(0, frame_count=frame_count, seekable=seekable))
+    monkeypatch.setattr(analyze_video, "_analyze_range", fake_analyze_range)
+    samples, info = analyze_video.analyze_video("video.mp4", workers=3)
+    assert info["parallel"] == parallel
+    indices = [index for index, _, _ in samples]
+    assert indices == list(range(900 if parallel else 10))
+    if parallel:
+        assert [label for _, _, label in samples[::300]] == ["0-300", "300-600", "600-900"]
+
+
+def test_timeline_smooths_flicker_and_absorbs_short_segments():
+    labels = ["Tree"] * 30 + ["Chair"] + ["Tree"] * 29 + ["Chair"] * 5 + ["Dog"] * 40
+    samples = [(i, i / 10, label) for i, label in enumerate(labels)]
+    segments = build_timeline(samples, window=5, min_duration=1.0, frame_duration=0.1)
+    assert [(s["label"], s["start"], s["end"]) for s in segments] == [("Tree", 0.0, 6.5), ("Dog", 6.5, 10.5)]
+    assert segments[0]["confidence"] == pytest.approx(59 / 65, abs=1e-3)
+    assert build_timeline([]) == []